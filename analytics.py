@@ -0,0 +1,201 @@
+import array
+import asyncio
+import heapq
+import os
+import struct
+import time
+import zlib
+from collections import OrderedDict
+
+from storage import atomic_write
+
+# Windowed mention counts. Every mentioned user gets three ring buffers of
+# per-bucket counts (the last 60 minutes, 24 hours and 30 days), so "how often
+# in the last hour/day/week/month" is a sum over at most 60 slots and never
+# touches message history. Slots are cleared lazily as time moves past them.
+# Each guild keeps its counters in most-recently-mentioned order, so a top-N
+# query only visits users mentioned inside the window, and users with nothing
+# left in any window are dropped.
+
+# window -> (ring, number of buckets summed, bucket length in minutes)
+WINDOWS = {
+    "hour": ("minutes", 60, 1),
+    "day": ("hours", 24, 60),
+    "week": ("days", 7, 1440),
+    "month": ("days", 30, 1440),
+}
+RING_SIZES = {"minutes": 60, "hours": 24, "days": 30}
+RETENTION_MINUTES = RING_SIZES["days"] * 1440
+
+MAGIC = b"MWIN\x01"
+RECORD = struct.Struct("<QQI")
+RECORD_SIZE = RECORD.size + sum(RING_SIZES.values()) * 4
+
+
+class MentionCounter:
+    __slots__ = ("minutes", "hours", "days", "last")
+
+    def __init__(self, last):
+        self.minutes = array.array("I", bytes(RING_SIZES["minutes"] * 4))
+        self.hours = array.array("I", bytes(RING_SIZES["hours"] * 4))
+        self.days = array.array("I", bytes(RING_SIZES["days"] * 4))
+        # Absolute minute of the latest mention
+        self.last = last
+
+    def add(self, minute):
+        # A clock stepping backwards counts towards the latest bucket
+        minute = max(minute, self.last)
+        for ring, scale in ((self.minutes, 1), (self.hours, 60), (self.days, 1440)):
+            size = len(ring)
+            previous, current = self.last // scale, minute // scale
+            if current - previous >= size:
+                for slot in range(size):
+                    ring[slot] = 0
+            else:
+                for bucket in range(previous + 1, current + 1):
+                    ring[bucket % size] = 0
+            ring[current % size] += 1
+        self.last = minute
+
+    def count(self, window, minute):
+        ring_name, buckets, scale = WINDOWS[window]
+        ring = getattr(self, ring_name)
+        size = len(ring)
+        current, last = minute // scale, self.last // scale
+        # Buckets inside the window that still hold data
+        first = max(current - buckets + 1, last - size + 1)
+        return sum(ring[bucket % size] for bucket in range(first, last + 1))
+
+
+class MentionAnalytics:
+    def __init__(self, filename, flush_interval=60.0):
+        self.filename = filename
+        self.flush_interval = flush_interval
+        # guild_id -> OrderedDict(user_id -> MentionCounter), least recent first
+        self.guilds = {}
+        self.dirty = False
+        self._task = None
+        self._io_lock = asyncio.Lock()
+        self._load()
+
+    def record(self, guild_id, user_id, now=None):
+        minute = int((now or time.time()) // 60)
+        guild = self.guilds.get(guild_id)
+        if guild is None:
+            guild = self.guilds[guild_id] = OrderedDict()
+        counter = guild.get(user_id)
+        if counter is None:
+            counter = guild[user_id] = MentionCounter(minute)
+        else:
+            guild.move_to_end(user_id)
+        counter.add(minute)
+        self.dirty = True
+
+    def count(self, guild_id, user_id, window, now=None):
+        counter = self.guilds.get(guild_id, {}).get(user_id)
+        if counter is None:
+            return 0
+        return counter.count(window, int((now or time.time()) // 60))
+
+    def top(self, guild_id, window, n=10, now=None):
+        # [(user_id, count)] for the users mentioned most within the window
+        minute = int((now or time.time()) // 60)
+        _, buckets, scale = WINDOWS[window]
+        since = (minute // scale - buckets + 1) * scale
+        counts = []
+        for user_id, counter in reversed(self.guilds.get(guild_id, {}).items()):
+            if counter.last < since:
+                break
+            counts.append((counter.count(window, minute), user_id))
+        return [(user_id, count) for count, user_id in heapq.nlargest(n, counts) if count]
+
+    def prune(self, now=None):
+        # Drop users with nothing left in any window
+        cutoff = int((now or time.time()) // 60) - RETENTION_MINUTES
+        for guild_id in list(self.guilds):
+            guild = self.guilds[guild_id]
+            while guild:
+                user_id, counter = next(iter(guild.items()))
+                if counter.last >= cutoff:
+                    break
+                del guild[user_id]
+                self.dirty = True
+            if not guild:
+                del self.guilds[guild_id]
+
+    # ---------- persistence ----------
+
+    def _load(self):
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, 'rb') as f:
+            blob = f.read()
+        if not blob.startswith(MAGIC):
+            print(f"❌ Ignoring {self.filename}: unknown format")
+            return
+        data = memoryview(zlib.decompress(blob[len(MAGIC):]))
+        for offset in range(0, len(data), RECORD_SIZE):
+            guild_id, user_id, last = RECORD.unpack_from(data, offset)
+            counter = MentionCounter(last)
+            position = offset + RECORD.size
+            for ring_name, size in RING_SIZES.items():
+                ring = array.array("I")
+                ring.frombytes(data[position:position + size * 4])
+                setattr(counter, ring_name, ring)
+                position += size * 4
+            self.guilds.setdefault(guild_id, OrderedDict())[user_id] = counter
+        self.prune()
+
+    def _serialize(self):
+        # Raw little-endian records; zlib squeezes out the empty slots
+        chunks = []
+        for guild_id, guild in self.guilds.items():
+            for user_id, counter in guild.items():
+                chunks.append(RECORD.pack(guild_id, user_id, counter.last))
+                chunks.append(counter.minutes.tobytes())
+                chunks.append(counter.hours.tobytes())
+                chunks.append(counter.days.tobytes())
+        return b"".join(chunks)
+
+    def _write(self, raw):
+        return atomic_write(self.filename, MAGIC + zlib.compress(raw))
+
+    async def flush(self):
+        async with self._io_lock:
+            self.prune()
+            if not self.dirty:
+                return
+            self.dirty = False
+            raw = self._serialize()
+            try:
+                await asyncio.to_thread(self._write, raw)
+            except BaseException:
+                self.dirty = True
+                raise
+
+    def flush_sync(self):
+        if self.dirty:
+            self._write(self._serialize())
+            self.dirty = False
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Failed to save mention analytics: {e}")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -0,0 +1,307 @@
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Benchmarks the on_message hot path and the storage-touching command
+# callbacks against synthetic traffic, without connecting to Discord.
+#
+#   python benchmark.py                     run and print a report
+#   python benchmark.py --save-baseline     also store the results
+#   python benchmark.py --compare           fail if slower than the baseline
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+# ==================== SYNTHETIC DISCORD OBJECTS ====================
+
+class FakeAsset:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.bot = False
+        self.name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+        self.display_avatar = FakeAsset()
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+
+    def get_member(self, user_id):
+        return None
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+
+class FakeMessage:
+    def __init__(self, message_id, guild, channel, author, mentions):
+        self.id = message_id
+        self.guild = guild
+        self.channel = channel
+        self.author = author
+        self.mentions = mentions
+        self.content = "hello " + " ".join(user.mention for user in mentions)
+        self._state = None
+
+
+class FakeResponse:
+    def __init__(self):
+        self.sent = 0
+
+    async def send_message(self, *args, **kwargs):
+        self.sent += 1
+
+    async def defer(self, *args, **kwargs):
+        pass
+
+
+class FakeInteraction:
+    def __init__(self, guild, channel, user):
+        self.guild = guild
+        self.guild_id = guild.id
+        self.channel = channel
+        self.user = user
+        self.response = FakeResponse()
+        self.followup = channel
+
+
+# ==================== TRAFFIC ====================
+
+class Traffic:
+    def __init__(self, args):
+        self.random = random.Random(args.seed)
+        self.guilds = [FakeGuild(1_000_000_000_000_000 + i) for i in range(args.guilds)]
+        self.channels = {guild.id: FakeChannel(guild.id + 1) for guild in self.guilds}
+        self.users = [FakeUser(2_000_000_000_000_000 + i) for i in range(args.users)]
+        # Zipf-like activity: a few users send most of the messages
+        self.user_weights = list(itertools.accumulate(1 / (rank + 1) ** args.user_skew for rank in range(args.users)))
+        self.mention_weights = list(itertools.accumulate(float(w) for w in args.mention_weights.split(",")))
+        self.next_id = 3_000_000_000_000_000
+
+    def user(self):
+        return self.random.choices(self.users, cum_weights=self.user_weights)[0]
+
+    def guild(self):
+        return self.random.choice(self.guilds)
+
+    def message(self):
+        guild = self.guild()
+        mention_count = self.random.choices(range(len(self.mention_weights)), cum_weights=self.mention_weights)[0]
+        mentions = [self.user() for _ in range(mention_count)]
+        self.next_id += 1
+        return FakeMessage(self.next_id, guild, self.channels[guild.id], self.user(), mentions)
+
+    def interaction(self):
+        guild = self.guild()
+        return FakeInteraction(guild, self.channels[guild.id], self.user())
+
+
+# ==================== MEASUREMENT ====================
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def measure(name, count, make_call):
+    # Only the awaited call is timed, not building the synthetic input
+    latencies = []
+    for _ in range(count):
+        call = make_call()
+        t0 = time.perf_counter_ns()
+        await call
+        latencies.append(time.perf_counter_ns() - t0)
+    elapsed = sum(latencies) / 1e9
+    return {
+        "operation": name,
+        "count": count,
+        "ops_per_sec": count / elapsed,
+        "p50_us": percentile(latencies, 0.50) / 1000,
+        "p99_us": percentile(latencies, 0.99) / 1000,
+    }
+
+
+async def measure_allocations(count, make_call):
+    # Separate pass: tracemalloc slows everything down too much to time with
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(count):
+        await make_call()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+    size = sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+    return {"blocks_per_op": blocks / count, "bytes_per_op": size / count}
+
+
+def command_workload(bot_module, traffic):
+    members = {}
+
+    def member():
+        user = traffic.user()
+        return members.setdefault(user.id, user)
+
+    def command(name):
+        return bot_module.bot.tree.get_command(name).callback
+
+    return [
+        ("daily", lambda: command("daily")(traffic.interaction())),
+        ("work", lambda: command("work")(traffic.interaction())),
+        ("deposit", lambda: command("deposit")(traffic.interaction(), traffic.random.randint(1, 500))),
+        ("withdraw", lambda: command("withdraw")(traffic.interaction(), traffic.random.randint(1, 500))),
+        ("give", lambda: command("give")(traffic.interaction(), member(), traffic.random.randint(1, 100))),
+        ("rob", lambda: command("rob")(traffic.interaction(), member())),
+        ("balance", lambda: command("balance")(traffic.interaction(), None)),
+        ("rank", lambda: command("rank")(traffic.interaction(), None)),
+        ("warn", lambda: command("warn")(traffic.interaction(), member(), "benchmark")),
+    ]
+
+
+def bytes_written(bot_module):
+    flushed = sum(stats["bytes"] for stats in bot_module.store.flush_stats.values())
+    # The warnings database only grows, so its size stands in for bytes written
+    warnings = sum(
+        os.path.getsize(path)
+        for path in (bot_module.WARNINGS_DATABASE_FILE, bot_module.WARNINGS_DATABASE_FILE + "-wal")
+        if os.path.exists(path)
+    )
+    return flushed + bot_module.economy_ledger.bytes_written + warnings
+
+
+async def run_operation(bot_module, name, count, make_call, allocations):
+    bot_module.store.start()
+    bot_module.economy.start()
+    before = bytes_written(bot_module)
+    result = await measure(name, count, make_call)
+    calls = count
+    if allocations:
+        allocation_calls = min(count, 2000)
+        result.update(await measure_allocations(allocation_calls, make_call))
+        calls += allocation_calls
+    # Closing flushes everything still dirty, so every write is counted
+    await bot_module.economy.close()
+    await bot_module.store.close()
+    written = bytes_written(bot_module) - before
+    result["file_bytes_per_op"] = written / calls
+    return result
+
+
+async def run(args):
+    bot_module = importlib.import_module("discord_mention_bot")
+    bot_module.bot._connection.user = FakeUser(1)
+    await bot_module.load_extensions()
+    traffic = Traffic(args)
+
+    async def on_message(message):
+        # What the gateway would dispatch: every extension's message listener
+        for listener in bot_module.bot.extra_events["on_message"]:
+            await listener(message)
+
+    workload = [("on_message", args.messages, lambda: on_message(traffic.message()))]
+    workload += [(name, args.commands, make_call) for name, make_call in command_workload(bot_module, traffic)]
+    return [
+        await run_operation(bot_module, name, count, make_call, args.allocations)
+        for name, count, make_call in workload
+    ]
+
+
+# ==================== REPORTING ====================
+
+def print_report(results):
+    columns = ("operation", "ops_per_sec", "p50_us", "p99_us", "file_bytes_per_op", "blocks_per_op", "bytes_per_op")
+    print("  ".join(f"{column:>18}" for column in columns))
+    for result in results:
+        row = []
+        for column in columns:
+            value = result.get(column, "")
+            row.append(f"{value:>18.1f}" if isinstance(value, float) else f"{value:>18}")
+        print("  ".join(row))
+
+
+def compare(results, baseline, tolerance):
+    # A regression is lower throughput or higher latency/bytes beyond tolerance
+    previous = {result["operation"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(result["operation"])
+        if old is None:
+            continue
+        if result["ops_per_sec"] < old["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{result['operation']}: ops/sec {old['ops_per_sec']:.0f} -> {result['ops_per_sec']:.0f}")
+        # Small absolute slack so microsecond jitter isn't reported
+        for key, slack in (("p99_us", 5), ("file_bytes_per_op", 1)):
+            if key in old and result[key] > old[key] * (1 + tolerance) + slack:
+                regressions.append(f"{result['operation']}: {key} {old[key]:.1f} -> {result[key]:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--commands", type=int, default=2000, help="calls per command")
+    parser.add_argument("--guilds", type=int, default=10)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--user-skew", type=float, default=1.0, help="zipf exponent, 0 = uniform")
+    parser.add_argument("--mention-weights", default="0.8,0.15,0.05", help="odds of 0, 1, 2, ... mentions")
+    parser.add_argument("--backend", default="partitioned", choices=("partitioned", "json", "sqlite"))
+    parser.add_argument("--flush-interval", default="5")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--allocations", action="store_true", help="also measure allocations with tracemalloc")
+    parser.add_argument("--baseline", default=os.path.join(ROOT, "benchmark_baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    # The bot keeps its data files in the working directory
+    workdir = tempfile.mkdtemp(prefix="bot-bench-")
+    os.chdir(workdir)
+    os.environ["STORAGE_BACKEND"] = args.backend
+    os.environ["FLUSH_INTERVAL"] = args.flush_interval
+    sys.path.insert(0, ROOT)
+
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        workload_args = ("messages", "commands", "guilds", "users", "user_skew", "mention_weights", "backend", "allocations")
+        if any(baseline["args"].get(key) != getattr(args, key) for key in workload_args):
+            print("\n⚠️ Baseline was recorded with a different workload; numbers may not be comparable")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({"created": time.time(), "args": vars(args), "results": results}, f, indent=4)
+        print(f"\n💾 Saved baseline to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import asyncio
+import json
+import math
+import os
+import signal
+import sys
+import time
+
+import aiohttp
+
+# Cluster mode: a supervisor process (python cluster.py) splits the shards
+# across CLUSTER_WORKERS bot processes. Each worker runs an AutoShardedBot for
+# its shard range and only loads the guilds those shards own. Workers report
+# to the supervisor over a local TCP socket, which is also how cross-shard
+# totals are gathered.
+
+HEARTBEAT_INTERVAL = 10
+HEARTBEAT_TIMEOUT = 60
+STARTUP_GRACE = 180
+
+
+def shard_for_guild(guild_id, shard_count):
+    return (int(guild_id) >> 22) % shard_count
+
+
+def parse_shard_ids(value):
+    # "0,1,2" or "0-3"
+    shard_ids = []
+    for part in value.split(","):
+        part = part.strip()
+        if "-" in part:
+            start, end = part.split("-")
+            shard_ids.extend(range(int(start), int(end) + 1))
+        elif part:
+            shard_ids.append(int(part))
+    return shard_ids
+
+
+def guild_partition(shard_ids, shard_count):
+    # Predicate for the storage backends: does this process own the guild?
+    owned = set(shard_ids)
+    return lambda guild_id: shard_for_guild(guild_id, shard_count) in owned
+
+
+def split_shards(shard_count, workers):
+    per_worker, extra = divmod(shard_count, workers)
+    ranges = []
+    start = 0
+    for worker in range(workers):
+        size = per_worker + (1 if worker < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return [shard_ids for shard_ids in ranges if shard_ids]
+
+
+# ==================== WORKER SIDE ====================
+
+class ClusterClient:
+    def __init__(self, bot, cluster_id, port):
+        self.bot = bot
+        self.cluster_id = cluster_id
+        self.port = port
+        self.writer = None
+        self._nonce = 0
+        self._waiters = {}
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def local_stats(self):
+        return {
+            "guilds": len(self.bot.guilds),
+            "users": len(self.bot.users),
+            "shards": list(self.bot.shard_ids or []),
+            "latency": self.bot.latency,
+            "ready": self.bot.is_ready(),
+        }
+
+    async def _send(self, message):
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        await self.writer.drain()
+
+    async def _run(self):
+        while True:
+            try:
+                reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+                await self._send({"op": "hello", "cluster": self.cluster_id, "pid": os.getpid()})
+                heartbeat = asyncio.create_task(self._heartbeat())
+                try:
+                    async for line in reader:
+                        message = json.loads(line)
+                        waiter = self._waiters.pop(message.get("nonce"), None)
+                        if waiter is not None and not waiter.done():
+                            waiter.set_result(message)
+                finally:
+                    heartbeat.cancel()
+            except (OSError, ValueError) as e:
+                print(f"❌ Lost connection to cluster supervisor: {e}")
+            self.writer = None
+            await asyncio.sleep(5)
+
+    async def _heartbeat(self):
+        while True:
+            await self._send({"op": "heartbeat", "cluster": self.cluster_id, "stats": self.local_stats()})
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    async def gather_stats(self, timeout=5):
+        # Totals across every worker, falling back to local numbers
+        if self.writer is None:
+            return {"clusters": 1, **self.local_stats()}
+        self._nonce += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[self._nonce] = future
+        try:
+            await self._send({"op": "stats", "nonce": self._nonce})
+            reply = await asyncio.wait_for(future, timeout)
+        except (OSError, asyncio.TimeoutError):
+            self._waiters.pop(self._nonce, None)
+            return {"clusters": 1, **self.local_stats()}
+        return reply["totals"]
+
+
+# ==================== SUPERVISOR ====================
+
+class Worker:
+    def __init__(self, cluster_id, shard_ids):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.process = None
+        self.started_at = 0
+        self.last_heartbeat = None
+        self.stats = {}
+        self.restarts = 0
+        self.backoff = 1
+
+
+class Supervisor:
+    def __init__(self, shard_count, workers, port, command):
+        self.shard_count = shard_count
+        self.port = port
+        self.command = command
+        self.workers = [Worker(i, shard_ids) for i, shard_ids in enumerate(split_shards(shard_count, workers))]
+        self.stopping = False
+
+    async def start_worker(self, worker):
+        env = dict(os.environ)
+        env.update({
+            "CLUSTER_ID": str(worker.cluster_id),
+            "CLUSTER_IPC_PORT": str(self.port),
+            "SHARD_COUNT": str(self.shard_count),
+            "SHARD_IDS": ",".join(str(shard_id) for shard_id in worker.shard_ids),
+        })
+        worker.process = await asyncio.create_subprocess_exec(*self.command, env=env)
+        worker.started_at = time.monotonic()
+        worker.last_heartbeat = None
+        print(f"🚀 Started cluster {worker.cluster_id} (shards {worker.shard_ids[0]}-{worker.shard_ids[-1]}, pid {worker.process.pid})")
+
+    async def stop_worker(self, worker, timeout=30):
+        process = worker.process
+        if process is None or process.returncode is not None:
+            return
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+    def totals(self):
+        stats = [worker.stats for worker in self.workers if worker.stats]
+        latencies = [s["latency"] for s in stats if s.get("latency") is not None and not math.isnan(s["latency"])]
+        return {
+            "clusters": len(self.workers),
+            "clusters_reporting": len(stats),
+            "guilds": sum(s.get("guilds", 0) for s in stats),
+            "users": sum(s.get("users", 0) for s in stats),
+            "shards": sorted(shard for s in stats for shard in s.get("shards", [])),
+            "latency": max(latencies) if latencies else None,
+            "ready": len(stats) == len(self.workers) and all(s.get("ready") for s in stats),
+        }
+
+    async def handle_connection(self, reader, writer):
+        async for line in reader:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            op = message.get("op")
+            if op in ("hello", "heartbeat"):
+                worker = self.workers[message["cluster"]]
+                worker.last_heartbeat = time.monotonic()
+                worker.stats = message.get("stats", worker.stats)
+                worker.backoff = 1
+            elif op == "stats":
+                reply = {"op": "stats", "nonce": message["nonce"], "totals": self.totals()}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        writer.close()
+
+    def unhealthy(self, worker):
+        if worker.process.returncode is not None:
+            return f"exited with code {worker.process.returncode}"
+        now = time.monotonic()
+        if worker.last_heartbeat is None:
+            if now - worker.started_at > STARTUP_GRACE:
+                return "never reported in"
+        elif now - worker.last_heartbeat > HEARTBEAT_TIMEOUT:
+            return "stopped sending heartbeats"
+        return None
+
+    async def monitor(self):
+        while not self.stopping:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            for worker in self.workers:
+                if self.stopping:
+                    break
+                reason = self.unhealthy(worker)
+                if reason is None:
+                    continue
+                print(f"⚠️ Cluster {worker.cluster_id} {reason}, restarting in {worker.backoff}s")
+                await self.stop_worker(worker)
+                await asyncio.sleep(worker.backoff)
+                worker.backoff = min(worker.backoff * 2, 60)
+                worker.restarts += 1
+                worker.stats = {}
+                if not self.stopping:
+                    await self.start_worker(worker)
+
+    async def run(self):
+        server = await asyncio.start_server(self.handle_connection, "127.0.0.1", self.port)
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        for worker in self.workers:
+            await self.start_worker(worker)
+        monitor = asyncio.create_task(self.monitor())
+
+        await stop.wait()
+        print("🛑 Stopping cluster...")
+        self.stopping = True
+        monitor.cancel()
+        await asyncio.gather(*(self.stop_worker(worker) for worker in self.workers))
+        server.close()
+        await server.wait_closed()
+
+
+async def recommended_shard_count(token):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"},
+        ) as response:
+            response.raise_for_status()
+            return (await response.json())["shards"]
+
+
+async def main():
+    shard_count = os.getenv("SHARD_COUNT")
+    if shard_count:
+        shard_count = int(shard_count)
+    else:
+        shard_count = await recommended_shard_count(os.environ["DISCORD_TOKEN"])
+    workers = int(os.getenv("CLUSTER_WORKERS", str(os.cpu_count() or 1)))
+    port = int(os.getenv("CLUSTER_IPC_PORT", "8790"))
+    bot_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "discord_mention_bot.py")
+
+    supervisor = Supervisor(shard_count, min(workers, shard_count), port, [sys.executable, bot_script])
+    print(f"🧩 Running {shard_count} shard(s) across {len(supervisor.workers)} worker(s)")
+    await supervisor.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
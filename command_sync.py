@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import time
+
+import discord
+
+from storage import atomic_write
+
+# Uploading the command tree costs a REST call per scope and counts against a
+# small daily limit, yet the tree only changes when the code does. We hash
+# the exact payload sync() would send, remember the hash of the last
+# successful sync per scope ("global" or a guild id) and skip the upload when
+# nothing changed.
+#
+# mode: "auto" syncs changed scopes, "force" syncs everything, "off" never
+# syncs. With dev_guild_ids the global commands are copied to those guilds
+# and synced there instead, where updates show up immediately.
+
+
+def payload_hash(tree, guild=None):
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands(guild=guild)), key=lambda c: c["name"])
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class CommandSync:
+    def __init__(self, tree, filename, mode="auto", dev_guild_ids=()):
+        self.tree = tree
+        self.filename = filename
+        self.mode = mode
+        self.dev_guild_ids = list(dev_guild_ids)
+        self.hashes = {}
+        if os.path.exists(filename):
+            try:
+                with open(filename, 'r') as f:
+                    self.hashes = json.load(f)
+            except ValueError:
+                self.hashes = {}
+        self.done = False
+        self.seconds = 0.0
+        self.synced = []
+        self.skipped = []
+
+    async def _sync_scope(self, scope, guild=None):
+        digest = payload_hash(self.tree, guild)
+        if self.mode != "force" and self.hashes.get(scope) == digest:
+            self.skipped.append(scope)
+            return
+        commands = await self.tree.sync(guild=guild)
+        self.hashes[scope] = digest
+        self.synced.append(f"{scope} ({len(commands)} commands)")
+
+    async def sync(self, again=False):
+        # Only the first READY of the process syncs; reconnects skip straight
+        # past. again=True is for after an extension reload, where only a
+        # changed command signature should cost an upload.
+        if (self.done and not again) or self.mode == "off":
+            return
+        self.synced = []
+        self.skipped = []
+        started = time.perf_counter()
+        try:
+            if self.dev_guild_ids:
+                for guild_id in self.dev_guild_ids:
+                    guild = discord.Object(id=guild_id)
+                    self.tree.copy_global_to(guild=guild)
+                    await self._sync_scope(str(guild_id), guild)
+            else:
+                await self._sync_scope("global")
+        finally:
+            self.seconds = time.perf_counter() - started
+            if self.synced:
+                atomic_write(self.filename, json.dumps(self.hashes, indent=4))
+        self.done = True
+
+    def report(self):
+        if self.mode == "off":
+            return "⏭️ Command sync disabled"
+        parts = []
+        if self.synced:
+            parts.append(f"synced {', '.join(self.synced)}")
+        if self.skipped:
+            parts.append(f"unchanged {', '.join(self.skipped)}")
+        return f"🔄 Command sync: {'; '.join(parts)} in {self.seconds * 1000:.0f}ms"
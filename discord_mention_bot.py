@@ -1,16 +1,76 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
 import os
-import random
+import sys
 import asyncio
-from datetime import datetime, timedelta
-import aiohttp
-
-# Bot setup with intents
-intents = discord.Intents.all()
-bot = commands.Bot(command_prefix="!", intents=intents)
+import time
+from typing import Literal
+from storage import WriteBehindStore, create_backend
+from leaderboards import Leaderboards
+from users import UserResolver
+from http_pool import HttpPool
+from scheduler import Scheduler
+from cluster import ClusterClient, guild_partition, parse_shard_ids, shard_for_guild
+from features import FEATURE_EXTENSIONS, parse_features, build_intents, mark_startup, member_cache_flags, startup_report
+from metrics import Metrics
+from outbound import OutboundQueue
+from command_sync import CommandSync
+from ratelimit import DEFAULT_LIMITS, RateLimiter
+from embeds import EmbedCache
+from profiling import SlowHandlerTracer, sample_cpu, trace_memory
+from lifecycle import Lifecycle
+
+# Extensions (see extensions/) import the shared state from this module by
+# name; when it runs as a script, that name has to resolve to this very
+# module rather than a second copy of it
+sys.modules.setdefault("discord_mention_bot", sys.modules[__name__])
+
+# Bot setup with the minimal intents for the enabled features. Only their
+# extensions are loaded, and the subsystems below that belong to a single
+# feature are only imported and created when it is enabled.
+ENABLED_FEATURES = parse_features(os.getenv("ENABLED_FEATURES"))
+MEMBER_CACHE = os.getenv("MEMBER_CACHE", "0") == "1"
+MAX_MESSAGES = int(os.getenv("MAX_MESSAGES", "0")) or None
+CHUNK_GUILDS = os.getenv("CHUNK_GUILDS", "0") == "1"
+if CHUNK_GUILDS and not MEMBER_CACHE:
+    # Chunking fills the member cache, which needs the members intent
+    sys.exit("❌ CHUNK_GUILDS=1 needs MEMBER_CACHE=1: there is no member cache to chunk guilds into")
+
+# Sharding: set SHARD_COUNT (and optionally SHARD_IDS) to run an AutoShardedBot.
+# cluster.py starts one such process per shard range and sets these itself.
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None
+SHARD_IDS = parse_shard_ids(os.getenv("SHARD_IDS", "")) or None
+CLUSTER_ID = int(os.getenv("CLUSTER_ID", "0"))
+CLUSTER_IPC_PORT = int(os.getenv("CLUSTER_IPC_PORT", "0")) or None
+
+# Appends incoming messages and interactions to this file for loadtest.py --replay
+GATEWAY_RECORD_FILE = os.getenv("GATEWAY_RECORD_FILE")
+
+intents = build_intents(ENABLED_FEATURES, member_cache=MEMBER_CACHE)
+bot_options = dict(
+    command_prefix="!",
+    intents=intents,
+    member_cache_flags=member_cache_flags(intents, MEMBER_CACHE),
+    max_messages=MAX_MESSAGES,
+    chunk_guilds_at_startup=CHUNK_GUILDS,
+    enable_debug_events=bool(GATEWAY_RECORD_FILE),
+)
+if SHARD_COUNT:
+    bot = commands.AutoShardedBot(shard_count=SHARD_COUNT, shard_ids=SHARD_IDS, **bot_options)
+else:
+    bot = commands.Bot(**bot_options)
+
+cluster_client = ClusterClient(bot, CLUSTER_ID, CLUSTER_IPC_PORT) if CLUSTER_IPC_PORT else None
+
+gateway_recorder = None
+if GATEWAY_RECORD_FILE:
+    from recorder import GatewayRecorder
+    gateway_recorder = GatewayRecorder(GATEWAY_RECORD_FILE)
+    bot.add_listener(gateway_recorder.on_socket_raw_receive)
+
+# Cached, batched user lookups for leaderboards and warnings
+user_resolver = UserResolver(bot)
 
 # Data files
 MENTION_FILE = "mentions.json"
@@ -18,102 +78,237 @@ ECONOMY_FILE = "economy.json"
 WARNINGS_FILE = "warnings.json"
 LEVELS_FILE = "levels.json"
 
-# Load/Save functions
-def load_data(filename):
-    if os.path.exists(filename):
-        with open(filename, 'r') as f:
-            return json.load(f)
-    return {}
-
-def save_data(filename, data):
-    with open(filename, 'w') as f:
-        json.dump(data, f, indent=4)
+# Write-behind persistence: changes are kept in memory and flushed in batches
+FLUSH_INTERVAL = float(os.getenv("FLUSH_INTERVAL", "5"))
+FLUSH_THRESHOLD = int(os.getenv("FLUSH_THRESHOLD", "500"))
+
+# Storage backend: "partitioned" keeps one file per guild under DATA_DIR (the
+# data files above are split up on first run) and loads a guild when it is
+# first used, "json" keeps the single data files above, "sqlite" uses
+# DATABASE_FILE (import existing JSON data once with `python storage.py migrate`)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "partitioned")
+DATA_DIR = os.getenv("DATA_DIR", "data")
+DATABASE_FILE = os.getenv("DATABASE_FILE", "bot.db")
+
+# Saved guilds are unloaded again, least recently used first, once the loaded
+# ones take more than this much memory (partitioned and sqlite backends)
+MEMORY_BUDGET_MB = float(os.getenv("MEMORY_BUDGET_MB", "256"))
+
+backend = create_backend(
+    STORAGE_BACKEND,
+    {"mentions": MENTION_FILE, "economy": ECONOMY_FILE, "warnings": WARNINGS_FILE, "levels": LEVELS_FILE},
+    DATABASE_FILE,
+    # Only load the guilds of our own shards
+    partition=guild_partition(SHARD_IDS, SHARD_COUNT) if SHARD_IDS else None,
+    data_dir=DATA_DIR,
+)
+store = WriteBehindStore(
+    backend,
+    flush_interval=FLUSH_INTERVAL,
+    flush_threshold=FLUSH_THRESHOLD,
+    memory_budget=int(MEMORY_BUDGET_MB * 1024 * 1024),
+)
 
 # Load all data
-mention_data = load_data(MENTION_FILE)
-economy_data = load_data(ECONOMY_FILE)
-warnings_data = load_data(WARNINGS_FILE)
-levels_data = load_data(LEVELS_FILE)
+mention_data = store.register("mentions")
+# Economy changes are persisted through the ledger; see economy.py
+economy_data = store.register("economy", auto_flush=False)
+levels_data = store.register("levels")
+
+# Warnings are kept in their own indexed database; see infractions.py.
+# WARNING_EXPIRY_DAYS makes warnings stop counting after that long and
+# WARNING_RETENTION_DAYS deletes expired ones after that long (0 = never).
+WARNINGS_DATABASE_FILE = os.getenv("WARNINGS_DATABASE_FILE", "warnings.db")
+
+warning_store = None
+if "moderation" in ENABLED_FEATURES:
+    from infractions import WarningStore
+    warning_store = WarningStore(
+        WARNINGS_DATABASE_FILE,
+        expiry=float(os.getenv("WARNING_EXPIRY_DAYS", "0")) * 86400,
+        retention=float(os.getenv("WARNING_RETENTION_DAYS", "0")) * 86400,
+    )
 
-@bot.event
-async def on_ready():
-    print(f'🤖 {bot.user} is now online!')
-    print(f'🔗 Connected to {len(bot.guilds)} servers')
+# Hour/day/week/month mention counts for /mentions and /mentionleaderboard
+MENTION_WINDOWS_FILE = os.getenv("MENTION_WINDOWS_FILE", f"mention_windows-{CLUSTER_ID}.bin" if cluster_client else "mention_windows.bin")
+
+mention_analytics = None
+if "mentions" in ENABLED_FEATURES:
+    from analytics import MentionAnalytics
+    mention_analytics = MentionAnalytics(MENTION_WINDOWS_FILE)
+
+# Token buckets for XP grants and economy command cooldowns; servers can
+# change their limits with /ratelimit
+RATE_LIMITS_FILE = os.getenv("RATE_LIMITS_FILE", f"rate_limits-{CLUSTER_ID}.json" if cluster_client else "rate_limits.json")
+
+rate_limiter = RateLimiter(RATE_LIMITS_FILE)
+
+def cooldown(action):
+    # app_commands check that spends one of the user's tokens for `action`
+    async def predicate(interaction: discord.Interaction):
+        retry_after = rate_limiter.hit(interaction.guild.id, interaction.user.id, action)
+        if retry_after:
+            uses, per = rate_limiter.limit(interaction.guild.id, action)
+            raise app_commands.CommandOnCooldown(app_commands.Cooldown(uses, per), retry_after)
+        return True
+    return app_commands.check(predicate)
+
+# Shared HTTP session and /meme prefetch buffer
+MEME_API_URL = os.getenv("MEME_API_URL", "https://meme-api.com/gimme")
+MEME_BUFFER_SIZE = int(os.getenv("MEME_BUFFER_SIZE", "10"))
+
+http_pool = HttpPool(
+    limit=int(os.getenv("HTTP_POOL_LIMIT", "20")),
+    timeout=float(os.getenv("HTTP_TIMEOUT", "10")),
+)
+meme_feed = None
+if "fun" in ENABLED_FEATURES:
+    from memes import MemeFeed
+    meme_feed = MemeFeed(http_pool, MEME_API_URL, size=MEME_BUFFER_SIZE)
+
+# Non-blocking sends for announcements and poll reactions. Level-ups in the
+# same channel within LEVEL_UP_WINDOW seconds are merged into one message.
+LEVEL_UP_WINDOW = float(os.getenv("LEVEL_UP_WINDOW", "2"))
+
+outbound = OutboundQueue(
+    max_pending=int(os.getenv("OUTBOUND_MAX_PENDING", "100")),
+    coalesce_window=LEVEL_UP_WINDOW,
+)
+
+# Persistent timer for reminders
+SCHEDULE_FILE = os.getenv("SCHEDULE_FILE", f"schedule-{CLUSTER_ID}.jsonl" if cluster_client else "schedule.jsonl")
+
+scheduler = Scheduler(SCHEDULE_FILE)
+
+# Poll votes are tallied from reaction events and saved every POLL_FLUSH_INTERVAL seconds
+POLLS_FILE = os.getenv("POLLS_FILE", f"polls-{CLUSTER_ID}.json" if cluster_client else "polls.json")
+
+poll_store = None
+if "utility" in ENABLED_FEATURES:
+    from polls import PollStore
+    poll_store = PollStore(POLLS_FILE, flush_interval=float(os.getenv("POLL_FLUSH_INTERVAL", "30")))
+
+# Per-guild ranking indexes, kept current as scores change
+leaderboards = Leaderboards()
+leaderboards.add_board("mentions", mention_data, lambda count: (count,))
+leaderboards.add_board("economy", economy_data, lambda data: (data["balance"] + data["bank"],))
+leaderboards.add_board("levels", levels_data, lambda data: (data["level"], data["xp"]))
+LEADERBOARD_SIZE = 10
+
+# Rendered /help, leaderboard and /serverinfo embeds, invalidated through
+# per-guild data versions instead of rebuilt on every call
+embed_cache = EmbedCache(max_entries=int(os.getenv("EMBED_CACHE_SIZE", "2000")))
+
+# Latency/error metrics for every command and listener, shown by /botstats and
+# served for Prometheus on 127.0.0.1:METRICS_PORT (0 disables the endpoint)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+metrics = Metrics()
+store.on_flush = metrics.observe_flush
+metrics.add_source("user_cache", user_resolver.stats)
+if meme_feed is not None:
+    metrics.add_source("memes", lambda: {"served_from_buffer": meme_feed.served_from_buffer, "served_cold": meme_feed.served_cold})
+metrics.add_source("outbound", outbound.stats)
+metrics.add_source("ratelimit", rate_limiter.stats)
+if poll_store is not None:
+    metrics.add_source("polls", poll_store.stats)
+if warning_store is not None:
+    metrics.add_source("warnings", warning_store.stats)
+metrics.add_source("storage", lambda: {"loaded_guilds": len(store.loaded()), "evictions": store.evictions})
+metrics.add_source("embeds", embed_cache.stats)
+metrics.add_source("scheduler", lambda: {"pending": scheduler.pending(), "delivered": scheduler.delivered, "failed": scheduler.failed})
+
+# On-demand diagnostics, switched on and off with /profile: slow handler
+# tracing (off until asked for; SLOW_HANDLER_MS is the default threshold) and
+# CPU/memory captures written to PROFILE_DIR
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+slow_tracer = SlowHandlerTracer(threshold=int(os.getenv("SLOW_HANDLER_MS", "100")) / 1000)
+metrics.tracer = slow_tracer
+metrics.add_source("slow_handlers", slow_tracer.status)
+profile_lock = asyncio.Lock()
+
+def drop_guild(name, guild_id):
+    leaderboards.drop(name, guild_id)
+    embed_cache.bump(name, guild_id)
+
+store.on_evict = drop_guild
+
+def update_leaderboard(name, guild_id, *user_ids):
+    if leaderboards.update(name, guild_id, *user_ids, watch=LEADERBOARD_SIZE):
+        embed_cache.bump(name, guild_id)
+
+def record_change(name, guild_id, *user_ids):
+    store.mark_dirty(name, guild_id, *user_ids)
+    if name in leaderboards.boards:
+        update_leaderboard(name, guild_id, *user_ids)
+
+async def load_extensions():
+    for feature, extension in FEATURE_EXTENSIONS.items():
+        if feature in ENABLED_FEATURES:
+            await bot.load_extension(extension)
+
+async def import_legacy_warnings():
+    # Until an import has gone through: bring the old warnings over. The
+    # warnings database is shared by the cluster, so each worker imports
+    # (and records) only the shards it owns.
+    if SHARD_IDS:
+        shards = {f"{shard_id}/{SHARD_COUNT}": shard_id for shard_id in SHARD_IDS}
+    else:
+        shards = {None: None}
+    pending = warning_store.needs_import(list(shards))
+    if not pending:
+        return
+    entries = backend.iter_all("warnings")
+    if SHARD_IDS:
+        pending_shards = {shards[partition] for partition in pending}
+        entries = (entry for entry in entries if shard_for_guild(entry[0], SHARD_COUNT) in pending_shards)
     try:
-        synced = await bot.tree.sync()
-        print(f"✅ Synced {len(synced)} command(s)")
+        imported = await warning_store.import_legacy(entries, pending)
     except Exception as e:
-        print(f"❌ Failed to sync commands: {e}")
-
-# ==================== MENTION TRACKING ====================
+        print(f"❌ Failed to import old warnings, will retry on the next start: {e}")
+    else:
+        if imported:
+            print(f"📥 Imported {imported} warning(s) into {WARNINGS_DATABASE_FILE}")
 
 @bot.event
-async def on_message(message):
-    if message.author.bot:
-        return
-    
-    # Mention tracking
-    if message.mentions:
-        guild_id = str(message.guild.id)
-        if guild_id not in mention_data:
-            mention_data[guild_id] = {}
-        
-        for mentioned_user in message.mentions:
-            user_id = str(mentioned_user.id)
-            if user_id not in mention_data[guild_id]:
-                mention_data[guild_id][user_id] = 0
-            mention_data[guild_id][user_id] += 1
-        
-        save_data(MENTION_FILE, mention_data)
-    
-    # Leveling system
-    guild_id = str(message.guild.id)
-    user_id = str(message.author.id)
-    
-    if guild_id not in levels_data:
-        levels_data[guild_id] = {}
-    if user_id not in levels_data[guild_id]:
-        levels_data[guild_id][user_id] = {"xp": 0, "level": 1, "messages": 0}
-    
-    levels_data[guild_id][user_id]["messages"] += 1
-    levels_data[guild_id][user_id]["xp"] += random.randint(10, 25)
-    
-    # Level up check
-    user_data = levels_data[guild_id][user_id]
-    xp_needed = user_data["level"] * 100
-    
-    if user_data["xp"] >= xp_needed:
-        user_data["level"] += 1
-        user_data["xp"] = 0
-        await message.channel.send(f"🎉 {message.author.mention} leveled up to **Level {user_data['level']}**!")
-    
-    save_data(LEVELS_FILE, levels_data)
-    
-    await bot.process_commands(message)
+async def setup_hook():
+    # Extensions first, so the scheduler finds its handlers registered
+    await load_extensions()
+    mark_startup("extensions")
+    if warning_store is not None:
+        await import_legacy_warnings()
+    for subsystem in (warning_store, store, meme_feed, scheduler, economy, mention_analytics, poll_store, cluster_client):
+        if subsystem is not None:
+            subsystem.start()
+    metrics.instrument(bot)
+    # Each cluster worker gets its own port next to the base one
+    await metrics.start(METRICS_PORT + CLUSTER_ID if METRICS_PORT else None)
+    mark_startup("connecting")
 
-# ==================== MENTION COMMANDS ====================
-
-@bot.tree.command(name="mentions", description="Check how many times a user has been mentioned")
-async def mentions(interaction: discord.Interaction, user: discord.Member = None):
-    target_user = user if user else interaction.user
-    guild_id = str(interaction.guild.id)
-    user_id = str(target_user.id)
-    
-    count = 0
-    if guild_id in mention_data and user_id in mention_data[guild_id]:
-        count = mention_data[guild_id][user_id]
-    
-    embed = discord.Embed(title="📊 Mention Statistics", color=discord.Color.purple())
-    embed.add_field(name="User", value=target_user.mention, inline=False)
-    embed.add_field(name="Total Mentions", value=f"**{count}** times", inline=False)
-    embed.set_thumbnail(url=target_user.display_avatar.url)
-    
-    await interaction.response.send_message("✅ Message sent!", ephemeral=True)
+@bot.event
+async def on_ready():
+    mark_startup("ready")
+    print(f'🤖 {bot.user} is now online!')
+    print(f'🔗 Connected to {len(bot.guilds)} servers')
+    if cluster_client:
+        totals = await cluster_client.gather_stats()
+        print(f"🧩 Cluster {CLUSTER_ID}: {totals['guilds']} servers across {totals['clusters']} cluster(s)")
+    # Commands are global, so only the first cluster needs to sync them
+    if CLUSTER_ID == 0 and not command_sync.done:
+        try:
+            await command_sync.sync()
+            print(command_sync.report())
+        except Exception as e:
+            print(f"❌ Failed to sync commands: {e}")
+        mark_startup("synced")
+    print(startup_report(bot))
+    print(lifecycle.report())
+    loaded = store.loaded()
+    print(f"📂 {len(loaded)} guild partition(s) loaded (~{sum(loaded.values()) / 1024 / 1024:.1f} MiB of {MEMORY_BUDGET_MB:g} MiB)")
 
 # ==================== HELP COMMAND ====================
 
-@bot.tree.command(name="help", description="View all available commands")
-async def help_command(interaction: discord.Interaction):
+async def render_help():
     embed = discord.Embed(
         title="🤖 Bot Commands",
         description="Here are all available commands organized by category:",
@@ -152,519 +347,292 @@ async def help_command(interaction: discord.Interaction):
     
     embed.add_field(
         name="🔧 Utility",
-        value="`/serverinfo` `/userinfo` `/avatar` `/poll` `/remind` `/say` `/help`",
+        value="`/serverinfo` `/userinfo` `/avatar` `/poll` `/pollresults` `/remind` `/say` `/help`",
         inline=False
     )
     
     embed.set_footer(text="Use /command_name to use any command!")
-    
-    await interaction.response.send_message(embed=embed)
-
-# Run the bot
-bot.run('MTQ0Nzg1NTA5MjQwODUxNjczMg.GTuRKL.Ah2ltAOuRksMwoumhwMHnr-wKEmCZnorUcPz2M')(embed=embed)
-
-@bot.tree.command(name="mentionleaderboard", description="Show the most mentioned users")
-async def mentionleaderboard(interaction: discord.Interaction):
-    guild_id = str(interaction.guild.id)
-    
-    if guild_id not in mention_data or not mention_data[guild_id]:
-        await interaction.response.send_message("No mention data available yet!", ephemeral=True)
-        return
-    
-    sorted_mentions = sorted(mention_data[guild_id].items(), key=lambda x: x[1], reverse=True)[:10]
-    
-    embed = discord.Embed(title="🏆 Most Mentioned Users", color=discord.Color.gold())
-    
-    for idx, (user_id, count) in enumerate(sorted_mentions, 1):
-        try:
-            user = await bot.fetch_user(int(user_id))
-            medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"**{idx}.**"
-            embed.add_field(name=f"{medal} {user.name}", value=f"{count} mentions", inline=False)
-        except:
-            continue
-    
-    await interaction.response.send_message(embed=embed)
+    return embed
 
-# ==================== MODERATION COMMANDS ====================
-
-@bot.tree.command(name="kick", description="Kick a member from the server")
-@app_commands.checks.has_permissions(kick_members=True)
-async def kick(interaction: discord.Interaction, member: discord.Member, reason: str = "No reason provided"):
-    await member.kick(reason=reason)
-    embed = discord.Embed(title="👢 Member Kicked", color=discord.Color.orange())
-    embed.add_field(name="Member", value=member.mention, inline=True)
-    embed.add_field(name="Moderator", value=interaction.user.mention, inline=True)
-    embed.add_field(name="Reason", value=reason, inline=False)
-    await interaction.response.send_message(embed=embed)
-
-@bot.tree.command(name="ban", description="Ban a member from the server")
-@app_commands.checks.has_permissions(ban_members=True)
-async def ban(interaction: discord.Interaction, member: discord.Member, reason: str = "No reason provided"):
-    await member.ban(reason=reason)
-    embed = discord.Embed(title="🔨 Member Banned", color=discord.Color.red())
-    embed.add_field(name="Member", value=member.mention, inline=True)
-    embed.add_field(name="Moderator", value=interaction.user.mention, inline=True)
-    embed.add_field(name="Reason", value=reason, inline=False)
-    await interaction.response.send_message(embed=embed)
-
-@bot.tree.command(name="unban", description="Unban a user from the server")
-@app_commands.checks.has_permissions(ban_members=True)
-async def unban(interaction: discord.Interaction, user_id: str):
-    user = await bot.fetch_user(int(user_id))
-    await interaction.guild.unban(user)
-    await interaction.response.send_message(f"✅ Unbanned {user.mention}")
-
-@bot.tree.command(name="timeout", description="Timeout a member")
-@app_commands.checks.has_permissions(moderate_members=True)
-async def timeout(interaction: discord.Interaction, member: discord.Member, minutes: int, reason: str = "No reason provided"):
-    duration = timedelta(minutes=minutes)
-    await member.timeout(duration, reason=reason)
-    embed = discord.Embed(title="⏰ Member Timed Out", color=discord.Color.yellow())
-    embed.add_field(name="Member", value=member.mention, inline=True)
-    embed.add_field(name="Duration", value=f"{minutes} minutes", inline=True)
-    embed.add_field(name="Reason", value=reason, inline=False)
-    await interaction.response.send_message(embed=embed)
-
-@bot.tree.command(name="warn", description="Warn a member")
-@app_commands.checks.has_permissions(moderate_members=True)
-async def warn(interaction: discord.Interaction, member: discord.Member, reason: str):
-    guild_id = str(interaction.guild.id)
-    user_id = str(member.id)
-    
-    if guild_id not in warnings_data:
-        warnings_data[guild_id] = {}
-    if user_id not in warnings_data[guild_id]:
-        warnings_data[guild_id][user_id] = []
-    
-    warning = {
-        "reason": reason,
-        "moderator": str(interaction.user.id),
-        "timestamp": datetime.now().isoformat()
-    }
-    
-    warnings_data[guild_id][user_id].append(warning)
-    save_data(WARNINGS_FILE, warnings_data)
-    
-    total_warnings = len(warnings_data[guild_id][user_id])
-    
-    embed = discord.Embed(title="⚠️ Member Warned", color=discord.Color.red())
-    embed.add_field(name="Member", value=member.mention, inline=True)
-    embed.add_field(name="Total Warnings", value=total_warnings, inline=True)
-    embed.add_field(name="Reason", value=reason, inline=False)
+@bot.tree.command(name="help", description="View all available commands")
+async def help_command(interaction: discord.Interaction):
+    embed = await embed_cache.get("help", None, None, render_help)
     await interaction.response.send_message(embed=embed)
 
-@bot.tree.command(name="warnings", description="Check warnings for a member")
-async def warnings(interaction: discord.Interaction, member: discord.Member = None):
-    target = member if member else interaction.user
-    guild_id = str(interaction.guild.id)
-    user_id = str(target.id)
-    
-    warns = []
-    if guild_id in warnings_data and user_id in warnings_data[guild_id]:
-        warns = warnings_data[guild_id][user_id]
-    
-    embed = discord.Embed(title=f"⚠️ Warnings for {target.name}", color=discord.Color.orange())
-    embed.add_field(name="Total Warnings", value=len(warns), inline=False)
-    
-    for idx, warn in enumerate(warns[-5:], 1):
-        mod = await bot.fetch_user(int(warn["moderator"]))
-        embed.add_field(
-            name=f"Warning {idx}",
-            value=f"**Reason:** {warn['reason']}\n**By:** {mod.mention}",
-            inline=False
-        )
-    
-    await interaction.response.send_message(embed=embed)
-
-@bot.tree.command(name="clearwarnings", description="Clear all warnings for a member")
-@app_commands.checks.has_permissions(administrator=True)
-async def clearwarnings(interaction: discord.Interaction, member: discord.Member):
-    guild_id = str(interaction.guild.id)
-    user_id = str(member.id)
-    
-    if guild_id in warnings_data and user_id in warnings_data[guild_id]:
-        del warnings_data[guild_id][user_id]
-        save_data(WARNINGS_FILE, warnings_data)
-        await interaction.response.send_message(f"✅ Cleared all warnings for {member.mention}")
-    else:
-        await interaction.response.send_message(f"❌ No warnings found for {member.mention}", ephemeral=True)
-
-@bot.tree.command(name="purge", description="Delete multiple messages")
-@app_commands.checks.has_permissions(manage_messages=True)
-async def purge(interaction: discord.Interaction, amount: int):
-    await interaction.response.defer(ephemeral=True)
-    deleted = await interaction.channel.purge(limit=amount)
-    await interaction.followup.send(f"✅ Deleted {len(deleted)} messages", ephemeral=True)
-
-# ==================== ECONOMY COMMANDS ====================
+# ==================== ECONOMY ====================
 
 def get_balance(guild_id, user_id):
     if guild_id not in economy_data:
         economy_data[guild_id] = {}
     if user_id not in economy_data[guild_id]:
-        economy_data[guild_id][user_id] = {"balance": 1000, "bank": 0}
+        economy_data[guild_id][user_id] = EconomyRecord(balance=1000, bank=0)
+        update_leaderboard("economy", guild_id, user_id)
     return economy_data[guild_id][user_id]
 
-@bot.tree.command(name="balance", description="Check your or another user's balance")
-async def balance(interaction: discord.Interaction, member: discord.Member = None):
-    target = member if member else interaction.user
-    guild_id = str(interaction.guild.id)
-    user_id = str(target.id)
-    
-    data = get_balance(guild_id, user_id)
-    
-    embed = discord.Embed(title=f"💰 {target.name}'s Balance", color=discord.Color.green())
-    embed.add_field(name="Wallet", value=f"${data['balance']:,}", inline=True)
-    embed.add_field(name="Bank", value=f"${data['bank']:,}", inline=True)
-    embed.add_field(name="Total", value=f"${data['balance'] + data['bank']:,}", inline=False)
-    embed.set_thumbnail(url=target.display_avatar.url)
-    
-    await interaction.response.send_message(embed=embed)
-
-@bot.tree.command(name="daily", description="Claim your daily reward")
-async def daily(interaction: discord.Interaction):
-    guild_id = str(interaction.guild.id)
-    user_id = str(interaction.user.id)
-    
-    data = get_balance(guild_id, user_id)
-    reward = random.randint(500, 1000)
-    data["balance"] += reward
-    
-    save_data(ECONOMY_FILE, economy_data)
-    
-    await interaction.response.send_message(f"💵 You claimed your daily reward of **${reward}**!")
-
-@bot.tree.command(name="work", description="Work to earn money")
-async def work(interaction: discord.Interaction):
-    guild_id = str(interaction.guild.id)
-    user_id = str(interaction.user.id)
-    
-    data = get_balance(guild_id, user_id)
-    
-    jobs = ["programmer", "teacher", "doctor", "chef", "artist", "musician"]
-    job = random.choice(jobs)
-    earnings = random.randint(100, 500)
-    
-    data["balance"] += earnings
-    save_data(ECONOMY_FILE, economy_data)
-    
-    await interaction.response.send_message(f"💼 You worked as a **{job}** and earned **${earnings}**!")
-
-@bot.tree.command(name="deposit", description="Deposit money to your bank")
-async def deposit(interaction: discord.Interaction, amount: int):
-    guild_id = str(interaction.guild.id)
-    user_id = str(interaction.user.id)
-    
-    data = get_balance(guild_id, user_id)
-    
-    if amount > data["balance"]:
-        await interaction.response.send_message("❌ You don't have enough money in your wallet!", ephemeral=True)
-        return
-    
-    data["balance"] -= amount
-    data["bank"] += amount
-    save_data(ECONOMY_FILE, economy_data)
-    
-    await interaction.response.send_message(f"✅ Deposited **${amount:,}** to your bank!")
-
-@bot.tree.command(name="withdraw", description="Withdraw money from your bank")
-async def withdraw(interaction: discord.Interaction, amount: int):
-    guild_id = str(interaction.guild.id)
-    user_id = str(interaction.user.id)
-    
-    data = get_balance(guild_id, user_id)
-    
-    if amount > data["bank"]:
-        await interaction.response.send_message("❌ You don't have enough money in your bank!", ephemeral=True)
+# Per-user locked transactions, logged to an append-only ledger that is
+# compacted into the economy snapshot every ECONOMY_COMPACT_EVERY entries
+ECONOMY_LEDGER_FILE = os.getenv("ECONOMY_LEDGER_FILE", f"economy-{CLUSTER_ID}.ledger" if cluster_client else "economy.ledger")
+
+economy = economy_ledger = None
+if "economy" in ENABLED_FEATURES:
+    from economy import Economy, Ledger
+    from models import EconomyRecord
+    economy_ledger = Ledger(
+        ECONOMY_LEDGER_FILE,
+        compact_every=int(os.getenv("ECONOMY_COMPACT_EVERY", "10000")),
+        compact_interval=float(os.getenv("ECONOMY_COMPACT_INTERVAL", "300")),
+    )
+    economy = Economy(
+        economy_ledger,
+        account=get_balance,
+        on_change=lambda guild_id, *user_ids: record_change("economy", guild_id, *user_ids),
+        snapshot=lambda: store.flush(["economy"]),
+    )
+    metrics.add_source("economy", economy.stats)
+    # Changes since the last snapshot; the next compaction writes them out
+    for guild_id, user_id in economy_ledger.replay(economy_data):
+        store.mark_dirty("economy", guild_id, user_id)
+
+# ==================== ADMIN COMMANDS ====================
+
+@bot.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    if isinstance(error, app_commands.CommandOnCooldown):
+        ready_at = int(time.time() + error.retry_after)
+        await interaction.response.send_message(f"⏳ Slow down! You can do that again <t:{ready_at}:R>.", ephemeral=True)
         return
-    
-    data["bank"] -= amount
-    data["balance"] += amount
-    save_data(ECONOMY_FILE, economy_data)
-    
-    await interaction.response.send_message(f"✅ Withdrew **${amount:,}** from your bank!")
-
-@bot.tree.command(name="give", description="Give money to another user")
-async def give(interaction: discord.Interaction, member: discord.Member, amount: int):
-    guild_id = str(interaction.guild.id)
-    sender_id = str(interaction.user.id)
-    receiver_id = str(member.id)
-    
-    sender_data = get_balance(guild_id, sender_id)
-    receiver_data = get_balance(guild_id, receiver_id)
-    
-    if amount > sender_data["balance"]:
-        await interaction.response.send_message("❌ You don't have enough money!", ephemeral=True)
+    await app_commands.CommandTree.on_error(bot.tree, interaction, error)
+
+@bot.tree.command(name="ratelimit", description="View or change this server's rate limits")
+@app_commands.checks.has_permissions(manage_guild=True)
+@app_commands.describe(
+    action="What to limit; on its own, puts it back to the default",
+    uses="How many times it may be used per period",
+    per_seconds="Length of the period in seconds (0 removes the limit)",
+)
+async def ratelimit(
+    interaction: discord.Interaction,
+    action: Literal[tuple(DEFAULT_LIMITS)] = None,
+    uses: app_commands.Range[int, 1, 1000] = None,
+    per_seconds: app_commands.Range[int, 0, 604800] = None,
+):
+    guild_id = interaction.guild.id
+    
+    if action is not None and uses is not None and per_seconds is not None:
+        rate_limiter.set_limit(guild_id, action, uses, per_seconds)
+        await rate_limiter.flush()
+    elif action is not None and uses is None and per_seconds is None:
+        rate_limiter.reset_limit(guild_id, action)
+        await rate_limiter.flush()
+    elif action is not None:
+        await interaction.response.send_message("❌ Give both `uses` and `per_seconds` to change a limit!", ephemeral=True)
         return
     
-    sender_data["balance"] -= amount
-    receiver_data["balance"] += amount
-    save_data(ECONOMY_FILE, economy_data)
-    
-    await interaction.response.send_message(f"✅ You gave **${amount:,}** to {member.mention}!")
-
-@bot.tree.command(name="rob", description="Try to rob another user")
-async def rob(interaction: discord.Interaction, member: discord.Member):
-    guild_id = str(interaction.guild.id)
-    robber_id = str(interaction.user.id)
-    victim_id = str(member.id)
-    
-    robber_data = get_balance(guild_id, robber_id)
-    victim_data = get_balance(guild_id, victim_id)
-    
-    if victim_data["balance"] < 100:
-        await interaction.response.send_message(f"❌ {member.mention} doesn't have enough money to rob!", ephemeral=True)
+    embed = discord.Embed(title="⏱️ Rate Limits", color=discord.Color.blue())
+    for name in DEFAULT_LIMITS:
+        limit_uses, per = rate_limiter.limit(guild_id, name)
+        value = f"{limit_uses}× per {per:,}s" if per else "No limit"
+        if rate_limiter.limit(guild_id, name) != DEFAULT_LIMITS[name]:
+            value += " (custom)"
+        embed.add_field(name=name, value=value, inline=True)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+def owner_only():
+    # For commands that act on the whole process rather than one server
+    async def predicate(interaction: discord.Interaction):
+        return await bot.is_owner(interaction.user)
+    return app_commands.check(predicate)
+
+@bot.tree.command(name="profile", description="Trace slow handlers or capture a CPU/memory profile")
+@owner_only()
+@app_commands.describe(
+    action="What to do",
+    threshold_ms="Report handlers slower than this (slow-handlers)",
+    seconds="How long to capture for (cpu, memory)",
+)
+async def profile(
+    interaction: discord.Interaction,
+    action: Literal["slow-handlers", "stop", "cpu", "memory", "status"],
+    threshold_ms: app_commands.Range[int, 1, 60000] = None,
+    seconds: app_commands.Range[int, 1, 300] = 30,
+):
+    if action == "slow-handlers":
+        slow_tracer.enable(threshold_ms / 1000 if threshold_ms is not None else None)
+        await interaction.response.send_message(f"🐢 Logging handlers slower than {slow_tracer.threshold * 1000:,.0f}ms. Use `/profile stop` to turn it off.", ephemeral=True)
         return
-    
-    success = random.choice([True, False])
-    
-    if success:
-        stolen = random.randint(50, min(500, victim_data["balance"]))
-        robber_data["balance"] += stolen
-        victim_data["balance"] -= stolen
-        await interaction.response.send_message(f"💰 You successfully robbed **${stolen}** from {member.mention}!")
-    else:
-        fine = random.randint(100, 300)
-        robber_data["balance"] = max(0, robber_data["balance"] - fine)
-        await interaction.response.send_message(f"❌ You got caught! You paid a fine of **${fine}**!")
-    
-    save_data(ECONOMY_FILE, economy_data)
-
-@bot.tree.command(name="leaderboard", description="View the richest users")
-async def leaderboard(interaction: discord.Interaction):
-    guild_id = str(interaction.guild.id)
-    
-    if guild_id not in economy_data:
-        await interaction.response.send_message("No economy data available!", ephemeral=True)
+    if action == "stop":
+        slow_tracer.disable()
+        await interaction.response.send_message("✅ Slow handler tracing is off.", ephemeral=True)
         return
-    
-    sorted_users = sorted(
-        economy_data[guild_id].items(),
-        key=lambda x: x[1]["balance"] + x[1]["bank"],
-        reverse=True
-    )[:10]
-    
-    embed = discord.Embed(title="💎 Richest Users", color=discord.Color.gold())
-    
-    for idx, (user_id, data) in enumerate(sorted_users, 1):
-        try:
-            user = await bot.fetch_user(int(user_id))
-            total = data["balance"] + data["bank"]
-            medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"**{idx}.**"
-            embed.add_field(name=f"{medal} {user.name}", value=f"${total:,}", inline=False)
-        except:
-            continue
-    
-    await interaction.response.send_message(embed=embed)
-
-# ==================== LEVELING COMMANDS ====================
-
-@bot.tree.command(name="rank", description="Check your or another user's rank")
-async def rank(interaction: discord.Interaction, member: discord.Member = None):
-    target = member if member else interaction.user
-    guild_id = str(interaction.guild.id)
-    user_id = str(target.id)
-    
-    if guild_id not in levels_data or user_id not in levels_data[guild_id]:
-        await interaction.response.send_message("No rank data available!", ephemeral=True)
+    if action == "status":
+        status = slow_tracer.status()
+        state = f"on, threshold {status['threshold'] * 1000:,.0f}ms" if status["enabled"] else "off"
+        capturing = " · a capture is running" if profile_lock.locked() else ""
+        await interaction.response.send_message(f"🐢 Slow handler tracing is {state} · {status['reported']:,} reported{capturing}", ephemeral=True)
         return
     
-    data = levels_data[guild_id][user_id]
-    xp_needed = data["level"] * 100
-    
-    embed = discord.Embed(title=f"📊 {target.name}'s Rank", color=discord.Color.blue())
-    embed.add_field(name="Level", value=data["level"], inline=True)
-    embed.add_field(name="XP", value=f"{data['xp']}/{xp_needed}", inline=True)
-    embed.add_field(name="Messages", value=data["messages"], inline=True)
-    embed.set_thumbnail(url=target.display_avatar.url)
-    
-    await interaction.response.send_message(embed=embed)
-
-@bot.tree.command(name="levelleaderboard", description="View top ranked users")
-async def levelleaderboard(interaction: discord.Interaction):
-    guild_id = str(interaction.guild.id)
-    
-    if guild_id not in levels_data:
-        await interaction.response.send_message("No level data available!", ephemeral=True)
+    # Captures share the sampler thread / tracemalloc, so one at a time
+    if profile_lock.locked():
+        await interaction.response.send_message("❌ A capture is already running!", ephemeral=True)
         return
-    
-    sorted_users = sorted(
-        levels_data[guild_id].items(),
-        key=lambda x: (x[1]["level"], x[1]["xp"]),
-        reverse=True
-    )[:10]
-    
-    embed = discord.Embed(title="🏅 Top Ranked Users", color=discord.Color.purple())
-    
-    for idx, (user_id, data) in enumerate(sorted_users, 1):
+    async with profile_lock:
+        await interaction.response.send_message(f"⏱️ Capturing {action} for {seconds}s...", ephemeral=True)
         try:
-            user = await bot.fetch_user(int(user_id))
-            medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"**{idx}.**"
-            embed.add_field(
-                name=f"{medal} {user.name}",
-                value=f"Level {data['level']} | {data['messages']} messages",
-                inline=False
-            )
-        except:
-            continue
-    
-    await interaction.response.send_message(embed=embed)
-
-# ==================== FUN COMMANDS ====================
-
-@bot.tree.command(name="8ball", description="Ask the magic 8ball a question")
-async def eightball(interaction: discord.Interaction, question: str):
-    responses = [
-        "Yes, definitely!", "It is certain.", "Without a doubt.",
-        "You may rely on it.", "As I see it, yes.", "Most likely.",
-        "Outlook good.", "Yes.", "Signs point to yes.",
-        "Reply hazy, try again.", "Ask again later.", "Better not tell you now.",
-        "Cannot predict now.", "Concentrate and ask again.",
-        "Don't count on it.", "My reply is no.", "My sources say no.",
-        "Outlook not so good.", "Very doubtful."
-    ]
-    
-    embed = discord.Embed(title="🎱 Magic 8Ball", color=discord.Color.purple())
-    embed.add_field(name="Question", value=question, inline=False)
-    embed.add_field(name="Answer", value=random.choice(responses), inline=False)
-    
-    await interaction.response.send_message(embed=embed)
-
-@bot.tree.command(name="coinflip", description="Flip a coin")
-async def coinflip(interaction: discord.Interaction):
-    result = random.choice(["Heads", "Tails"])
-    await interaction.response.send_message(f"🪙 The coin landed on: **{result}**!")
-
-@bot.tree.command(name="dice", description="Roll a dice")
-async def dice(interaction: discord.Interaction, sides: int = 6):
-    result = random.randint(1, sides)
-    await interaction.response.send_message(f"🎲 You rolled a **{result}** (out of {sides})!")
-
-@bot.tree.command(name="meme", description="Get a random meme")
-async def meme(interaction: discord.Interaction):
-    await interaction.response.defer()
-    
-    async with aiohttp.ClientSession() as session:
-        async with session.get("https://meme-api.com/gimme") as response:
-            if response.status == 200:
-                data = await response.json()
-                
-                embed = discord.Embed(title=data["title"], color=discord.Color.random())
-                embed.set_image(url=data["url"])
-                embed.set_footer(text=f"👍 {data['ups']} | r/{data['subreddit']}")
-                
-                await interaction.followup.send(embed=embed)
+            if action == "cpu":
+                data_file, summary_file, top = await sample_cpu(PROFILE_DIR, seconds)
+                lines = [f"`{share:.1%}` {frame}" for frame, share in top[:5]]
             else:
-                await interaction.followup.send("Failed to fetch meme!", ephemeral=True)
-
-@bot.tree.command(name="hug", description="Hug someone")
-async def hug(interaction: discord.Interaction, member: discord.Member):
-    await interaction.response.send_message(f"🤗 {interaction.user.mention} hugged {member.mention}!")
-
-@bot.tree.command(name="slap", description="Slap someone")
-async def slap(interaction: discord.Interaction, member: discord.Member):
-    await interaction.response.send_message(f"👋 {interaction.user.mention} slapped {member.mention}!")
-
-@bot.tree.command(name="rps", description="Play Rock Paper Scissors")
-async def rps(interaction: discord.Interaction, choice: str):
-    choices = ["rock", "paper", "scissors"]
-    choice = choice.lower()
-    
-    if choice not in choices:
-        await interaction.response.send_message("❌ Invalid choice! Choose rock, paper, or scissors.", ephemeral=True)
+                data_file, summary_file, top = await trace_memory(PROFILE_DIR, seconds)
+                lines = [f"`{size / 1024:,.1f} KiB` {location}" for location, size in top[:5]]
+        except Exception as e:
+            print(f"❌ Failed to capture {action} profile: {e}")
+            await interaction.edit_original_response(content=f"❌ The {action} capture failed: {e}")
+            return
+    embed = discord.Embed(title=f"📊 {action.upper()} profile ({seconds}s)", description="\n".join(lines) or "Nothing sampled", color=discord.Color.blue())
+    embed.add_field(name="Files", value=f"`{data_file}`\n`{summary_file}`", inline=False)
+    await interaction.edit_original_response(content=None, embed=embed)
+
+@bot.tree.command(name="reload", description="Reload a feature's code without restarting the bot")
+@owner_only()
+@app_commands.describe(feature="The feature to reload, or every enabled one")
+async def reload(interaction: discord.Interaction, feature: Literal[tuple(FEATURE_EXTENSIONS) + ("all",)]):
+    # Only the commands and listeners are swapped: the gateway session and
+    # everything kept in memory stay as they are. With clusters this reloads
+    # the process that received the command only.
+    if feature != "all" and feature not in ENABLED_FEATURES:
+        await interaction.response.send_message(f"❌ `{feature}` is not enabled here!", ephemeral=True)
         return
+    features = [name for name in FEATURE_EXTENSIONS if name in ENABLED_FEATURES] if feature == "all" else [feature]
     
-    bot_choice = random.choice(choices)
-    
-    if choice == bot_choice:
-        result = "It's a tie!"
-    elif (choice == "rock" and bot_choice == "scissors") or \
-         (choice == "paper" and bot_choice == "rock") or \
-         (choice == "scissors" and bot_choice == "paper"):
-        result = "You win! 🎉"
-    else:
-        result = "You lose! 😢"
-    
-    embed = discord.Embed(title="✊✋✌️ Rock Paper Scissors", color=discord.Color.blue())
-    embed.add_field(name="Your Choice", value=choice.capitalize(), inline=True)
-    embed.add_field(name="Bot's Choice", value=bot_choice.capitalize(), inline=True)
-    embed.add_field(name="Result", value=result, inline=False)
-    
-    await interaction.response.send_message(embed=embed)
-
-# ==================== UTILITY COMMANDS ====================
-
-@bot.tree.command(name="serverinfo", description="Get server information")
-async def serverinfo(interaction: discord.Interaction):
-    guild = interaction.guild
-    
-    embed = discord.Embed(title=f"ℹ️ {guild.name}", color=discord.Color.blue())
-    embed.set_thumbnail(url=guild.icon.url if guild.icon else None)
-    embed.add_field(name="Owner", value=guild.owner.mention, inline=True)
-    embed.add_field(name="Members", value=guild.member_count, inline=True)
-    embed.add_field(name="Channels", value=len(guild.channels), inline=True)
-    embed.add_field(name="Roles", value=len(guild.roles), inline=True)
-    embed.add_field(name="Created", value=guild.created_at.strftime("%B %d, %Y"), inline=True)
-    embed.add_field(name="Server ID", value=guild.id, inline=True)
-    
-    await interaction.response.send_message(embed=embed)
-
-@bot.tree.command(name="userinfo", description="Get user information")
-async def userinfo(interaction: discord.Interaction, member: discord.Member = None):
-    target = member if member else interaction.user
-    
-    embed = discord.Embed(title=f"👤 {target.name}", color=target.color)
-    embed.set_thumbnail(url=target.display_avatar.url)
-    embed.add_field(name="ID", value=target.id, inline=True)
-    embed.add_field(name="Nickname", value=target.nick if target.nick else "None", inline=True)
-    embed.add_field(name="Status", value=str(target.status).capitalize(), inline=True)
-    embed.add_field(name="Joined Server", value=target.joined_at.strftime("%B %d, %Y"), inline=True)
-    embed.add_field(name="Account Created", value=target.created_at.strftime("%B %d, %Y"), inline=True)
-    embed.add_field(name="Roles", value=len(target.roles) - 1, inline=True)
-    
-    await interaction.response.send_message(embed=embed)
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    lines = []
+    for name in features:
+        started = time.perf_counter()
+        try:
+            await bot.reload_extension(FEATURE_EXTENSIONS[name])
+        except commands.ExtensionError as e:
+            # The failed extension is left running its previous code
+            print(f"❌ Failed to reload {name}: {e}")
+            lines.append(f"❌ `{name}`: {e.__cause__ or e}")
+            break
+        lines.append(f"✅ `{name}` in {format_ms(time.perf_counter() - started)}")
+    metrics.instrument(bot)
+    
+    # Uploads only if a command's signature changed
+    if CLUSTER_ID == 0:
+        try:
+            await command_sync.sync(again=True)
+            lines.append(command_sync.report())
+        except Exception as e:
+            lines.append(f"❌ Failed to sync commands: {e}")
+    await interaction.followup.send("\n".join(lines), ephemeral=True)
 
-@bot.tree.command(name="avatar", description="Get a user's avatar")
-async def avatar(interaction: discord.Interaction, member: discord.Member = None):
-    target = member if member else interaction.user
-    
-    embed = discord.Embed(title=f"🖼️ {target.name}'s Avatar", color=discord.Color.blue())
-    embed.set_image(url=target.display_avatar.url)
-    
-    await interaction.response.send_message(embed=embed)
+def format_ms(seconds):
+    return "> 10s" if seconds == float("inf") else f"{seconds * 1000:,.1f}ms"
 
-@bot.tree.command(name="poll", description="Create a poll")
-async def poll(interaction: discord.Interaction, question: str, option1: str, option2: str, option3: str = None, option4: str = None):
-    embed = discord.Embed(title="📊 Poll", description=question, color=discord.Color.blue())
-    
-    options = [option1, option2]
-    if option3:
-        options.append(option3)
-    if option4:
-        options.append(option4)
-    
-    reactions = ["1️⃣", "2️⃣", "3️⃣", "4️⃣"]
-    
-    for idx, option in enumerate(options):
-        embed.add_field(name=f"{reactions[idx]} Option {idx + 1}", value=option, inline=False)
+@bot.tree.command(name="botstats", description="Show bot performance metrics")
+@app_commands.checks.has_permissions(administrator=True)
+async def botstats(interaction: discord.Interaction):
+    embed = discord.Embed(title="📈 Bot Stats", color=discord.Color.blue())
+    
+    gateway = metrics.gateway_latency()
+    embed.add_field(name="Gateway Latency", value=format_ms(gateway) if gateway is not None else "n/a", inline=True)
+    embed.add_field(name="Loop Lag (p99)", value=format_ms(metrics.loop_lag.quantile(0.99)), inline=True)
+    embed.add_field(name="Loop Lag (last)", value=format_ms(metrics.last_loop_lag), inline=True)
+    
+    busiest = sorted(metrics.commands.items(), key=lambda item: item[1].count, reverse=True)[:10]
+    lines = [
+        f"`/{name}` {hist.count:,} calls · p50 {format_ms(hist.quantile(0.5))} · p99 {format_ms(hist.quantile(0.99))}"
+        f" · {metrics.command_errors.get(name, 0):,} errors"
+        for name, hist in busiest
+    ]
+    embed.add_field(name="Commands", value="\n".join(lines) or "No commands run yet", inline=False)
     
-    await interaction.response.send_message(embed=embed)
-    message = await interaction.original_response()
+    lines = [
+        f"`{name}` {hist.count:,} events · p99 {format_ms(hist.quantile(0.99))} · {metrics.event_errors.get(name, 0):,} errors"
+        for name, hist in sorted(metrics.events.items())
+    ]
+    embed.add_field(name="Events", value="\n".join(lines) or "No events yet", inline=False)
     
-    for i in range(len(options)):
-        await message.add_reaction(reactions[i])
+    lines = [
+        f"`{name}` {hist.count:,} flushes · {metrics.flush_bytes.get(name, 0):,} bytes · p99 {format_ms(hist.quantile(0.99))}"
+        for name, hist in sorted(metrics.flushes.items())
+    ]
+    embed.add_field(name="Storage Flushes", value="\n".join(lines) or "Nothing flushed yet", inline=False)
+    
+    cache = user_resolver.stats()
+    embed.add_field(name="User Cache", value=f"{cache['hits'] + cache['gateway_hits']:,} hits · {cache['misses']:,} misses", inline=True)
+    suppressed = sum(rate_limiter.suppressed.values())
+    embed.add_field(name="Rate Limited", value=f"{suppressed:,} suppressed · {rate_limiter.suppressed['xp']:,} XP grants", inline=True)
+    queue = outbound.stats()
+    embed.add_field(name="Outbound Queue", value=f"{queue['depth']:,} queued · {queue['dropped']:,} dropped · {queue['rate_limited']:,} rate limited", inline=True)
+    hit_rate = embed_cache.hit_rate()
+    embed.add_field(name="Embed Cache", value=f"{hit_rate:.0%} hits · {len(embed_cache.entries):,} cached" if hit_rate is not None else "Not used yet", inline=True)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+# Command tree sync: COMMAND_SYNC=auto uploads the tree only when it changed
+# since the last sync, "force" always uploads, "off" never does. DEV_GUILD_IDS
+# syncs to those guilds instead of globally.
+COMMAND_SYNC = os.getenv("COMMAND_SYNC", "auto")
+DEV_GUILD_IDS = [int(guild_id) for guild_id in os.getenv("DEV_GUILD_IDS", "").split(",") if guild_id.strip()]
+
+command_sync = CommandSync(bot.tree, os.getenv("COMMAND_SYNC_FILE", "command_sync.json"), mode=COMMAND_SYNC, dev_guild_ids=DEV_GUILD_IDS)
+
+# Shutdown and restarts: SIGTERM/SIGINT stop the gateway, wait up to
+# SHUTDOWN_DRAIN_TIMEOUT seconds for running handlers, send what is queued and
+# close everything below in this order, which flushes it. The gateway session
+# is saved to SESSION_FILE, and a restart within RESUME_MAX_AGE seconds
+# resumes it instead of identifying (see lifecycle.py).
+SESSION_FILE = os.getenv("SESSION_FILE", f"session-{CLUSTER_ID}.json" if cluster_client else "session.json")
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "10"))
+RESUME_MAX_AGE = float(os.getenv("RESUME_MAX_AGE", "60"))
+
+lifecycle = Lifecycle(bot, SESSION_FILE, drain=metrics.drain, drain_timeout=SHUTDOWN_DRAIN_TIMEOUT, resume_max_age=RESUME_MAX_AGE)
+# Due reminders and poll closes still being delivered finish first, then
+# what they queued is sent
+lifecycle.add("scheduler", scheduler.close, needs_http=True)
+lifecycle.add("outbound", outbound.close, needs_http=True)
+if meme_feed is not None:
+    lifecycle.add("memes", meme_feed.stop)
+if cluster_client:
+    lifecycle.add("cluster", cluster_client.close)
+lifecycle.add("http", http_pool.close)
+lifecycle.add("profiling", slow_tracer.disable)
+lifecycle.add("metrics", metrics.close)
+# The ledger is saved first so the economy snapshot is never ahead of it
+if economy is not None:
+    lifecycle.add("economy", economy.close, flush_sync=economy_ledger.flush_sync)
+for name, subsystem in (("mentions", mention_analytics), ("polls", poll_store)):
+    if subsystem is not None:
+        lifecycle.add(name, subsystem.close, flush_sync=subsystem.flush_sync)
+if warning_store is not None:
+    lifecycle.add("warnings", warning_store.close)
+lifecycle.add("store", store.close, flush_sync=store.flush_sync)
+lifecycle.add("rate limits", rate_limiter.flush, flush_sync=rate_limiter.flush_sync)
+if gateway_recorder is not None:
+    lifecycle.add("gateway recorder", gateway_recorder.close)
+
+mark_startup("loaded")
 
-@bot.tree.command(name="remind", description="Set a reminder")
-async def remind(interaction: discord.Interaction, time_minutes: int, message: str):
-    await interaction.response.send_message(f"⏰ I'll remind you in {time_minutes} minute(s)!")
-    
-    await asyncio.sleep(time_minutes * 60)
-    
-    await interaction.user.send(f"⏰ **Reminder:** {message}")
-
-@bot.tree.command(name="say", description="Make the bot say something")
-@app_commands.checks.has_permissions(manage_messages=True)
-async def say(interaction: discord.Interaction, message: str, channel: discord.TextChannel = None):
-    target_channel = channel if channel else interaction.channel
-    await target_channel.send(message)
-    await interaction.response.send_message
+# Run the bot
+async def main():
+    token = os.getenv("DISCORD_TOKEN")
+    if not token:
+        sys.exit("❌ DISCORD_TOKEN is not set; export the bot token from the Discord developer portal")
+    lifecycle.install()
+    lifecycle.install_signal_handlers()
+    try:
+        async with bot:
+            await bot.start(token)
+    finally:
+        await lifecycle.close()
+        lifecycle.uninstall()
+
+if __name__ == "__main__":
+    discord.utils.setup_logging()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        lifecycle.flush_sync()
@@ -0,0 +1,193 @@
+import asyncio
+import contextlib
+import json
+import os
+import time
+
+from models import EconomyRecord
+from storage import atomic_write
+
+# Economy transactions. Each (guild, user) account hashes to one of a fixed
+# set of asyncio locks; a transaction takes the locks of every account it
+# touches in ascending stripe order, so two-party transfers can't deadlock
+# and unrelated users never wait on each other.
+#
+# Every change is appended to a ledger ([time, kind, guild, user, balance,
+# bank]) instead of rewriting economy data. Entries hold the balances after
+# the change, so replaying them over the last snapshot is idempotent.
+# Compaction writes a fresh snapshot through the store and empties the ledger.
+
+
+class StripedLocks:
+    def __init__(self, stripes=256):
+        self.locks = [asyncio.Lock() for _ in range(stripes)]
+
+    def stripe(self, guild_id, user_id):
+        return hash((guild_id, user_id)) % len(self.locks)
+
+    @contextlib.asynccontextmanager
+    async def hold(self, guild_id, *user_ids):
+        stripes = sorted({self.stripe(guild_id, user_id) for user_id in user_ids})
+        acquired = []
+        try:
+            for stripe in stripes:
+                await self.locks[stripe].acquire()
+                acquired.append(stripe)
+            yield
+        finally:
+            for stripe in reversed(acquired):
+                self.locks[stripe].release()
+
+
+class Ledger:
+    def __init__(self, filename, flush_interval=1.0, compact_every=10000, compact_interval=300.0):
+        self.filename = filename
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+        # Entries since the last snapshot, i.e. what a restart has to replay
+        self.entries = 0
+        self.compactions = 0
+        self.bytes_written = 0
+        self.last_compaction = time.monotonic()
+        self._pending_lines = []
+        self._io_lock = asyncio.Lock()
+
+    def record(self, kind, guild_id, user_id, account):
+        entry = [round(time.time(), 3), kind, guild_id, user_id, account.balance, account.bank]
+        self._pending_lines.append(json.dumps(entry, separators=(",", ":")))
+        self.entries += 1
+
+    def replay(self, data):
+        # Applies the ledger to data ({guild_id: {user_id: EconomyRecord}})
+        # and returns the (guild_id, user_id) pairs it touched
+        touched = set()
+        if not os.path.exists(self.filename):
+            return touched
+        with open(self.filename, 'r') as f:
+            for line in f:
+                try:
+                    _, _, guild_id, user_id, balance, bank = json.loads(line)
+                except ValueError:
+                    # Torn last line from a crash mid-append
+                    continue
+                if guild_id not in data:
+                    data[guild_id] = {}
+                data[guild_id][user_id] = EconomyRecord(balance=balance, bank=bank)
+                touched.add((guild_id, user_id))
+                self.entries += 1
+        return touched
+
+    def _append(self, lines):
+        text = "\n".join(lines) + "\n"
+        with open(self.filename, 'a') as f:
+            f.write(text)
+        self.bytes_written += len(text.encode())
+
+    async def flush(self):
+        async with self._io_lock:
+            await self._flush_locked()
+
+    async def _flush_locked(self):
+        if not self._pending_lines:
+            return
+        lines = self._pending_lines
+        self._pending_lines = []
+        try:
+            await asyncio.to_thread(self._append, lines)
+        except BaseException:
+            self._pending_lines = lines + self._pending_lines
+            raise
+
+    def flush_sync(self):
+        if self._pending_lines:
+            self._append(self._pending_lines)
+            self._pending_lines = []
+
+    def should_compact(self):
+        if self.entries >= self.compact_every:
+            return True
+        return self.entries > 0 and time.monotonic() - self.last_compaction >= self.compact_interval
+
+    async def compact(self, snapshot):
+        # The ledger must be on disk before the snapshot: a snapshot that is
+        # newer than the ledger would be rolled back by the replay
+        async with self._io_lock:
+            await self._flush_locked()
+            entries = self.entries
+            await snapshot()
+            # Entries made while the snapshot was written are still pending
+            # and get appended to the fresh file
+            await asyncio.to_thread(atomic_write, self.filename, "")
+            self.entries -= entries
+            self.compactions += 1
+            self.last_compaction = time.monotonic()
+
+
+class Economy:
+    def __init__(self, ledger, account, on_change, snapshot, stripes=256):
+        # account(guild_id, user_id) returns the record, creating it if needed;
+        # on_change(guild_id, *user_ids) runs after every committed change;
+        # snapshot() persists the current accounts
+        self.ledger = ledger
+        self.account = account
+        self.on_change = on_change
+        self.snapshot = snapshot
+        self.locks = StripedLocks(stripes)
+        self.transactions = 0
+        self._task = None
+
+    @contextlib.asynccontextmanager
+    async def transaction(self, guild_id, *user_ids, kind):
+        # Yields the accounts of user_ids. Changes made to them are logged
+        # when the block exits, or rolled back if it raises.
+        async with self.locks.hold(guild_id, *user_ids):
+            accounts = [self.account(guild_id, user_id) for user_id in user_ids]
+            before = [(account.balance, account.bank) for account in accounts]
+            try:
+                yield accounts
+            except BaseException:
+                for account, (balance, bank) in zip(accounts, before):
+                    account.balance, account.bank = balance, bank
+                raise
+            changed = []
+            for user_id, account, (balance, bank) in zip(user_ids, accounts, before):
+                if user_id in changed or (account.balance, account.bank) == (balance, bank):
+                    continue
+                self.ledger.record(kind, guild_id, user_id, account)
+                changed.append(user_id)
+            if changed:
+                self.transactions += 1
+                self.on_change(guild_id, *changed)
+
+    def stats(self):
+        return {
+            "transactions": self.transactions,
+            "ledger_entries": self.ledger.entries,
+            "compactions": self.ledger.compactions,
+        }
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.ledger.flush_interval)
+            try:
+                if self.ledger.should_compact():
+                    await self.ledger.compact(self.snapshot)
+                else:
+                    await self.ledger.flush()
+            except Exception as e:
+                print(f"❌ Failed to save economy ledger: {e}")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.ledger.compact(self.snapshot)
@@ -0,0 +1,64 @@
+from collections import Counter, OrderedDict
+
+# Rendered embeds for responses that change far less often than they are
+# requested. An entry is stored under (command, guild) together with the
+# version of the data it was rendered from; every place that changes that
+# data bumps the version of its (scope, guild), so a stale entry is never
+# served and an unchanged one is never rebuilt. There are no TTLs.
+#
+# Scopes are free-form names: the leaderboard collections ("economy",
+# "levels", "mentions"), "guild" for server structure, or None for responses
+# that never change.
+
+
+class EmbedCache:
+    def __init__(self, max_entries=2000):
+        self.max_entries = max_entries
+        # (command, guild_id) -> (version, embed), least recently used first
+        self.entries = OrderedDict()
+        # (scope, guild_id) -> version
+        self.versions = {}
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def version(self, scope, guild_id):
+        if scope is None:
+            return 0
+        return self.versions.get((scope, guild_id), 0)
+
+    def bump(self, scope, guild_id):
+        key = (scope, guild_id)
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    async def get(self, command, guild_id, scope, build):
+        # Returns the cached embed, or awaits build() for a fresh one. A None
+        # from build() (nothing to show) is not cached.
+        key = (command, guild_id)
+        version = self.version(scope, guild_id)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.entries.move_to_end(key)
+            self.hits[command] += 1
+            return entry[1]
+        self.misses[command] += 1
+        embed = await build()
+        # Data that changed while build() awaited makes this render stale
+        # already; the next call rebuilds it
+        if embed is not None:
+            self.entries[key] = (version, embed)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return embed
+
+    def hit_rate(self, command=None):
+        hits = self.hits[command] if command else sum(self.hits.values())
+        total = hits + (self.misses[command] if command else sum(self.misses.values()))
+        return hits / total if total else None
+
+    def stats(self):
+        stats = {"entries": len(self.entries)}
+        for command in sorted(set(self.hits) | set(self.misses)):
+            stats[f"{command}_hits"] = self.hits[command]
+            stats[f"{command}_misses"] = self.misses[command]
+        return stats
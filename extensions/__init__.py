@@ -0,0 +1,6 @@
+# One extension per feature, loaded by discord_mention_bot according to
+# ENABLED_FEATURES (see features.FEATURE_EXTENSIONS) and reloadable in place
+# with /reload. Extensions only hold commands and listeners: the data they
+# work on, and any subsystem with state, lives in discord_mention_bot so a
+# reload never drops it. discord.py removes an extension's commands and
+# listeners on unload by module name, so setup() only has to add them.
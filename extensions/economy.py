@@ -0,0 +1,162 @@
+import random
+
+import discord
+from discord import app_commands
+
+from discord_mention_bot import LEADERBOARD_SIZE, cooldown, economy, economy_data, embed_cache, get_balance, leaderboards, user_resolver
+
+# ==================== ECONOMY COMMANDS ====================
+
+@app_commands.command(name="balance", description="Check your or another user's balance")
+async def balance(interaction: discord.Interaction, member: discord.Member = None):
+    target = member if member else interaction.user
+    guild_id = interaction.guild.id
+    user_id = target.id
+    
+    data = get_balance(guild_id, user_id)
+    
+    embed = discord.Embed(title=f"💰 {target.name}'s Balance", color=discord.Color.green())
+    embed.add_field(name="Wallet", value=f"${data['balance']:,}", inline=True)
+    embed.add_field(name="Bank", value=f"${data['bank']:,}", inline=True)
+    embed.add_field(name="Total", value=f"${data['balance'] + data['bank']:,}", inline=False)
+    embed.set_thumbnail(url=target.display_avatar.url)
+    
+    await interaction.response.send_message(embed=embed)
+
+@app_commands.command(name="daily", description="Claim your daily reward")
+@cooldown("daily")
+async def daily(interaction: discord.Interaction):
+    guild_id = interaction.guild.id
+    user_id = interaction.user.id
+    
+    async with economy.transaction(guild_id, user_id, kind="daily") as (data,):
+        reward = random.randint(500, 1000)
+        data["balance"] += reward
+    
+    await interaction.response.send_message(f"💵 You claimed your daily reward of **${reward}**!")
+
+@app_commands.command(name="work", description="Work to earn money")
+@cooldown("work")
+async def work(interaction: discord.Interaction):
+    guild_id = interaction.guild.id
+    user_id = interaction.user.id
+    
+    jobs = ["programmer", "teacher", "doctor", "chef", "artist", "musician"]
+    job = random.choice(jobs)
+    earnings = random.randint(100, 500)
+    
+    async with economy.transaction(guild_id, user_id, kind="work") as (data,):
+        data["balance"] += earnings
+    
+    await interaction.response.send_message(f"💼 You worked as a **{job}** and earned **${earnings}**!")
+
+@app_commands.command(name="deposit", description="Deposit money to your bank")
+@cooldown("deposit")
+async def deposit(interaction: discord.Interaction, amount: int):
+    guild_id = interaction.guild.id
+    user_id = interaction.user.id
+    
+    async with economy.transaction(guild_id, user_id, kind="deposit") as (data,):
+        enough = amount <= data["balance"]
+        if enough:
+            data["balance"] -= amount
+            data["bank"] += amount
+    
+    if not enough:
+        await interaction.response.send_message("❌ You don't have enough money in your wallet!", ephemeral=True)
+        return
+    
+    await interaction.response.send_message(f"✅ Deposited **${amount:,}** to your bank!")
+
+@app_commands.command(name="withdraw", description="Withdraw money from your bank")
+@cooldown("withdraw")
+async def withdraw(interaction: discord.Interaction, amount: int):
+    guild_id = interaction.guild.id
+    user_id = interaction.user.id
+    
+    async with economy.transaction(guild_id, user_id, kind="withdraw") as (data,):
+        enough = amount <= data["bank"]
+        if enough:
+            data["bank"] -= amount
+            data["balance"] += amount
+    
+    if not enough:
+        await interaction.response.send_message("❌ You don't have enough money in your bank!", ephemeral=True)
+        return
+    
+    await interaction.response.send_message(f"✅ Withdrew **${amount:,}** from your bank!")
+
+@app_commands.command(name="give", description="Give money to another user")
+@cooldown("give")
+async def give(interaction: discord.Interaction, member: discord.Member, amount: int):
+    guild_id = interaction.guild.id
+    sender_id = interaction.user.id
+    receiver_id = member.id
+    
+    async with economy.transaction(guild_id, sender_id, receiver_id, kind="give") as (sender_data, receiver_data):
+        enough = amount <= sender_data["balance"]
+        if enough:
+            sender_data["balance"] -= amount
+            receiver_data["balance"] += amount
+    
+    if not enough:
+        await interaction.response.send_message("❌ You don't have enough money!", ephemeral=True)
+        return
+    
+    await interaction.response.send_message(f"✅ You gave **${amount:,}** to {member.mention}!")
+
+@app_commands.command(name="rob", description="Try to rob another user")
+@cooldown("rob")
+async def rob(interaction: discord.Interaction, member: discord.Member):
+    guild_id = interaction.guild.id
+    robber_id = interaction.user.id
+    victim_id = member.id
+    
+    async with economy.transaction(guild_id, robber_id, victim_id, kind="rob") as (robber_data, victim_data):
+        if victim_data["balance"] < 100:
+            result = None
+        elif random.choice([True, False]):
+            stolen = random.randint(50, min(500, victim_data["balance"]))
+            robber_data["balance"] += stolen
+            victim_data["balance"] -= stolen
+            result = f"💰 You successfully robbed **${stolen}** from {member.mention}!"
+        else:
+            fine = random.randint(100, 300)
+            robber_data["balance"] = max(0, robber_data["balance"] - fine)
+            result = f"❌ You got caught! You paid a fine of **${fine}**!"
+    
+    if result is None:
+        await interaction.response.send_message(f"❌ {member.mention} doesn't have enough money to rob!", ephemeral=True)
+        return
+    await interaction.response.send_message(result)
+
+@app_commands.command(name="leaderboard", description="View the richest users")
+async def leaderboard(interaction: discord.Interaction):
+    guild_id = interaction.guild.id
+    
+    if guild_id not in economy_data:
+        await interaction.response.send_message("No economy data available!", ephemeral=True)
+        return
+    
+    async def render():
+        sorted_users = leaderboards.top("economy", guild_id, LEADERBOARD_SIZE)
+        
+        embed = discord.Embed(title="💎 Richest Users", color=discord.Color.gold())
+        
+        users = await user_resolver.resolve_many([user_id for user_id, _ in sorted_users], interaction.guild)
+        
+        for idx, (user_id, data) in enumerate(sorted_users, 1):
+            user = users[int(user_id)]
+            if user is None:
+                continue
+            total = data["balance"] + data["bank"]
+            medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"**{idx}.**"
+            embed.add_field(name=f"{medal} {user.name}", value=f"${total:,}", inline=False)
+        return embed
+    
+    embed = await embed_cache.get("leaderboard", guild_id, "economy", render)
+    await interaction.response.send_message(embed=embed)
+
+async def setup(bot):
+    for command in (balance, daily, work, deposit, withdraw, give, rob, leaderboard):
+        bot.tree.add_command(command)
@@ -0,0 +1,95 @@
+import random
+
+import discord
+from discord import app_commands
+
+from discord_mention_bot import meme_feed
+
+# ==================== FUN COMMANDS ====================
+
+@app_commands.command(name="8ball", description="Ask the magic 8ball a question")
+async def eightball(interaction: discord.Interaction, question: str):
+    responses = [
+        "Yes, definitely!", "It is certain.", "Without a doubt.",
+        "You may rely on it.", "As I see it, yes.", "Most likely.",
+        "Outlook good.", "Yes.", "Signs point to yes.",
+        "Reply hazy, try again.", "Ask again later.", "Better not tell you now.",
+        "Cannot predict now.", "Concentrate and ask again.",
+        "Don't count on it.", "My reply is no.", "My sources say no.",
+        "Outlook not so good.", "Very doubtful."
+    ]
+    
+    embed = discord.Embed(title="🎱 Magic 8Ball", color=discord.Color.purple())
+    embed.add_field(name="Question", value=question, inline=False)
+    embed.add_field(name="Answer", value=random.choice(responses), inline=False)
+    
+    await interaction.response.send_message(embed=embed)
+
+@app_commands.command(name="coinflip", description="Flip a coin")
+async def coinflip(interaction: discord.Interaction):
+    result = random.choice(["Heads", "Tails"])
+    await interaction.response.send_message(f"🪙 The coin landed on: **{result}**!")
+
+@app_commands.command(name="dice", description="Roll a dice")
+async def dice(interaction: discord.Interaction, sides: int = 6):
+    result = random.randint(1, sides)
+    await interaction.response.send_message(f"🎲 You rolled a **{result}** (out of {sides})!")
+
+@app_commands.command(name="meme", description="Get a random meme")
+async def meme(interaction: discord.Interaction):
+    data = meme_feed.get_nowait()
+    send = interaction.response.send_message
+    
+    if data is None:
+        await interaction.response.defer()
+        data = await meme_feed.get()
+        send = interaction.followup.send
+    
+    if data is None:
+        await send("Failed to fetch meme!", ephemeral=True)
+        return
+    
+    embed = discord.Embed(title=data["title"], color=discord.Color.random())
+    embed.set_image(url=data["url"])
+    embed.set_footer(text=f"👍 {data['ups']} | r/{data['subreddit']}")
+    
+    await send(embed=embed)
+
+@app_commands.command(name="hug", description="Hug someone")
+async def hug(interaction: discord.Interaction, member: discord.Member):
+    await interaction.response.send_message(f"🤗 {interaction.user.mention} hugged {member.mention}!")
+
+@app_commands.command(name="slap", description="Slap someone")
+async def slap(interaction: discord.Interaction, member: discord.Member):
+    await interaction.response.send_message(f"👋 {interaction.user.mention} slapped {member.mention}!")
+
+@app_commands.command(name="rps", description="Play Rock Paper Scissors")
+async def rps(interaction: discord.Interaction, choice: str):
+    choices = ["rock", "paper", "scissors"]
+    choice = choice.lower()
+    
+    if choice not in choices:
+        await interaction.response.send_message("❌ Invalid choice! Choose rock, paper, or scissors.", ephemeral=True)
+        return
+    
+    bot_choice = random.choice(choices)
+    
+    if choice == bot_choice:
+        result = "It's a tie!"
+    elif (choice == "rock" and bot_choice == "scissors") or \
+         (choice == "paper" and bot_choice == "rock") or \
+         (choice == "scissors" and bot_choice == "paper"):
+        result = "You win! 🎉"
+    else:
+        result = "You lose! 😢"
+    
+    embed = discord.Embed(title="✊✋✌️ Rock Paper Scissors", color=discord.Color.blue())
+    embed.add_field(name="Your Choice", value=choice.capitalize(), inline=True)
+    embed.add_field(name="Bot's Choice", value=bot_choice.capitalize(), inline=True)
+    embed.add_field(name="Result", value=result, inline=False)
+    
+    await interaction.response.send_message(embed=embed)
+
+async def setup(bot):
+    for command in (eightball, coinflip, dice, meme, hug, slap, rps):
+        bot.tree.add_command(command)
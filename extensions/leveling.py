@@ -0,0 +1,113 @@
+import random
+
+import discord
+from discord import app_commands
+
+from discord_mention_bot import LEADERBOARD_SIZE, embed_cache, leaderboards, levels_data, outbound, rate_limiter, record_change, update_leaderboard, user_resolver
+from models import LevelRecord
+
+# ==================== LEVELING ====================
+
+async def grant_xp(message):
+    if message.author.bot:
+        return
+    
+    guild_id = message.guild.id
+    user_id = message.author.id
+    
+    if guild_id not in levels_data:
+        levels_data[guild_id] = {}
+    if user_id not in levels_data[guild_id]:
+        levels_data[guild_id][user_id] = LevelRecord()
+    
+    # Every message counts; only the XP grant has a cooldown. A message
+    # without XP is only counted in memory, and saved with the next grant,
+    # but the leaderboard still shows the new count
+    levels_data[guild_id][user_id]["messages"] += 1
+    if rate_limiter.hit(guild_id, user_id, "xp"):
+        update_leaderboard("levels", guild_id, user_id)
+        return
+    levels_data[guild_id][user_id]["xp"] += random.randint(10, 25)
+    
+    # Level up check
+    user_data = levels_data[guild_id][user_id]
+    xp_needed = user_data["level"] * 100
+    
+    if user_data["xp"] >= xp_needed:
+        user_data["level"] += 1
+        user_data["xp"] = 0
+        announce_level_up(message.channel, message.author.mention, user_data["level"])
+    
+    record_change("levels", guild_id, user_id)
+
+def announce_level_up(channel, mention, level):
+    def render(level_ups):
+        if len(level_ups) == 1:
+            user, new_level = level_ups[0]
+            return channel.send(f"🎉 {user} leveled up to **Level {new_level}**!")
+        shown = [f"{user} → **Level {new_level}**" for user, new_level in level_ups[:30]]
+        if len(level_ups) > 30:
+            shown.append(f"...and {len(level_ups) - 30} more")
+        return channel.send("🎉 Level ups!\n" + "\n".join(shown))
+    
+    outbound.coalesce(("messages", channel.id), (mention, level), render)
+
+# ==================== LEVELING COMMANDS ====================
+
+@app_commands.command(name="rank", description="Check your or another user's rank")
+async def rank(interaction: discord.Interaction, member: discord.Member = None):
+    target = member if member else interaction.user
+    guild_id = interaction.guild.id
+    user_id = target.id
+    
+    if guild_id not in levels_data or user_id not in levels_data[guild_id]:
+        await interaction.response.send_message("No rank data available!", ephemeral=True)
+        return
+    
+    data = levels_data[guild_id][user_id]
+    xp_needed = data["level"] * 100
+    
+    embed = discord.Embed(title=f"📊 {target.name}'s Rank", color=discord.Color.blue())
+    embed.add_field(name="Level", value=data["level"], inline=True)
+    embed.add_field(name="XP", value=f"{data['xp']}/{xp_needed}", inline=True)
+    embed.add_field(name="Messages", value=data["messages"], inline=True)
+    position = leaderboards.position("levels", guild_id, user_id)
+    embed.add_field(name="Server Rank", value=f"#{position:,} of {len(levels_data[guild_id]):,}", inline=True)
+    embed.set_thumbnail(url=target.display_avatar.url)
+    
+    await interaction.response.send_message(embed=embed)
+
+@app_commands.command(name="levelleaderboard", description="View top ranked users")
+async def levelleaderboard(interaction: discord.Interaction):
+    guild_id = interaction.guild.id
+    
+    if guild_id not in levels_data:
+        await interaction.response.send_message("No level data available!", ephemeral=True)
+        return
+    
+    async def render():
+        sorted_users = leaderboards.top("levels", guild_id, LEADERBOARD_SIZE)
+        
+        embed = discord.Embed(title="🏅 Top Ranked Users", color=discord.Color.purple())
+        
+        users = await user_resolver.resolve_many([user_id for user_id, _ in sorted_users], interaction.guild)
+        
+        for idx, (user_id, data) in enumerate(sorted_users, 1):
+            user = users[int(user_id)]
+            if user is None:
+                continue
+            medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"**{idx}.**"
+            embed.add_field(
+                name=f"{medal} {user.name}",
+                value=f"Level {data['level']} | {data['messages']} messages",
+                inline=False
+            )
+        return embed
+    
+    embed = await embed_cache.get("levelleaderboard", guild_id, "levels", render)
+    await interaction.response.send_message(embed=embed)
+
+async def setup(bot):
+    bot.tree.add_command(rank)
+    bot.tree.add_command(levelleaderboard)
+    bot.add_listener(grant_xp, "on_message")
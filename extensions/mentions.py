@@ -0,0 +1,99 @@
+import time
+from typing import Literal
+
+import discord
+from discord import app_commands
+
+from discord_mention_bot import (
+    LEADERBOARD_SIZE, embed_cache, leaderboards, mention_analytics, mention_data, record_change, user_resolver,
+)
+
+# ==================== MENTION TRACKING ====================
+
+async def track_mentions(message):
+    if message.author.bot or not message.mentions:
+        return
+    
+    guild_id = message.guild.id
+    if guild_id not in mention_data:
+        mention_data[guild_id] = {}
+    
+    now = time.time()
+    for mentioned_user in message.mentions:
+        user_id = mentioned_user.id
+        if user_id not in mention_data[guild_id]:
+            mention_data[guild_id][user_id] = 0
+        mention_data[guild_id][user_id] += 1
+        record_change("mentions", guild_id, user_id)
+        mention_analytics.record(guild_id, user_id, now)
+
+# ==================== MENTION COMMANDS ====================
+
+MentionWindow = Literal["all", "hour", "day", "week", "month"]
+
+@app_commands.command(name="mentions", description="Check how many times a user has been mentioned")
+@app_commands.describe(window="Only count mentions from the last hour, day, week or month")
+async def mentions(interaction: discord.Interaction, user: discord.Member = None, window: MentionWindow = "all"):
+    target_user = user if user else interaction.user
+    guild_id = interaction.guild.id
+    user_id = target_user.id
+    
+    if window == "all":
+        count = 0
+        if guild_id in mention_data and user_id in mention_data[guild_id]:
+            count = mention_data[guild_id][user_id]
+        label = "Total Mentions"
+    else:
+        count = mention_analytics.count(guild_id, user_id, window)
+        label = f"Mentions (last {window})"
+    
+    embed = discord.Embed(title="📊 Mention Statistics", color=discord.Color.purple())
+    embed.add_field(name="User", value=target_user.mention, inline=False)
+    embed.add_field(name=label, value=f"**{count}** times", inline=False)
+    embed.set_thumbnail(url=target_user.display_avatar.url)
+    
+    await interaction.response.send_message(embed=embed)
+
+@app_commands.command(name="mentionleaderboard", description="Show the most mentioned users")
+@app_commands.describe(window="Only count mentions from the last hour, day, week or month")
+async def mentionleaderboard(interaction: discord.Interaction, window: MentionWindow = "all"):
+    guild_id = interaction.guild.id
+    
+    async def render():
+        if window == "all":
+            sorted_mentions = leaderboards.top("mentions", guild_id, LEADERBOARD_SIZE) if guild_id in mention_data else []
+            title = "🏆 Most Mentioned Users"
+        else:
+            sorted_mentions = mention_analytics.top(guild_id, window, LEADERBOARD_SIZE)
+            title = f"🏆 Most Mentioned Users (last {window})"
+        
+        if not sorted_mentions:
+            return None
+        
+        embed = discord.Embed(title=title, color=discord.Color.gold())
+        
+        users = await user_resolver.resolve_many([user_id for user_id, _ in sorted_mentions], interaction.guild)
+        
+        for idx, (user_id, count) in enumerate(sorted_mentions, 1):
+            user = users[int(user_id)]
+            if user is None:
+                continue
+            medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"**{idx}.**"
+            embed.add_field(name=f"{medal} {user.name}", value=f"{count} mentions", inline=False)
+        return embed
+    
+    # Windowed counts shift with the clock alone, so only all-time is cached
+    if window == "all":
+        embed = await embed_cache.get("mentionleaderboard", guild_id, "mentions", render)
+    else:
+        embed = await render()
+    
+    if embed is None:
+        await interaction.response.send_message("No mention data available yet!", ephemeral=True)
+        return
+    await interaction.response.send_message(embed=embed)
+
+async def setup(bot):
+    bot.tree.add_command(mentions)
+    bot.tree.add_command(mentionleaderboard)
+    bot.add_listener(track_mentions, "on_message")
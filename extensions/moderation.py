@@ -0,0 +1,227 @@
+import os
+import re
+from datetime import timedelta
+
+import discord
+from discord import app_commands
+
+from discord_mention_bot import bot, user_resolver, warning_store
+from purge import PurgeJob
+
+# ==================== MODERATION COMMANDS ====================
+
+@app_commands.command(name="kick", description="Kick a member from the server")
+@app_commands.checks.has_permissions(kick_members=True)
+async def kick(interaction: discord.Interaction, member: discord.Member, reason: str = "No reason provided"):
+    await member.kick(reason=reason)
+    embed = discord.Embed(title="👢 Member Kicked", color=discord.Color.orange())
+    embed.add_field(name="Member", value=member.mention, inline=True)
+    embed.add_field(name="Moderator", value=interaction.user.mention, inline=True)
+    embed.add_field(name="Reason", value=reason, inline=False)
+    await interaction.response.send_message(embed=embed)
+
+@app_commands.command(name="ban", description="Ban a member from the server")
+@app_commands.checks.has_permissions(ban_members=True)
+async def ban(interaction: discord.Interaction, member: discord.Member, reason: str = "No reason provided"):
+    await member.ban(reason=reason)
+    embed = discord.Embed(title="🔨 Member Banned", color=discord.Color.red())
+    embed.add_field(name="Member", value=member.mention, inline=True)
+    embed.add_field(name="Moderator", value=interaction.user.mention, inline=True)
+    embed.add_field(name="Reason", value=reason, inline=False)
+    await interaction.response.send_message(embed=embed)
+
+@app_commands.command(name="unban", description="Unban a user from the server")
+@app_commands.checks.has_permissions(ban_members=True)
+async def unban(interaction: discord.Interaction, user_id: str):
+    user = await bot.fetch_user(int(user_id))
+    await interaction.guild.unban(user)
+    await interaction.response.send_message(f"✅ Unbanned {user.mention}")
+
+@app_commands.command(name="timeout", description="Timeout a member")
+@app_commands.checks.has_permissions(moderate_members=True)
+async def timeout(interaction: discord.Interaction, member: discord.Member, minutes: int, reason: str = "No reason provided"):
+    duration = timedelta(minutes=minutes)
+    await member.timeout(duration, reason=reason)
+    embed = discord.Embed(title="⏰ Member Timed Out", color=discord.Color.yellow())
+    embed.add_field(name="Member", value=member.mention, inline=True)
+    embed.add_field(name="Duration", value=f"{minutes} minutes", inline=True)
+    embed.add_field(name="Reason", value=reason, inline=False)
+    await interaction.response.send_message(embed=embed)
+
+@app_commands.command(name="warn", description="Warn a member")
+@app_commands.checks.has_permissions(moderate_members=True)
+async def warn(interaction: discord.Interaction, member: discord.Member, reason: str):
+    guild_id = interaction.guild.id
+    user_id = member.id
+    
+    active_warnings = await warning_store.add(guild_id, user_id, interaction.user.id, reason)
+    
+    embed = discord.Embed(title="⚠️ Member Warned", color=discord.Color.red())
+    embed.add_field(name="Member", value=member.mention, inline=True)
+    embed.add_field(name="Active Warnings", value=active_warnings, inline=True)
+    embed.add_field(name="Reason", value=reason, inline=False)
+    await interaction.response.send_message(embed=embed)
+
+class WarningsView(discord.ui.View):
+    # Older/Newer buttons page through a member's warnings, 5 at a time,
+    # using the ids on the current page as cursors
+    def __init__(self, owner_id, guild, target):
+        super().__init__(timeout=180)
+        self.owner_id = owner_id
+        self.guild = guild
+        self.target = target
+        self.page = []
+    
+    async def render(self, before=None, after=None):
+        self.page, has_older, has_newer = warning_store.page(self.guild.id, self.target.id, before=before, after=after)
+        self.older.disabled = not has_older
+        self.newer.disabled = not has_newer
+        
+        embed = discord.Embed(title=f"⚠️ Warnings for {self.target.name}", color=discord.Color.orange())
+        embed.add_field(name="Active Warnings", value=warning_store.active_count(self.guild.id, self.target.id), inline=True)
+        embed.add_field(name="Total Warnings", value=warning_store.total_count(self.guild.id, self.target.id), inline=True)
+        
+        mods = await user_resolver.resolve_many([warning.moderator_id for warning in self.page], self.guild)
+        for warning in self.page:
+            mod = mods[warning.moderator_id]
+            mod_mention = mod.mention if mod else f"<@{warning.moderator_id}>"
+            status = " (expired)" if warning.archived else ""
+            embed.add_field(
+                name=f"Warning #{warning.id}{status}",
+                value=f"**Reason:** {warning.reason}\n**By:** {mod_mention}\n**When:** <t:{int(warning.created_at)}:R>",
+                inline=False
+            )
+        return embed
+    
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("❌ Run `/warnings` yourself to page through them!", ephemeral=True)
+            return False
+        return True
+    
+    @discord.ui.button(label="◀ Newer", style=discord.ButtonStyle.secondary)
+    async def newer(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = await self.render(after=self.page[0].id)
+        await interaction.response.edit_message(embed=embed, view=self)
+    
+    @discord.ui.button(label="Older ▶", style=discord.ButtonStyle.secondary)
+    async def older(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = await self.render(before=self.page[-1].id)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+@app_commands.command(name="warnings", description="Check warnings for a member")
+async def warnings(interaction: discord.Interaction, member: discord.Member = None):
+    target = member if member else interaction.user
+    
+    view = WarningsView(interaction.user.id, interaction.guild, target)
+    embed = await view.render()
+    if not view.page:
+        await interaction.response.send_message(embed=embed)
+        return
+    await interaction.response.send_message(embed=embed, view=view)
+
+@app_commands.command(name="clearwarnings", description="Clear all warnings for a member")
+@app_commands.checks.has_permissions(administrator=True)
+async def clearwarnings(interaction: discord.Interaction, member: discord.Member):
+    guild_id = interaction.guild.id
+    user_id = member.id
+    
+    if await warning_store.clear(guild_id, user_id):
+        await interaction.response.send_message(f"✅ Cleared all warnings for {member.mention}")
+    else:
+        await interaction.response.send_message(f"❌ No warnings found for {member.mention}", ephemeral=True)
+
+# At most PURGE_SCAN_LIMIT messages of history are read per /purge; messages
+# too old to bulk delete are removed one per PURGE_SINGLE_DELETE_INTERVAL seconds
+PURGE_SCAN_LIMIT = int(os.getenv("PURGE_SCAN_LIMIT", "10000"))
+PURGE_SINGLE_DELETE_INTERVAL = float(os.getenv("PURGE_SINGLE_DELETE_INTERVAL", "1.0"))
+
+def parse_snowflake(value):
+    return int(value) if value is not None and value.isdigit() else None
+
+@app_commands.command(name="purge", description="Delete multiple messages")
+@app_commands.checks.has_permissions(manage_messages=True)
+@app_commands.describe(
+    amount="How many matching messages to delete",
+    user="Only delete messages from this user",
+    bots_only="Only delete messages from bots",
+    pattern="Only delete messages whose text matches this regular expression (needs message content)",
+    attachments_only="Only delete messages with attachments (needs message content)",
+    after_message_id="Only delete messages newer than this message",
+    before_message_id="Only delete messages older than this message",
+)
+async def purge(
+    interaction: discord.Interaction,
+    amount: app_commands.Range[int, 1, 10000],
+    user: discord.User = None,
+    bots_only: bool = False,
+    pattern: str = None,
+    attachments_only: bool = False,
+    after_message_id: str = None,
+    before_message_id: str = None,
+):
+    if (pattern or attachments_only) and not bot.intents.message_content:
+        # Without the intent Discord sends every message's content and
+        # attachments empty, so these filters would match nothing (or,
+        # for a pattern that matches "", everything)
+        await interaction.response.send_message(
+            "❌ `pattern` and `attachments_only` need the message content intent, which this bot runs without!",
+            ephemeral=True,
+        )
+        return
+    try:
+        regex = re.compile(pattern, re.IGNORECASE) if pattern else None
+    except re.error as e:
+        await interaction.response.send_message(f"❌ Invalid pattern: {e}", ephemeral=True)
+        return
+    after = parse_snowflake(after_message_id)
+    before = parse_snowflake(before_message_id)
+    if (after_message_id and after is None) or (before_message_id and before is None):
+        await interaction.response.send_message("❌ Message IDs must be numbers!", ephemeral=True)
+        return
+    
+    def check(payload):
+        author = payload["author"]
+        if user is not None and int(author["id"]) != user.id:
+            return False
+        if bots_only and not author.get("bot"):
+            return False
+        if attachments_only and not payload.get("attachments"):
+            return False
+        return regex is None or regex.search(payload.get("content", "")) is not None
+    
+    async def report(job):
+        if job.done:
+            text = f"✅ Deleted {job.deleted:,} message(s) after scanning {job.scanned:,}"
+            if job.failed:
+                text += f" · {job.failed:,} could not be deleted"
+            if job.error is not None:
+                text = f"⚠️ Stopped early: {job.error.text or job.error}\n" + text
+        else:
+            text = f"🧹 Deleting... {job.deleted:,}/{amount:,} deleted · {job.scanned:,} scanned"
+            if job.pending_singles:
+                text += f" · {job.pending_singles:,} older than 14 days queued"
+        try:
+            await interaction.edit_original_response(content=text)
+        except discord.HTTPException:
+            # The interaction token expires after 15 minutes
+            pass
+    
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    # Messages posted after the command was run are never touched
+    job = PurgeJob(
+        bot.http,
+        interaction.channel_id,
+        amount,
+        check,
+        before=before or interaction.id,
+        after=after,
+        scan_limit=PURGE_SCAN_LIMIT,
+        single_delete_interval=PURGE_SINGLE_DELETE_INTERVAL,
+        on_progress=report,
+    )
+    await job.run()
+
+async def setup(bot):
+    for command in (kick, ban, unban, timeout, warn, warnings, clearwarnings, purge):
+        bot.tree.add_command(command)
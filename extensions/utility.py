@@ -0,0 +1,196 @@
+import asyncio
+import time
+
+import discord
+from discord import app_commands
+
+from discord_mention_bot import bot, embed_cache, outbound, poll_store, scheduler, user_resolver
+from polls import OPTION_EMOJIS
+
+# ==================== UTILITY COMMANDS ====================
+
+@app_commands.command(name="serverinfo", description="Get server information")
+async def serverinfo(interaction: discord.Interaction):
+    guild = interaction.guild
+    
+    async def render():
+        embed = discord.Embed(title=f"ℹ️ {guild.name}", color=discord.Color.blue())
+        embed.set_thumbnail(url=guild.icon.url if guild.icon else None)
+        embed.add_field(name="Owner", value=f"<@{guild.owner_id}>", inline=True)
+        embed.add_field(name="Members", value=guild.member_count, inline=True)
+        embed.add_field(name="Channels", value=len(guild.channels), inline=True)
+        embed.add_field(name="Roles", value=len(guild.roles), inline=True)
+        embed.add_field(name="Created", value=guild.created_at.strftime("%B %d, %Y"), inline=True)
+        embed.add_field(name="Server ID", value=guild.id, inline=True)
+        return embed
+    
+    embed = await embed_cache.get("serverinfo", guild.id, "guild", render)
+    await interaction.response.send_message(embed=embed)
+
+# Everything /serverinfo shows changes through one of these events
+GUILD_VERSION_EVENTS = (
+    "on_guild_channel_create", "on_guild_channel_delete", "on_guild_role_create", "on_guild_role_delete",
+)
+# Only dispatched with the members intent (MEMBER_CACHE=1). Without it
+# discord.py doesn't track joins and leaves at all, so the member count stays
+# the one received on connect (or the last guild update) and there is
+# nothing to refresh.
+MEMBER_VERSION_EVENTS = ("on_member_join", "on_member_remove")
+
+async def bump_guild_version(before, after):
+    embed_cache.bump("guild", after.id)
+
+async def bump_guild_version_for(obj):
+    embed_cache.bump("guild", obj.guild.id)
+
+@app_commands.command(name="userinfo", description="Get user information")
+async def userinfo(interaction: discord.Interaction, member: discord.Member = None):
+    target = member if member else interaction.user
+    
+    embed = discord.Embed(title=f"👤 {target.name}", color=target.color)
+    embed.set_thumbnail(url=target.display_avatar.url)
+    embed.add_field(name="ID", value=target.id, inline=True)
+    embed.add_field(name="Nickname", value=target.nick if target.nick else "None", inline=True)
+    if bot.intents.presences:
+        # Without the presence feature every member looks offline
+        embed.add_field(name="Status", value=str(target.status).capitalize(), inline=True)
+    embed.add_field(name="Joined Server", value=target.joined_at.strftime("%B %d, %Y"), inline=True)
+    embed.add_field(name="Account Created", value=target.created_at.strftime("%B %d, %Y"), inline=True)
+    embed.add_field(name="Roles", value=len(target.roles) - 1, inline=True)
+    
+    await interaction.response.send_message(embed=embed)
+
+@app_commands.command(name="avatar", description="Get a user's avatar")
+async def avatar(interaction: discord.Interaction, member: discord.Member = None):
+    target = member if member else interaction.user
+    
+    embed = discord.Embed(title=f"🖼️ {target.name}'s Avatar", color=discord.Color.blue())
+    embed.set_image(url=target.display_avatar.url)
+    
+    await interaction.response.send_message(embed=embed)
+
+@app_commands.command(name="poll", description="Create a poll")
+@app_commands.describe(close_after_minutes="Stop counting votes after this many minutes")
+async def poll(interaction: discord.Interaction, question: str, option1: str, option2: str, option3: str = None, option4: str = None, close_after_minutes: app_commands.Range[int, 1, 43200] = None):
+    embed = discord.Embed(title="📊 Poll", description=question, color=discord.Color.blue())
+    
+    options = [option1, option2]
+    if option3:
+        options.append(option3)
+    if option4:
+        options.append(option4)
+    
+    for idx, option in enumerate(options):
+        embed.add_field(name=f"{OPTION_EMOJIS[idx]} Option {idx + 1}", value=option, inline=False)
+    
+    closes_at = time.time() + close_after_minutes * 60 if close_after_minutes else None
+    if closes_at:
+        embed.set_footer(text=f"Voting closes in {close_after_minutes} minute(s)")
+    
+    # The callback response carries the message, no need to fetch it
+    response = await interaction.response.send_message(embed=embed)
+    message = response.resource
+    
+    poll_store.create(message.id, interaction.channel_id, interaction.guild_id, question, options, closes_at)
+    if closes_at:
+        scheduler.add("poll_close", closes_at, [message.id])
+    outbound.add_reactions(message, OPTION_EMOJIS[:len(options)])
+
+def poll_results_embed(poll):
+    counts = poll.tally()
+    total = sum(counts)
+    embed = discord.Embed(
+        title="📊 Poll Results" + (" (closed)" if poll.closed else ""),
+        description=poll.question,
+        color=discord.Color.dark_grey() if poll.closed else discord.Color.blue()
+    )
+    for idx, (option, count) in enumerate(zip(poll.options, counts)):
+        share = count / total if total else 0
+        bar = "█" * round(share * 10) + "░" * (10 - round(share * 10))
+        embed.add_field(name=f"{OPTION_EMOJIS[idx]} {option}", value=f"{bar} {count} vote(s) ({share:.0%})", inline=False)
+    status = f"{total} vote(s)"
+    if poll.closes_at and not poll.closed:
+        status += f" · closes <t:{int(poll.closes_at)}:R>"
+    embed.add_field(name="Total", value=status, inline=False)
+    return embed
+
+@app_commands.command(name="pollresults", description="Show the current results of a poll")
+@app_commands.describe(message_id="The poll's message ID (defaults to the latest poll in this channel)")
+async def pollresults(interaction: discord.Interaction, message_id: str = None):
+    if message_id is None:
+        poll = poll_store.latest_in(interaction.channel_id)
+    else:
+        poll = poll_store.get(int(message_id)) if message_id.isdigit() else None
+    
+    if poll is None or poll.guild_id != interaction.guild_id:
+        await interaction.response.send_message("❌ Poll not found!", ephemeral=True)
+        return
+    await interaction.response.send_message(embed=poll_results_embed(poll))
+
+async def close_polls(payloads):
+    for (message_id,) in payloads:
+        poll = poll_store.end(message_id)
+        if poll is None:
+            continue
+        message = bot.get_partial_messageable(poll.channel_id).get_partial_message(message_id)
+        outbound.submit(("messages", poll.channel_id), lambda message=message, poll=poll: message.edit(embed=poll_results_embed(poll)))
+
+async def remove_vote_reaction(channel_id, message_id, emoji, user_id):
+    try:
+        await bot.http.remove_reaction(channel_id, message_id, emoji, user_id)
+    except (discord.Forbidden, discord.NotFound):
+        # Without Manage Messages the old reaction stays; the tally is still right
+        pass
+
+async def count_vote(payload):
+    if payload.user_id == bot.user.id or (payload.member is not None and payload.member.bot):
+        return
+    emoji = str(payload.emoji)
+    previous = poll_store.vote(payload.message_id, payload.user_id, emoji)
+    if previous is not None:
+        # One vote per user: the new reaction replaces the old one
+        outbound.submit(
+            ("reactions", payload.channel_id),
+            lambda: remove_vote_reaction(payload.channel_id, payload.message_id, OPTION_EMOJIS[previous], payload.user_id),
+        )
+
+async def uncount_vote(payload):
+    poll_store.unvote(payload.message_id, payload.user_id, str(payload.emoji))
+
+@app_commands.command(name="remind", description="Set a reminder")
+async def remind(interaction: discord.Interaction, time_minutes: int, message: str):
+    scheduler.add("remind", time.time() + time_minutes * 60, [interaction.user.id, message])
+    await interaction.response.send_message(f"⏰ I'll remind you in {time_minutes} minute(s)!")
+
+async def send_reminders(reminders):
+    users = await user_resolver.resolve_many([user_id for user_id, _ in reminders])
+    
+    async def send(user_id, message):
+        user = users[int(user_id)]
+        if user is None:
+            return
+        try:
+            await user.send(f"⏰ **Reminder:** {message}")
+        except discord.HTTPException:
+            pass
+    
+    await asyncio.gather(*(send(user_id, message) for user_id, message in reminders))
+
+@app_commands.command(name="say", description="Make the bot say something")
+@app_commands.checks.has_permissions(manage_messages=True)
+async def say(interaction: discord.Interaction, message: str, channel: discord.TextChannel = None):
+    target_channel = channel if channel else interaction.channel
+    await target_channel.send(message)
+    await interaction.response.send_message("✅ Message sent!", ephemeral=True)
+
+async def setup(bot):
+    for command in (serverinfo, userinfo, avatar, poll, pollresults, remind, say):
+        bot.tree.add_command(command)
+    bot.add_listener(bump_guild_version, "on_guild_update")
+    for event in GUILD_VERSION_EVENTS + (MEMBER_VERSION_EVENTS if bot.intents.members else ()):
+        bot.add_listener(bump_guild_version_for, event)
+    bot.add_listener(count_vote, "on_raw_reaction_add")
+    bot.add_listener(uncount_vote, "on_raw_reaction_remove")
+    # Timers persist across restarts and reloads; the handlers are replaced
+    scheduler.register("poll_close", close_polls)
+    scheduler.register("remind", send_reminders)
@@ -0,0 +1,95 @@
+import os
+import resource
+import time
+
+import discord
+
+# Gateway intents each feature module needs. "guilds" is always required for
+# slash commands to resolve their guild.
+FEATURE_INTENTS = {
+    "mentions": ("guilds", "guild_messages"),
+    "moderation": ("guilds",),
+    "economy": ("guilds",),
+    "leveling": ("guilds", "guild_messages"),
+    "fun": ("guilds",),
+    "utility": ("guilds", "guild_reactions"),
+    # Optional extras, off unless listed in ENABLED_FEATURES
+    "presence": ("presences",),
+    "prefix_commands": ("guild_messages", "message_content"),
+}
+
+DEFAULT_FEATURES = ("mentions", "moderation", "economy", "leveling", "fun", "utility")
+
+# The extension holding each feature's commands and listeners; see extensions/
+FEATURE_EXTENSIONS = {
+    "mentions": "extensions.mentions",
+    "moderation": "extensions.moderation",
+    "economy": "extensions.economy",
+    "leveling": "extensions.leveling",
+    "fun": "extensions.fun",
+    "utility": "extensions.utility",
+}
+
+PROCESS_START = time.monotonic()
+
+# Startup milestone -> seconds since PROCESS_START, in the order reached
+STARTUP_PHASES = {}
+
+
+def mark_startup(phase):
+    # Only the first time: reconnects fire READY again
+    STARTUP_PHASES.setdefault(phase, time.monotonic() - PROCESS_START)
+
+
+def parse_features(value):
+    if not value:
+        return set(DEFAULT_FEATURES)
+    features = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = features - FEATURE_INTENTS.keys()
+    if unknown:
+        raise ValueError(f"Unknown feature(s): {', '.join(sorted(unknown))}")
+    return features
+
+
+def build_intents(features, member_cache=False):
+    intents = discord.Intents.none()
+    intents.guilds = True
+    for feature in features:
+        for name in FEATURE_INTENTS[feature]:
+            setattr(intents, name, True)
+    # The member list is only worth receiving if we keep it
+    intents.members = member_cache
+    return intents
+
+
+def member_cache_flags(intents, member_cache):
+    if member_cache:
+        return discord.MemberCacheFlags.from_intents(intents)
+    return discord.MemberCacheFlags.none()
+
+
+def rss_bytes():
+    # Current resident set size; falls back to the peak where /proc is missing
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def startup_report(bot):
+    enabled = [name for name, value in bot.intents if value]
+    members = sum(len(guild.members) for guild in bot.guilds)
+    report = (
+        f"📦 Ready in {time.monotonic() - PROCESS_START:.1f}s | "
+        f"RSS {rss_bytes() / 1024 / 1024:.1f} MiB | "
+        f"{len(bot.guilds)} guilds, {members} cached members, {len(bot.users)} cached users, "
+        f"{len(bot.cached_messages)} cached messages | "
+        f"intents: {', '.join(enabled)}\n"
+        f"⏱️ Startup: {' → '.join(f'{phase} {seconds:.2f}s' for phase, seconds in STARTUP_PHASES.items())}"
+    )
+    if not bot.intents.members:
+        # The trade-off of the default: no member list to hold in memory, but
+        # names for leaderboards and warnings can't come from it either
+        report += "\n👥 Member cache off (MEMBER_CACHE=1 to enable): leaderboard users resolve through the user LRU and REST"
+    return report
@@ -0,0 +1,258 @@
+import asyncio
+import concurrent.futures
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+# Moderation warnings live in their own SQLite database instead of in memory.
+# Rows are append-only in time order (the autoincrement id doubles as the
+# paging cursor) and indexed by (guild, user, id), so a page of /warnings is
+# one index range scan however long the history gets. warning_counts keeps
+# each user's number of active warnings next to the rows, updated in the same
+# transaction, so /warn never has to count.
+#
+# Warnings older than `expiry` seconds become inactive (archived) and no
+# longer count; archived warnings older than `retention` seconds are deleted.
+# Either set to 0 keeps warnings forever.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS warnings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    moderator_id INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    archived INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS warnings_user ON warnings (guild_id, user_id, id);
+CREATE INDEX IF NOT EXISTS warnings_active ON warnings (created_at) WHERE archived = 0;
+
+CREATE TABLE IF NOT EXISTS warning_counts (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    active INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+PAGE_COLUMNS = "id, moderator_id, reason, created_at, archived"
+
+
+def _import_key(partition):
+    return "legacy_imported" if partition is None else f"legacy_imported:{partition}"
+
+
+class Warning:
+    __slots__ = ("id", "moderator_id", "reason", "created_at", "archived")
+
+    def __init__(self, id, moderator_id, reason, created_at, archived):
+        self.id = id
+        self.moderator_id = moderator_id
+        self.reason = reason
+        self.created_at = created_at
+        self.archived = bool(archived)
+
+
+class WarningStore:
+    def __init__(self, filename, expiry=0, retention=0, sweep_interval=60.0):
+        self.filename = filename
+        self.expiry = expiry
+        self.retention = retention
+        self.sweep_interval = sweep_interval
+        existed = os.path.exists(filename)
+        # Reads are single index lookups and run on the event loop; writes go
+        # through one worker thread so transactions never interleave.
+        self.writer = sqlite3.connect(filename, check_same_thread=False, timeout=30)
+        self.writer.execute("PRAGMA journal_mode=WAL")
+        self.writer.execute("PRAGMA synchronous=NORMAL")
+        had_meta = self.writer.execute("SELECT 1 FROM sqlite_master WHERE name = 'meta'").fetchone() is not None
+        self.writer.executescript(SCHEMA)
+        if existed and not had_meta and self.writer.execute("SELECT 1 FROM warnings LIMIT 1").fetchone():
+            # Databases from before the import was recorded: one holding
+            # warnings went through it already
+            with self.writer:
+                self.writer.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('legacy_imported', ?)", (str(time.time()),))
+        self.reader = sqlite3.connect(filename, timeout=30)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="warnings")
+        self._task = None
+        self.archived = 0
+        self.deleted = 0
+
+    async def _write(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    # ---------- writes (worker thread) ----------
+
+    def _add(self, guild_id, user_id, moderator_id, reason, created_at):
+        with self.writer:
+            self.writer.execute(
+                "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, created_at) VALUES (?, ?, ?, ?, ?)",
+                (guild_id, user_id, moderator_id, reason, created_at),
+            )
+            return self.writer.execute(
+                "INSERT INTO warning_counts (guild_id, user_id, active) VALUES (?, ?, 1) "
+                "ON CONFLICT (guild_id, user_id) DO UPDATE SET active = active + 1 RETURNING active",
+                (guild_id, user_id),
+            ).fetchone()[0]
+
+    def _clear(self, guild_id, user_id):
+        with self.writer:
+            cleared = self.writer.execute(
+                "DELETE FROM warnings WHERE guild_id = ? AND user_id = ?", (guild_id, user_id),
+            ).rowcount
+            self.writer.execute("DELETE FROM warning_counts WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
+        return cleared
+
+    def _sweep(self, now):
+        archived = deleted = 0
+        with self.writer:
+            if self.expiry:
+                expired = self.writer.execute(
+                    "SELECT guild_id, user_id, COUNT(*) FROM warnings WHERE archived = 0 AND created_at <= ? "
+                    "GROUP BY guild_id, user_id",
+                    (now - self.expiry,),
+                ).fetchall()
+                self.writer.execute(
+                    "UPDATE warnings SET archived = 1 WHERE archived = 0 AND created_at <= ?", (now - self.expiry,),
+                )
+                self.writer.executemany(
+                    "UPDATE warning_counts SET active = active - ? WHERE guild_id = ? AND user_id = ?",
+                    [(count, guild_id, user_id) for guild_id, user_id, count in expired],
+                )
+                self.writer.execute("DELETE FROM warning_counts WHERE active <= 0")
+                archived = sum(count for _, _, count in expired)
+            if self.retention:
+                deleted = self.writer.execute(
+                    "DELETE FROM warnings WHERE archived = 1 AND created_at <= ?", (now - self.retention,),
+                ).rowcount
+        return archived, deleted
+
+    def _import(self, rows, partitions):
+        with self.writer:
+            self.writer.executemany(
+                "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.writer.execute(
+                "INSERT OR REPLACE INTO warning_counts (guild_id, user_id, active) "
+                "SELECT guild_id, user_id, COUNT(*) FROM warnings WHERE archived = 0 GROUP BY guild_id, user_id"
+            )
+            # Same transaction: either everything was imported and this says
+            # so, or nothing was and the next start tries again
+            self.writer.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [(_import_key(partition), str(time.time())) for partition in partitions],
+            )
+        return len(rows)
+
+    # ---------- public API ----------
+
+    async def add(self, guild_id, user_id, moderator_id, reason):
+        # Returns the user's number of active warnings including this one
+        return await self._write(self._add, guild_id, user_id, moderator_id, reason, time.time())
+
+    async def clear(self, guild_id, user_id):
+        return await self._write(self._clear, guild_id, user_id)
+
+    def active_count(self, guild_id, user_id):
+        row = self.reader.execute(
+            "SELECT active FROM warning_counts WHERE guild_id = ? AND user_id = ?", (guild_id, user_id),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def total_count(self, guild_id, user_id):
+        return self.reader.execute(
+            "SELECT COUNT(*) FROM warnings WHERE guild_id = ? AND user_id = ?", (guild_id, user_id),
+        ).fetchone()[0]
+
+    def page(self, guild_id, user_id, before=None, after=None, limit=5):
+        # Newest first. `before`/`after` are warning ids from the previous
+        # page. Returns (warnings, has_older, has_newer).
+        if after is not None:
+            rows = self.reader.execute(
+                f"SELECT {PAGE_COLUMNS} FROM warnings WHERE guild_id = ? AND user_id = ? AND id > ? "
+                "ORDER BY id ASC LIMIT ?",
+                (guild_id, user_id, after, limit + 1),
+            ).fetchall()
+            has_newer = len(rows) > limit
+            rows = rows[:limit][::-1]
+            has_older = True
+        else:
+            rows = self.reader.execute(
+                f"SELECT {PAGE_COLUMNS} FROM warnings WHERE guild_id = ? AND user_id = ? AND id < ? "
+                "ORDER BY id DESC LIMIT ?",
+                (guild_id, user_id, before if before is not None else 2 ** 63 - 1, limit + 1),
+            ).fetchall()
+            has_older = len(rows) > limit
+            rows = rows[:limit]
+            has_newer = before is not None
+        return [Warning(*row) for row in rows], has_older, has_newer
+
+    def needs_import(self, partitions=(None,)):
+        # partitions: the slices of the old data this process owns (one per
+        # shard in cluster mode; None is all of it). Returns the ones that
+        # weren't imported yet; an import of all of it covers every slice,
+        # and all of it is only imported again if no slice was (that would
+        # duplicate the ones that were).
+        imported = {key for key, in self.reader.execute("SELECT key FROM meta WHERE key LIKE 'legacy_imported%'")}
+        if _import_key(None) in imported:
+            return []
+        return [
+            partition for partition in partitions
+            if _import_key(partition) not in imported and (partition is not None or not imported)
+        ]
+
+    async def import_legacy(self, entries, partitions=(None,)):
+        # entries: (guild_id, user_id, [{"reason", "moderator", "timestamp"}]),
+        # exactly the old warnings of `partitions`
+        rows = []
+        for guild_id, user_id, warnings in entries:
+            for warning in warnings:
+                try:
+                    created_at = datetime.fromisoformat(warning["timestamp"]).timestamp()
+                except (TypeError, ValueError):
+                    # Keep the warning; it just counts as given now
+                    print(f"⚠️ Warning for {user_id} in {guild_id} has a bad timestamp {warning['timestamp']!r}; importing it as now")
+                    created_at = time.time()
+                rows.append((int(guild_id), int(user_id), int(warning["moderator"]), warning["reason"], created_at))
+        rows.sort(key=lambda row: row[4])
+        return await self._write(self._import, rows, list(partitions))
+
+    async def sweep(self):
+        archived, deleted = await self._write(self._sweep, time.time())
+        self.archived += archived
+        self.deleted += deleted
+
+    def start(self):
+        if self._task is None and (self.expiry or self.retention):
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"❌ Failed to expire warnings: {e}")
+            await asyncio.sleep(self.sweep_interval)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=True)
+        self.reader.close()
+        self.writer.close()
+
+    def stats(self):
+        return {"archived": self.archived, "deleted": self.deleted}
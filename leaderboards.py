@@ -0,0 +1,181 @@
+import random
+
+MAX_LEVEL = 32
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        # width[i] = how many positions next[i] moves forward
+        self.width = [1] * level
+
+
+class RankedSkipList:
+    # Indexable skip list: insert, remove and rank lookups are O(log n),
+    # reading the first n keys is O(n).
+    def __init__(self):
+        self.head = _Node(None, MAX_LEVEL)
+        self.size = 0
+        self._random = random.Random()
+
+    def __len__(self):
+        return self.size
+
+    def _random_level(self):
+        level = 1
+        while level < MAX_LEVEL and self._random.random() < 0.5:
+            level += 1
+        return level
+
+    def insert(self, key):
+        chain = [None] * MAX_LEVEL
+        steps_at_level = [0] * MAX_LEVEL
+        node = self.head
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        height = self._random_level()
+        new_node = _Node(key, height)
+        steps = 0
+        for level in range(height):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(height, MAX_LEVEL):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain = [None] * MAX_LEVEL
+        node = self.head
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def rank(self, key):
+        # 0-based position of key
+        position = 0
+        node = self.head
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        target = node.next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        return position
+
+    def first(self, n):
+        keys = []
+        node = self.head.next[0]
+        while node is not None and len(keys) < n:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class GuildRanking:
+    def __init__(self):
+        self.order = RankedSkipList()
+        self.keys = {}
+
+    def set(self, user_id, score):
+        # Highest score first, ties broken by user id
+        key = (tuple(-value for value in score), user_id)
+        old_key = self.keys.get(user_id)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self.order.remove(old_key)
+        self.order.insert(key)
+        self.keys[user_id] = key
+
+    def discard(self, user_id):
+        old_key = self.keys.pop(user_id, None)
+        if old_key is not None:
+            self.order.remove(old_key)
+
+
+class Leaderboards:
+    def __init__(self):
+        # board -> (guild-keyed data, score function returning a tuple)
+        self.boards = {}
+        self.rankings = {}
+
+    def add_board(self, name, data, score):
+        self.boards[name] = (data, score)
+
+    def _ranking(self, name, guild_id):
+        # Built from the data the first time a guild's board is queried, then
+        # kept up to date by update()
+        ranking = self.rankings.get((name, guild_id))
+        if ranking is None:
+            data, score = self.boards[name]
+            ranking = GuildRanking()
+            for user_id, value in data.get(guild_id, {}).items():
+                ranking.set(user_id, score(value))
+            self.rankings[(name, guild_id)] = ranking
+        return ranking
+
+    def update(self, name, guild_id, *user_ids, watch=0):
+        # Returns True if a user inside the first `watch` positions changed
+        # at all (a shown field that isn't part of the score counts too) or a
+        # user moved into them, i.e. the top `watch` now reads differently
+        ranking = self.rankings.get((name, guild_id))
+        if ranking is None:
+            return False
+        data, score = self.boards[name]
+        guild = data.get(guild_id, {})
+        changed = False
+        for user_id in user_ids:
+            old_key = ranking.keys.get(user_id)
+            inside = watch and old_key is not None and ranking.order.rank(old_key) < watch
+            if user_id in guild:
+                ranking.set(user_id, score(guild[user_id]))
+            else:
+                ranking.discard(user_id)
+            if inside:
+                changed = True
+                continue
+            new_key = ranking.keys.get(user_id)
+            if new_key != old_key and watch and new_key is not None and ranking.order.rank(new_key) < watch:
+                changed = True
+        return changed
+
+    def drop(self, name, guild_id):
+        self.rankings.pop((name, guild_id), None)
+
+    def top(self, name, guild_id, n=10):
+        data, _ = self.boards[name]
+        guild = data.get(guild_id, {})
+        ranking = self._ranking(name, guild_id)
+        return [(user_id, guild[user_id]) for _, user_id in ranking.order.first(n)]
+
+    def position(self, name, guild_id, user_id):
+        # 1-based server position, or None if the user is not ranked
+        ranking = self._ranking(name, guild_id)
+        key = ranking.keys.get(user_id)
+        if key is None:
+            return None
+        return ranking.order.rank(key) + 1
@@ -0,0 +1,297 @@
+import asyncio
+import inspect
+import json
+import os
+import signal
+import time
+
+import discord
+import yarl
+from discord.gateway import DiscordWebSocket
+
+from storage import atomic_write
+
+# Process lifecycle: an ordered shutdown on SIGTERM/SIGINT, and resuming the
+# gateway session across the restart.
+#
+# Shutdown first closes the gateway, so nothing new comes in and the last
+# sequence number seen is the last event handled. It then waits for the
+# handlers still running and closes the components that need the HTTP
+# session (the outbound queue) while it is still open, closes the client,
+# and finally closes every other component in the order they were added,
+# which flushes them. The websocket is closed with a non-1000 code, which
+# keeps the session alive on Discord's side. Its id, sequence number and
+# resume URL are written to session_file with a snapshot of the guild
+# cache, but only once every component closed cleanly, so a saved session
+# always comes with the data it had seen.
+#
+# On the next start the first connection of each shard sends RESUME with
+# them instead of IDENTIFY, if the session is at most resume_max_age
+# seconds old. Discord replays what was missed since the sequence number
+# and skips READY, the GUILD_CREATE burst and guild_ready_timeout's wait
+# after it. A resumed session gets no guild list, so the snapshot is put in
+# the cache first and "ready" is dispatched once the shards resumed. If
+# Discord refuses the session, discord.py falls back to IDENTIFY by itself.
+#
+# discord.py has no public way to resume on the first connection, so
+# install() wraps DiscordWebSocket.from_client, the one place every shard's
+# connection (and reconnection) is made.
+
+
+def channel_payload(channel):
+    data = {
+        "id": channel.id,
+        "type": channel.type.value,
+        "name": channel.name,
+        "position": channel.position,
+        "parent_id": channel.category_id,
+        "nsfw": getattr(channel, "nsfw", False),
+        "topic": getattr(channel, "topic", None),
+        "rate_limit_per_user": getattr(channel, "slowmode_delay", 0),
+        "permission_overwrites": [],
+    }
+    if isinstance(channel, (discord.VoiceChannel, discord.StageChannel)):
+        data.update(bitrate=channel.bitrate, user_limit=channel.user_limit)
+    for target, overwrite in channel.overwrites.items():
+        allow, deny = overwrite.pair()
+        is_role = isinstance(target, discord.Role) or getattr(target, "type", None) is discord.Role
+        data["permission_overwrites"].append({"id": target.id, "type": 0 if is_role else 1, "allow": str(allow.value), "deny": str(deny.value)})
+    return data
+
+
+def guild_payload(guild):
+    # What GUILD_CREATE would have carried, as far as the cache keeps it
+    if guild.unavailable:
+        return {"id": guild.id, "unavailable": True}
+    data = {
+        "id": guild.id,
+        "name": guild.name,
+        "icon": guild.icon.key if guild.icon else None,
+        "owner_id": guild.owner_id,
+        "member_count": guild.member_count,
+        "features": list(guild.features),
+        "preferred_locale": str(guild.preferred_locale),
+        "roles": [
+            {
+                "id": role.id, "name": role.name, "permissions": str(role.permissions.value), "position": role.position,
+                "color": role.color.value, "hoist": role.hoist, "managed": role.managed, "mentionable": role.mentionable,
+            }
+            for role in guild.roles
+        ],
+        "channels": [channel_payload(channel) for channel in guild.channels],
+    }
+    me = guild.me
+    if me is not None:
+        data["members"] = [{
+            "user": {
+                "id": me.id, "username": me.name, "discriminator": me.discriminator, "global_name": me.global_name,
+                "avatar": me.avatar.key if me.avatar else None, "bot": True,
+            },
+            "roles": [role.id for role in me.roles if role.id != guild.id],
+            "joined_at": me.joined_at.isoformat() if me.joined_at else None,
+            "nick": me.nick,
+            "flags": me.flags.value,
+        }]
+    return data
+
+
+class Lifecycle:
+    def __init__(self, bot, session_file, drain=None, drain_timeout=10.0, resume_max_age=60.0):
+        self.bot = bot
+        self.session_file = session_file
+        # drain(timeout) waits for running handlers; returns False on timeout
+        self.drain = drain
+        self.drain_timeout = drain_timeout
+        self.resume_max_age = resume_max_age
+        # (name, close, flush_sync, needs_http) in shutdown order
+        self.components = []
+        self.closed = set()
+        self.failed = []
+        self.stopping = False
+        # shard -> the open socket, and the session captured at shutdown
+        self.sockets = {}
+        self.sessions = {}
+        self.guilds = []
+        # What the last run left to resume: shard -> session, and guilds
+        self.saved = {}
+        self.saved_guilds = []
+        self.saved_age = None
+        self.resuming = set()
+        self.resumed = 0
+        self.outcome = "identify"
+        self._closed_client = asyncio.Event()
+        self._shutdown_task = None
+        self._from_client = None
+
+    def add(self, name, close, flush_sync=None, needs_http=False):
+        # close() may be a plain function or a coroutine function
+        self.components.append((name, close, flush_sync, needs_http))
+
+    # ---------- gateway sessions ----------
+
+    def load(self):
+        # Reads the saved session once; a crash later must not resume it again
+        if not os.path.exists(self.session_file):
+            self.outcome = "identify (no saved session)"
+            return
+        try:
+            with open(self.session_file, 'r') as f:
+                data = json.load(f)
+        except ValueError:
+            data = {}
+        os.remove(self.session_file)
+        self.saved_age = time.time() - data.get("saved_at", 0)
+        if self.saved_age > self.resume_max_age:
+            self.outcome = f"identify (saved session {self.saved_age:.0f}s old)"
+            return
+        if data.get("shard_count") != self.bot.shard_count:
+            self.outcome = "identify (shard count changed)"
+            return
+        self.saved = data.get("sessions", {})
+        self.saved_guilds = data.get("guilds", [])
+
+    def install(self):
+        self.load()
+        original = DiscordWebSocket.from_client.__func__
+        lifecycle = self
+
+        async def from_client(cls, client, **kwargs):
+            if client is not lifecycle.bot:
+                return await original(cls, client, **kwargs)
+            return await lifecycle._connect(original, cls, client, kwargs)
+
+        self._from_client = DiscordWebSocket.from_client
+        DiscordWebSocket.from_client = classmethod(from_client)
+        self.bot.add_listener(self.on_resumed, "on_resumed")
+
+    def uninstall(self):
+        if self._from_client is not None:
+            DiscordWebSocket.from_client = self._from_client
+            self._from_client = None
+
+    async def _connect(self, original, cls, client, kwargs):
+        if self.stopping:
+            # No reconnecting during shutdown; this gives up once the client is closed
+            await self._closed_client.wait()
+            raise ConnectionError("Shutting down")
+        key = str(kwargs.get("shard_id"))
+        # Only a shard's first connection; discord.py resumes its own reconnects
+        saved = self.saved.pop(key, None)
+        if saved is not None:
+            self._restore_guilds(kwargs.get("shard_id"))
+            kwargs.update(
+                resume=True, session=saved["session_id"], sequence=saved["sequence"], gateway=yarl.URL(saved["gateway"]),
+            )
+            self.resuming.add(key)
+            self.outcome = "resume"
+        ws = await original(cls, client, **kwargs)
+        self.sockets[key] = ws
+        return ws
+
+    def _restore_guilds(self, shard_id):
+        # The guilds this shard had, straight into the cache READY would have filled
+        state = self.bot._connection
+        for data in self.saved_guilds:
+            if shard_id is None or (int(data["id"]) >> 22) % self.bot.shard_count == shard_id:
+                state._add_guild_from_data(data)
+
+    async def on_resumed(self):
+        # One per resumed shard; a refused RESUME identifies on the same
+        # socket and gets a normal READY instead
+        if not self.resuming:
+            return
+        self.resuming.pop()
+        self.resumed += 1
+        if self.resuming:
+            return
+        self.saved_guilds = []
+        # READY never comes for a resumed session; everything waiting on it
+        # (on_ready, wait_until_ready) goes ahead now
+        self.bot._ready.set()
+        self.bot.dispatch("ready")
+
+    def report(self):
+        if self.outcome == "resume" and not self.resumed:
+            return "🆕 Gateway session: identify (resume refused)"
+        if self.outcome == "resume":
+            return f"♻️ Gateway session resumed (saved {self.saved_age:.1f}s before start)"
+        return f"🆕 Gateway session: {self.outcome}"
+
+    # ---------- shutdown ----------
+
+    def install_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, self.request_shutdown, signum)
+            except NotImplementedError:
+                pass
+
+    def request_shutdown(self, signum=None):
+        if self._shutdown_task is None:
+            print(f"🛑 {signal.Signals(signum).name if signum else 'Shutdown requested'}: draining and saving...")
+            self._shutdown_task = asyncio.create_task(self.shutdown())
+        else:
+            # Asked twice: stop waiting for stragglers
+            print("🛑 Shutting down now")
+            asyncio.create_task(self.bot.close())
+
+    async def shutdown(self):
+        self.stopping = True
+        started = time.perf_counter()
+        for key, ws in list(self.sockets.items()):
+            if ws.open:
+                await ws.close(code=4000)
+            if ws.session_id is not None:
+                self.sessions[key] = {"session_id": ws.session_id, "sequence": ws.sequence, "gateway": str(ws.gateway)}
+        self.guilds = [guild_payload(guild) for guild in self.bot.guilds]
+
+        if self.drain is not None and not await self.drain(self.drain_timeout):
+            print(f"⚠️ Handlers still running after {self.drain_timeout:g}s; closing anyway")
+        for name, close, _, needs_http in self.components:
+            if needs_http:
+                await self._close(name, close)
+        await self.bot.close()
+        self._closed_client.set()
+        print(f"🛑 Gateway closed and work drained in {time.perf_counter() - started:.2f}s")
+
+    async def _close(self, name, close):
+        if name in self.closed:
+            return
+        self.closed.add(name)
+        try:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            self.failed.append(name)
+            print(f"❌ Failed to close {name}: {e}")
+
+    async def close(self):
+        # Everything not closed yet, in order; then the session, if it is safe to resume
+        if self._shutdown_task is not None:
+            await self._shutdown_task
+        for name, close, _, _ in self.components:
+            await self._close(name, close)
+        self._closed_client.set()
+        if not self.sessions:
+            return
+        if self.failed:
+            print(f"⚠️ Not saving the gateway session: {', '.join(self.failed)} did not close cleanly")
+            return
+        atomic_write(self.session_file, json.dumps({
+            "saved_at": time.time(),
+            "shard_count": self.bot.shard_count,
+            "sessions": self.sessions,
+            "guilds": self.guilds,
+        }))
+        print(f"💾 Saved gateway session for {len(self.sessions)} shard(s) and {len(self.guilds)} guild(s)")
+
+    def flush_sync(self):
+        # Last resort when the loop is gone: whatever can be saved without it
+        for name, _, flush_sync, _ in self.components:
+            if flush_sync is not None:
+                try:
+                    flush_sync()
+                except Exception as e:
+                    print(f"❌ Failed to save {name}: {e}")
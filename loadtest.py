@@ -0,0 +1,701 @@
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import os
+import queue
+import random
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+# End-to-end load test of the real bot against a local stand-in for Discord.
+# The stand-in serves the gateway websocket and the REST endpoints the bot
+# uses from its own thread and event loop, so its work is not billed to the
+# bot. discord.py is pointed at it, the bot is started through main() like in
+# production, and synthetic or recorded traffic is pushed through the gateway:
+#
+#   python loadtest.py                          synthetic message burst + commands
+#   python loadtest.py --replay gateway.jsonl   replay a recording
+#   python loadtest.py --restarts 5             time-to-ready of restarts
+#
+# Recordings come from running the bot with GATEWAY_RECORD_FILE set, which
+# appends every MESSAGE_CREATE and INTERACTION_CREATE it receives (message
+# content included) to that file.
+#
+# For every scenario it reports throughput, latency from dispatch until the
+# bot answers (the interaction callback, or on_message being reached) and
+# the REST calls made per event, with the busiest routes.
+#
+# --restarts runs the bot as a child process instead, stops it with SIGTERM
+# and starts it again, that many times with the saved gateway session
+# ignored (RESUME_MAX_AGE=0, so it identifies) and as many times resuming it.
+# Time-to-ready is from starting the process until it prints its startup
+# report, with discord.py's default wait for guilds after READY.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+DISCORD_EPOCH_MS = 1420070400000
+APPLICATION_ID = 900000000000000000
+BOT_USER_ID = 900000000000000001
+ADMIN_PERMISSIONS = str((1 << 41) - 1)
+
+
+# ==================== PAYLOADS ====================
+
+def iso_now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Snowflakes:
+    def __init__(self):
+        self.counter = itertools.count()
+
+    def __call__(self):
+        return (int(time.time() * 1000 - DISCORD_EPOCH_MS) << 22) | (next(self.counter) & 0x3FFFFF)
+
+
+def user_payload(user_id, bot=False):
+    return {"id": str(user_id), "username": f"user{user_id % 1000000}", "discriminator": "0",
+            "global_name": None, "avatar": None, "bot": bot}
+
+
+def partial_member_payload():
+    # A member without its user, as in mentions and resolved interaction data
+    return {"roles": [], "joined_at": iso_now(), "deaf": False, "mute": False, "flags": 0, "nick": None,
+            "avatar": None, "pending": False, "communication_disabled_until": None}
+
+
+def member_payload(user_id, permissions=None, bot=False):
+    member = partial_member_payload() | {"user": user_payload(user_id, bot=bot)}
+    if permissions is not None:
+        member["permissions"] = permissions
+    return member
+
+
+def channel_payload(channel_id, guild_id):
+    return {"id": str(channel_id), "type": 0, "guild_id": str(guild_id), "name": f"channel-{channel_id % 10000}",
+            "position": 0, "permission_overwrites": [], "nsfw": False, "parent_id": None, "topic": None,
+            "last_message_id": None, "rate_limit_per_user": 0}
+
+
+def guild_payload(guild_id, channel_ids, member_count):
+    return {
+        "id": str(guild_id), "name": f"guild-{guild_id % 10000}", "icon": None, "owner_id": str(BOT_USER_ID),
+        "member_count": member_count, "large": member_count > 250, "unavailable": False, "features": [],
+        "premium_tier": 0, "verification_level": 0, "default_message_notifications": 0,
+        "explicit_content_filter": 0, "mfa_level": 0, "nsfw_level": 0, "system_channel_flags": 0,
+        "preferred_locale": "en-US", "joined_at": iso_now(),
+        "roles": [{"id": str(guild_id), "name": "@everyone", "permissions": ADMIN_PERMISSIONS, "position": 0,
+                   "color": 0, "hoist": False, "managed": False, "mentionable": False, "flags": 0}],
+        "channels": [channel_payload(channel_id, guild_id) for channel_id in channel_ids],
+        "members": [member_payload(BOT_USER_ID, bot=True)],
+        "emojis": [], "stickers": [], "threads": [], "presences": [], "voice_states": [],
+        "stage_instances": [], "guild_scheduled_events": [], "soundboard_sounds": [],
+    }
+
+
+def message_payload(message_id, channel_id, guild_id, author, content, mentions=(), **extra):
+    payload = {
+        "id": str(message_id), "channel_id": str(channel_id), "author": author, "content": content,
+        "timestamp": iso_now(), "edited_timestamp": None, "tts": False, "mention_everyone": False,
+        "mentions": list(mentions), "mention_roles": [], "attachments": [], "embeds": [],
+        "pinned": False, "type": 0, "flags": 0, "components": [],
+    }
+    if guild_id is not None:
+        payload["guild_id"] = str(guild_id)
+    payload.update(extra)
+    return payload
+
+
+class Traffic:
+    # Synthetic gateway payloads over a fixed set of guilds and users with
+    # Zipf-like activity, like benchmark.py
+    def __init__(self, args):
+        self.random = random.Random(args.seed)
+        self.snowflake = Snowflakes()
+        self.guilds = [1_000_000_000_000_000 + i for i in range(args.guilds)]
+        self.channels = {guild_id: guild_id + 1 for guild_id in self.guilds}
+        self.users = [2_000_000_000_000_000 + i for i in range(args.users)]
+        self.user_weights = list(itertools.accumulate(1 / (rank + 1) ** args.user_skew for rank in range(args.users)))
+        self.mention_weights = list(itertools.accumulate(float(w) for w in args.mention_weights.split(",")))
+        self.member_count = args.users
+
+    def guild_creates(self):
+        return [guild_payload(guild_id, [self.channels[guild_id]], self.member_count) for guild_id in self.guilds]
+
+    def user(self):
+        return self.random.choices(self.users, cum_weights=self.user_weights)[0]
+
+    def message(self):
+        guild_id = self.random.choice(self.guilds)
+        count = self.random.choices(range(len(self.mention_weights)), cum_weights=self.mention_weights)[0]
+        mentions = [user_payload(self.user()) | {"member": partial_member_payload()} for _ in range(count)]
+        content = "hello " + " ".join(f"<@{mention['id']}>" for mention in mentions)
+        return message_payload(self.snowflake(), self.channels[guild_id], guild_id, user_payload(self.user()),
+                               content, mentions, member=partial_member_payload())
+
+    def interaction(self, name, options=()):
+        guild_id = self.random.choice(self.guilds)
+        channel_id = self.channels[guild_id]
+        user_id = self.user()
+        resolved = {"users": {}, "members": {}}
+        data_options = []
+        for option_name, option_type, value in options:
+            if option_type == 6:
+                resolved["users"][str(value)] = user_payload(value)
+                resolved["members"][str(value)] = partial_member_payload()
+                value = str(value)
+            data_options.append({"name": option_name, "type": option_type, "value": value})
+        interaction_id = self.snowflake()
+        return {
+            "id": str(interaction_id), "application_id": str(APPLICATION_ID), "type": 2,
+            "token": f"token-{interaction_id}", "version": 1, "guild_id": str(guild_id),
+            "channel_id": str(channel_id), "channel": channel_payload(channel_id, guild_id),
+            "member": member_payload(user_id, permissions=ADMIN_PERMISSIONS), "app_permissions": ADMIN_PERMISSIONS,
+            "locale": "en-US", "guild_locale": "en-US", "entitlements": [], "context": 0,
+            "attachment_size_limit": 10 * 1024 * 1024,
+            "authorizing_integration_owners": {"0": str(guild_id)},
+            "data": {"id": str(interaction_id), "name": name, "type": 1, "options": data_options,
+                     "resolved": resolved, "guild_id": str(guild_id)},
+        }
+
+
+# Scenario name -> options for each call, given the traffic generator
+COMMAND_SCENARIOS = {
+    "balance": lambda t: [],
+    "daily": lambda t: [],
+    "work": lambda t: [],
+    "deposit": lambda t: [("amount", 4, t.random.randint(1, 500))],
+    "withdraw": lambda t: [("amount", 4, t.random.randint(1, 500))],
+    "give": lambda t: [("member", 6, t.user()), ("amount", 4, t.random.randint(1, 100))],
+    "rob": lambda t: [("member", 6, t.user())],
+    "leaderboard": lambda t: [],
+    "rank": lambda t: [],
+    "levelleaderboard": lambda t: [],
+    "mentionleaderboard": lambda t: [],
+}
+
+
+# ==================== DISCORD STAND-IN ====================
+
+def json_response(data, status=200):
+    # discord.py only decodes bodies typed exactly "application/json",
+    # without the charset aiohttp's json_response adds
+    return web.Response(body=json.dumps(data).encode(), status=status, content_type="application/json")
+
+
+def route_of(path):
+    # /api/v10/channels/123/messages -> /channels/{id}/messages
+    path = re.sub(r"^/api/v\d+", "", path)
+    path = re.sub(r"/token-\d+", "/{token}", path)
+    return re.sub(r"/\d+", "/{id}", path)
+
+
+class StandIn:
+    def __init__(self, traffic):
+        self.traffic = traffic
+        self.snowflake = traffic.snowflake
+        self.port = None
+        self.loop = None
+        self.ws = None
+        self.sequence = 0
+        self.session_id = None
+        self.identified = 0
+        self.resumed = 0
+        self.connected = None
+        # REST calls of the running scenario, by route
+        self.rest = Counter()
+        # interaction id -> (command name, time dispatched, future set on callback)
+        self.interactions = {}
+        self.callbacks = defaultdict(list)
+        # interaction id -> command name, and the REST calls made through
+        # each interaction's callback or webhook token, by command
+        self.owners = {}
+        self.rest_by_command = defaultdict(Counter)
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="discord-stand-in", daemon=True)
+        self._runner = None
+
+    # ---------- thread plumbing ----------
+
+    def start(self):
+        self._thread.start()
+        self._started.wait()
+
+    def _serve(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.connected = asyncio.Event()
+        self.loop.run_until_complete(self._start_server())
+        self._started.set()
+        self.loop.run_forever()
+
+    async def _start_server(self):
+        app = web.Application()
+        app.router.add_get("/gateway", self.gateway)
+        app.router.add_get("/meme", self.meme)
+        app.router.add_route("*", "/api/{version}/{path:.*}", self.rest_call)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def call(self, coro):
+        # Runs coro on the stand-in loop; returns an awaitable for the caller's loop
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+    # ---------- gateway ----------
+
+    async def dispatch(self, event, data):
+        self.sequence += 1
+        await self.ws.send_str(json.dumps({"op": 0, "t": event, "s": self.sequence, "d": data}))
+
+    async def gateway(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        await ws.send_str(json.dumps({"op": 10, "d": {"heartbeat_interval": 41250}}))
+        async for msg in ws:
+            payload = json.loads(msg.data)
+            op = payload["op"]
+            if op == 1:
+                await ws.send_str(json.dumps({"op": 11}))
+            elif op == 2:
+                self.ws = ws
+                self.identified += 1
+                self.session_id = f"session-{self.snowflake()}"
+                guilds = self.traffic.guild_creates()
+                await self.dispatch("READY", {
+                    "v": 10, "user": user_payload(BOT_USER_ID, bot=True) | {"verified": True, "mfa_enabled": False},
+                    "guilds": [{"id": guild["id"], "unavailable": True} for guild in guilds],
+                    "session_id": self.session_id, "resume_gateway_url": f"ws://127.0.0.1:{self.port}/gateway",
+                    "application": {"id": str(APPLICATION_ID), "flags": 0}, "private_channels": [],
+                    "relationships": [], "presences": [], "shard": [0, 1],
+                })
+                for guild in guilds:
+                    await self.dispatch("GUILD_CREATE", guild)
+                self.connected.set()
+            elif op == 6:
+                if payload["d"]["session_id"] != self.session_id:
+                    # Unknown or expired session: the client has to identify
+                    await ws.send_str(json.dumps({"op": 9, "d": False}))
+                    continue
+                self.ws = ws
+                self.resumed += 1
+                await self.dispatch("RESUMED", {})
+                self.connected.set()
+        if self.ws is ws:
+            self.ws = None
+            self.connected.clear()
+        return ws
+
+    # ---------- REST ----------
+
+    async def meme(self, request):
+        return json_response({"title": "load test", "url": "https://example.com/meme.png", "ups": 1,
+                                  "subreddit": "loadtest", "postLink": "https://example.com", "nsfw": False})
+
+    async def rest_call(self, request):
+        route = route_of(request.path)
+        self.rest[f"{request.method} {route}"] += 1
+        owner = re.search(r"/interactions/(\d+)/|/token-(\d+)", request.path)
+        if owner is not None:
+            name = self.owners.get(int(owner.group(1) or owner.group(2)))
+            if name is not None:
+                self.rest_by_command[name][f"{request.method} {route}"] += 1
+        body = await request.json() if request.can_read_body and request.content_type == "application/json" else {}
+        parts = request.path.split("/")
+
+        if route == "/users/@me":
+            return json_response(user_payload(BOT_USER_ID, bot=True))
+        if route == "/oauth2/applications/@me":
+            return json_response({
+                "id": str(APPLICATION_ID), "name": "loadtest", "description": "", "icon": None,
+                "bot_public": False, "bot_require_code_grant": False, "owner": user_payload(BOT_USER_ID + 1),
+                "verify_key": "", "flags": 0, "summary": "",
+            })
+        if route == "/interactions/{id}/{token}/callback":
+            return json_response(self._callback(int(parts[-3]), body))
+        if route.startswith("/webhooks/"):
+            return json_response(self._message(None, body))
+        if route == "/channels/{id}/messages" and request.method == "POST":
+            return json_response(self._message(int(parts[-2]), body))
+        if route == "/channels/{id}/messages" and request.method == "GET":
+            return json_response([])
+        if route == "/channels/{id}/messages/{id}" and request.method == "PATCH":
+            return json_response(self._message(int(parts[-3]), body))
+        if route == "/users/{id}":
+            return json_response(user_payload(int(parts[-1])))
+        if route.startswith("/applications/") and request.method == "PUT":
+            return json_response([])
+        if request.method in ("PUT", "DELETE") or route.endswith("/bulk-delete"):
+            return web.Response(status=204)
+        return json_response({"message": f"{request.method} {route} is not emulated", "code": 0}, status=404)
+
+    def _message(self, channel_id, body):
+        return message_payload(
+            self.snowflake(), channel_id or 0, None, user_payload(BOT_USER_ID, bot=True),
+            body.get("content") or "", embeds=body.get("embeds") or [],
+        )
+
+    def _callback(self, interaction_id, body):
+        pending = self.interactions.pop(interaction_id, None)
+        if pending is not None:
+            name, sent_at, done = pending
+            self.callbacks[name].append(time.perf_counter() - sent_at)
+            done.set_result(None)
+        data = body.get("data") or {}
+        message = self._message(None, data)
+        return {
+            "interaction": {"id": str(interaction_id), "type": 2, "response_message_id": message["id"],
+                            "response_message_loading": body.get("type") == 5,
+                            "response_message_ephemeral": bool(data.get("flags", 0) & 64)},
+            "resource": {"type": body.get("type", 4), "message": message},
+        }
+
+    # ---------- scenarios (run on the stand-in loop) ----------
+
+    async def send_interaction(self, payload):
+        done = self.loop.create_future()
+        self.interactions[int(payload["id"])] = (payload["data"]["name"], time.perf_counter(), done)
+        self.owners[int(payload["id"])] = payload["data"]["name"]
+        await self.dispatch("INTERACTION_CREATE", payload)
+        return done
+
+
+class MessageProbe:
+    # Bot-side listener noting when each dispatched message reached on_message
+    def __init__(self):
+        self.sent = {}
+        self.latencies = []
+        self.ready = asyncio.Event()
+
+    async def on_ready(self):
+        self.ready.set()
+
+    async def on_message(self, message):
+        sent_at = self.sent.pop(message.id, None)
+        if sent_at is not None:
+            self.latencies.append(time.perf_counter() - sent_at)
+
+
+# ==================== MEASUREMENT ====================
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(name, events, seconds, latencies, rest):
+    return {
+        "scenario": name,
+        "events": events,
+        "per_sec": events / seconds if seconds else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "rest_per_event": sum(rest.values()) / events if events else 0.0,
+        "routes": dict(rest.most_common()),
+    }
+
+
+async def run_messages(stand_in, probe, count, timeout):
+    payloads = [stand_in.traffic.message() for _ in range(count)]
+    stand_in.rest.clear()
+    probe.latencies.clear()
+    started = time.perf_counter()
+    for payload in payloads:
+        probe.sent[int(payload["id"])] = time.perf_counter()
+        await stand_in.dispatch("MESSAGE_CREATE", payload)
+    deadline = time.monotonic() + timeout
+    while len(probe.latencies) < count and time.monotonic() < deadline:
+        await asyncio.sleep(0.001)
+    seconds = time.perf_counter() - started
+    return summarize("MESSAGE_CREATE", len(probe.latencies), seconds, probe.latencies, stand_in.rest)
+
+
+async def run_command(stand_in, name, count, concurrency, timeout):
+    traffic = stand_in.traffic
+    payloads = [traffic.interaction(name, COMMAND_SCENARIOS[name](traffic)) for _ in range(count)]
+    stand_in.rest.clear()
+    stand_in.callbacks[name].clear()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(payload):
+        async with semaphore:
+            done = await stand_in.send_interaction(payload)
+            try:
+                await asyncio.wait_for(done, timeout)
+            except asyncio.TimeoutError:
+                stand_in.interactions.pop(int(payload["id"]), None)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(payload) for payload in payloads))
+    seconds = time.perf_counter() - started
+    latencies = stand_in.callbacks[name]
+    return summarize(f"/{name}", len(latencies), seconds, latencies, stand_in.rest)
+
+
+async def run_replay(stand_in, probe, entries, speed, timeout):
+    stand_in.rest.clear()
+    probe.latencies.clear()
+    stand_in.callbacks.clear()
+    stand_in.rest_by_command.clear()
+    pending = []
+    messages = 0
+    started = time.perf_counter()
+    for offset, event, data in entries:
+        delay = started + offset / speed - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if event == "MESSAGE_CREATE":
+            probe.sent[int(data["id"])] = time.perf_counter()
+            messages += 1
+            await stand_in.dispatch(event, data)
+        else:
+            pending.append(await stand_in.send_interaction(data))
+    deadline = time.monotonic() + timeout
+    while len(probe.latencies) < messages and time.monotonic() < deadline:
+        await asyncio.sleep(0.001)
+    if pending:
+        await asyncio.wait(pending, timeout=max(0.0, deadline - time.monotonic()))
+    seconds = time.perf_counter() - started
+    latencies = list(probe.latencies) + [latency for samples in stand_in.callbacks.values() for latency in samples]
+    results = [summarize("replay", len(latencies), seconds, latencies, stand_in.rest)]
+    # Other calls can't be told apart under concurrent traffic, so these
+    # rows only count calls made through the interaction itself
+    for name, samples in sorted(stand_in.callbacks.items()):
+        results.append(summarize(f"  /{name}", len(samples), seconds, samples, stand_in.rest_by_command[name]))
+    return results
+
+
+def load_recording(filename, traffic):
+    # Rewrites the recording onto the stand-in: fresh interaction ids and
+    # tokens (so callbacks can be matched) and our application id, and
+    # makes the stand-in announce every guild and channel it mentions
+    entries = []
+    channels = defaultdict(set)
+    with open(filename, 'r') as f:
+        for line in f:
+            offset, event, data = json.loads(line)
+            if "guild_id" not in data:
+                continue
+            channels[int(data["guild_id"])].add(int(data["channel_id"]))
+            if event == "INTERACTION_CREATE":
+                interaction_id = traffic.snowflake()
+                data.update(id=str(interaction_id), token=f"token-{interaction_id}", application_id=str(APPLICATION_ID))
+            entries.append((offset, event, data))
+    if entries:
+        first = entries[0][0]
+        entries = [(offset - first, event, data) for offset, event, data in entries]
+    traffic.guilds = sorted(channels)
+    traffic.guild_creates = lambda: [
+        guild_payload(guild_id, sorted(channel_ids), traffic.member_count) for guild_id, channel_ids in channels.items()
+    ]
+    return entries
+
+
+async def drive(bot_module, stand_in, args):
+    bot = bot_module.bot
+    probe = MessageProbe()
+    bot.add_listener(probe.on_message)
+    bot.add_listener(probe.on_ready)
+    # All guilds arrive straight after READY; don't wait around for more
+    bot._connection.guild_ready_timeout = 0.1
+    started = time.perf_counter()
+    main_task = asyncio.create_task(bot_module.main())
+    ready = asyncio.create_task(probe.ready.wait())
+    await asyncio.wait([ready, main_task], return_when=asyncio.FIRST_COMPLETED)
+    if main_task.done():
+        # The bot gave up before READY; surface why
+        ready.cancel()
+        await main_task
+        raise RuntimeError("The bot stopped before it was ready")
+    print(f"🤖 Bot ready against the stand-in in {time.perf_counter() - started:.2f}s")
+
+    results = []
+    try:
+        if args.replay:
+            entries = load_recording(args.replay, stand_in.traffic)
+            results += await stand_in.call(run_replay(stand_in, probe, entries, args.speed, args.timeout))
+        else:
+            results.append(await stand_in.call(run_messages(stand_in, probe, args.messages, args.timeout)))
+            for name in args.scenarios.split(","):
+                results.append(await stand_in.call(run_command(stand_in, name, args.commands, args.concurrency, args.timeout)))
+    finally:
+        await bot.close()
+        await main_task
+    return results
+
+
+def run_restarts(stand_in, count, timeout):
+    # One cold start, then `count` restarts per mode; returns rows for print_restarts
+    def spawn(env):
+        child = subprocess.Popen(
+            [sys.executable, "-u", os.path.join(ROOT, "loadtest.py"), "--attach", str(stand_in.port)],
+            env=os.environ | {"PYTHONIOENCODING": "utf-8"} | env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        lines = queue.Queue()
+
+        def read():
+            for line in child.stdout:
+                lines.put(line)
+            lines.put(None)
+
+        threading.Thread(target=read, daemon=True).start()
+        return child, lines
+
+    def wait_ready(lines, started):
+        deadline = started + timeout
+        output = []
+        while True:
+            line = lines.get(timeout=max(deadline - time.perf_counter(), 0.01))
+            if line is None:
+                raise RuntimeError("The bot exited before it was ready:\n" + "".join(output[-20:]))
+            output.append(line)
+            if line.startswith("⏱️ Startup:"):
+                return time.perf_counter() - started
+
+    def stop(child):
+        started = time.perf_counter()
+        child.send_signal(signal.SIGTERM)
+        child.wait(timeout)
+        return time.perf_counter() - started
+
+    results = []
+    child, lines = spawn({})
+    wait_ready(lines, time.perf_counter())
+    for mode, env in (("identify", {"RESUME_MAX_AGE": "0"}), ("resume", {})):
+        identified, resumed = stand_in.identified, stand_in.resumed
+        ready, stopped = [], []
+        for _ in range(count):
+            stopped.append(stop(child))
+            started = time.perf_counter()
+            child, lines = spawn(env)
+            ready.append(wait_ready(lines, started))
+        results.append({
+            "mode": mode, "restarts": count, "identified": stand_in.identified - identified, "resumed": stand_in.resumed - resumed,
+            "ready_p50_s": percentile(ready, 0.5), "ready_max_s": max(ready), "shutdown_p50_s": percentile(stopped, 0.5),
+        })
+    stop(child)
+    return results
+
+
+def attach(port):
+    # --attach: the bot as a child process of --restarts, run like __main__ does
+    point_at(port)
+    bot_module = importlib.import_module("discord_mention_bot")
+    try:
+        asyncio.run(bot_module.main())
+    finally:
+        bot_module.lifecycle.flush_sync()
+
+
+# ==================== REPORTING ====================
+
+def print_report(results, routes=3):
+    columns = ("scenario", "events", "per_sec", "p50_ms", "p99_ms", "rest_per_event")
+    print("  ".join(f"{column:>20}" for column in columns))
+    for result in results:
+        row = []
+        for column in columns:
+            value = result[column]
+            row.append(f"{value:>20.2f}" if isinstance(value, float) else f"{value:>20}")
+        print("  ".join(row))
+        busiest = list(result["routes"].items())[:routes]
+        if busiest:
+            print(" " * 22 + " · ".join(f"{route} ×{count:,}" for route, count in busiest))
+
+
+def print_restarts(results):
+    columns = ("mode", "restarts", "identified", "resumed", "ready_p50_s", "ready_max_s", "shutdown_p50_s")
+    print("  ".join(f"{column:>16}" for column in columns))
+    for result in results:
+        print("  ".join(f"{result[column]:>16.2f}" if isinstance(result[column], float) else f"{result[column]:>16}" for column in columns))
+
+
+def point_at(port):
+    # Sends discord.py's REST and gateway traffic to the stand-in on port
+    import discord
+    import yarl
+    from discord.gateway import DiscordWebSocket
+    discord.http.Route.BASE = f"http://127.0.0.1:{port}/api/v10"
+    DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f"ws://127.0.0.1:{port}/gateway")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=5000, help="MESSAGE_CREATE events in the burst")
+    parser.add_argument("--commands", type=int, default=500, help="interactions per command scenario")
+    parser.add_argument("--scenarios", default=",".join(COMMAND_SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=20, help="interactions awaiting a response at once")
+    parser.add_argument("--guilds", type=int, default=10)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--user-skew", type=float, default=1.0, help="zipf exponent, 0 = uniform")
+    parser.add_argument("--mention-weights", default="0.8,0.15,0.05", help="odds of 0, 1, 2, ... mentions")
+    parser.add_argument("--replay", help="replay a GATEWAY_RECORD_FILE recording instead of synthetic traffic")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed-up factor")
+    parser.add_argument("--backend", default="partitioned", choices=("partitioned", "json", "sqlite"))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for stragglers")
+    parser.add_argument("--restarts", type=int, help="time this many restarts with and without resuming instead")
+    parser.add_argument("--attach", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+    if args.attach:
+        sys.path.insert(0, ROOT)
+        return attach(args.attach)
+
+    traffic = Traffic(args)
+    stand_in = StandIn(traffic)
+    stand_in.start()
+
+    # The bot keeps its data files in the working directory
+    output = os.path.abspath(args.output) if args.output else None
+    os.chdir(tempfile.mkdtemp(prefix="bot-loadtest-"))
+    os.environ.update(
+        DISCORD_TOKEN="loadtest",
+        STORAGE_BACKEND=args.backend,
+        COMMAND_SYNC="off",
+        METRICS_PORT="0",
+        MEME_API_URL=f"http://127.0.0.1:{stand_in.port}/meme",
+    )
+    sys.path.insert(0, ROOT)
+
+    if args.restarts:
+        try:
+            results = run_restarts(stand_in, args.restarts, args.timeout)
+        finally:
+            stand_in.stop()
+        print_restarts(results)
+    else:
+        point_at(stand_in.port)
+        bot_module = importlib.import_module("discord_mention_bot")
+        try:
+            results = asyncio.run(drive(bot_module, stand_in, args))
+        finally:
+            stand_in.stop()
+        print_report(results)
+    if output:
+        with open(output, 'w') as f:
+            json.dump({"created": time.time(), "args": vars(args), "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
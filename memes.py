@@ -0,0 +1,70 @@
+import asyncio
+from collections import deque
+
+import aiohttp
+
+
+class MemeFeed:
+    # Keeps a small ring buffer of ready-to-send memes and refills it in the
+    # background, so /meme normally answers from memory.
+    def __init__(self, pool, url, size=10, retry_delay=5):
+        self.pool = pool
+        self.url = url
+        self.buffer = deque(maxlen=size)
+        self.retry_delay = retry_delay
+        self.served_from_buffer = 0
+        self.served_cold = 0
+        self._wanted = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._refill())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def fetch(self):
+        # Returns a meme dict, or None if the upstream is unavailable
+        try:
+            async with self.pool.session.get(self.url) as response:
+                if response.status != 200:
+                    return None
+                data = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return None
+        if not all(key in data for key in ("title", "url", "ups", "subreddit")):
+            return None
+        return data
+
+    async def _refill(self):
+        while True:
+            while len(self.buffer) < self.buffer.maxlen:
+                data = await self.fetch()
+                if data is None:
+                    await asyncio.sleep(self.retry_delay)
+                    continue
+                self.buffer.append(data)
+            self._wanted.clear()
+            await self._wanted.wait()
+
+    def get_nowait(self):
+        # A buffered meme, or None if the buffer is empty
+        self._wanted.set()
+        if self.buffer:
+            self.served_from_buffer += 1
+            return self.buffer.popleft()
+        return None
+
+    async def get(self):
+        data = self.get_nowait()
+        if data is None:
+            self.served_cold += 1
+            data = await self.fetch()
+        return data
@@ -0,0 +1,229 @@
+import asyncio
+import functools
+import inspect
+import math
+import time
+
+from aiohttp import web
+from discord import app_commands
+
+# Runtime metrics. instrument() wraps every app command callback and event
+# listener with a timer, so handlers need no changes to be measured. The
+# numbers are shown by /botstats and served in the Prometheus text format on
+# a local port (GET /metrics).
+
+# Latency bucket upper bounds in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = 0
+        while index < len(BUCKETS) and value > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return BUCKETS[index] if index < len(BUCKETS) else math.inf
+        return math.inf
+
+
+class Metrics:
+    def __init__(self):
+        self.commands = {}
+        self.command_errors = {}
+        self.events = {}
+        self.event_errors = {}
+        self.flushes = {}
+        self.flush_bytes = {}
+        self.loop_lag = Histogram()
+        self.last_loop_lag = 0.0
+        # name -> zero-argument callable returning {stat: number}; used for
+        # counters owned by other subsystems (caches, queues, ...)
+        self.sources = {}
+        self.bot = None
+        # Optional profiling.SlowHandlerTracer told about every handler run
+        self.tracer = None
+        # Handlers running right now; drain() waits for this to reach zero
+        self.in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks = []
+        self._runner = None
+
+    # ---------- recording ----------
+
+    def observe_command(self, name, seconds, failed):
+        self.commands.setdefault(name, Histogram()).observe(seconds)
+        if failed:
+            self.command_errors[name] = self.command_errors.get(name, 0) + 1
+
+    def observe_event(self, name, seconds, failed):
+        self.events.setdefault(name, Histogram()).observe(seconds)
+        if failed:
+            self.event_errors[name] = self.event_errors.get(name, 0) + 1
+
+    def observe_flush(self, name, written, seconds):
+        self.flushes.setdefault(name, Histogram()).observe(seconds)
+        self.flush_bytes[name] = self.flush_bytes.get(name, 0) + written
+
+    def add_source(self, name, source):
+        self.sources[name] = source
+
+    # ---------- instrumentation ----------
+
+    def _timed(self, func, name, observe, label):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            failed = False
+            token = self.tracer.begin(label, args) if self.tracer is not None else None
+            self.in_flight += 1
+            self._idle.clear()
+            try:
+                return await func(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                self.in_flight -= 1
+                if not self.in_flight:
+                    self._idle.set()
+                observe(name, time.perf_counter() - started, failed)
+                if token is not None:
+                    self.tracer.end(token)
+
+        wrapper.__instrumented__ = True
+        return wrapper
+
+    def instrument(self, bot):
+        # Wraps every app command and event listener registered so far. Safe
+        # to call again after more commands are added.
+        self.bot = bot
+        for command in bot.tree.walk_commands():
+            if isinstance(command, app_commands.Command) and not getattr(command._callback, "__instrumented__", False):
+                command._callback = self._timed(
+                    command._callback, command.qualified_name, self.observe_command, f"/{command.qualified_name}")
+
+        for attribute, handler in list(vars(bot).items()):
+            if attribute.startswith("on_") and inspect.iscoroutinefunction(handler) \
+                    and not getattr(handler, "__instrumented__", False):
+                setattr(bot, attribute, self._timed(handler, attribute[3:], self.observe_event, attribute))
+
+        for event, listeners in bot.extra_events.items():
+            listeners[:] = [
+                listener if getattr(listener, "__instrumented__", False)
+                else self._timed(listener, event[3:], self.observe_event, f"{event} ({listener.__name__})")
+                for listener in listeners
+            ]
+
+    async def _watch_loop_lag(self, interval=0.5):
+        # How late the loop wakes us up is how long something else blocked it
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.perf_counter() - started - interval)
+            self.last_loop_lag = lag
+            self.loop_lag.observe(lag)
+
+    # ---------- exposition ----------
+
+    def gateway_latency(self):
+        if self.bot is None or math.isnan(self.bot.latency) or math.isinf(self.bot.latency):
+            return None
+        return self.bot.latency
+
+    def render_prometheus(self):
+        lines = []
+
+        def histogram(metric, help_text, label, histograms):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, hist in sorted(histograms.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), hist.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{label}="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {hist.sum}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {hist.count}')
+
+        def counter(metric, help_text, label, values):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, value in sorted(values.items()):
+                lines.append(f'{metric}{{{label}="{name}"}} {value}')
+
+        histogram("bot_command_latency_seconds", "App command handler latency.", "command", self.commands)
+        counter("bot_command_errors_total", "App command handler errors.", "command", self.command_errors)
+        histogram("bot_event_latency_seconds", "Event listener latency.", "event", self.events)
+        counter("bot_event_errors_total", "Event listener errors.", "event", self.event_errors)
+        histogram("bot_storage_flush_seconds", "Time spent writing each storage flush.", "collection", self.flushes)
+        counter("bot_storage_flush_bytes_total", "Bytes written by storage flushes.", "collection", self.flush_bytes)
+
+        lines.append("# HELP bot_event_loop_lag_seconds Event loop scheduling delay.")
+        lines.append("# TYPE bot_event_loop_lag_seconds histogram")
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), self.loop_lag.counts):
+            cumulative += count
+            lines.append(f'bot_event_loop_lag_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"bot_event_loop_lag_seconds_sum {self.loop_lag.sum}")
+        lines.append(f"bot_event_loop_lag_seconds_count {self.loop_lag.count}")
+
+        latency = self.gateway_latency()
+        if latency is not None:
+            lines.append("# HELP bot_gateway_latency_seconds Gateway heartbeat latency.")
+            lines.append("# TYPE bot_gateway_latency_seconds gauge")
+            lines.append(f"bot_gateway_latency_seconds {latency}")
+
+        for source_name, source in sorted(self.sources.items()):
+            for stat, value in sorted(source().items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"bot_{source_name}_{stat} {value}")
+        return "\n".join(lines) + "\n"
+
+    async def _handle_metrics(self, request):
+        return web.Response(text=self.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    # ---------- lifecycle ----------
+
+    async def start(self, port=None, host="127.0.0.1"):
+        self._tasks.append(asyncio.create_task(self._watch_loop_lag()))
+        if port:
+            app = web.Application()
+            app.router.add_get("/metrics", self._handle_metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, host, port).start()
+
+    async def drain(self, timeout):
+        # Waits for running handlers to finish; False if some still run after timeout
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,76 @@
+# Compact in-memory records. Each record is a __slots__ object instead of a
+# dict, but still supports record["field"] access so code written against
+# the old dict layout keeps working. Guild and user ids are int keys in
+# memory and only become strings in the JSON files.
+
+
+class Record:
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def to_json(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(**{field: data[field] for field in cls.__slots__})
+
+
+class EconomyRecord(Record):
+    __slots__ = ("balance", "bank")
+
+    def __init__(self, balance=1000, bank=0):
+        self.balance = balance
+        self.bank = bank
+
+
+class LevelRecord(Record):
+    __slots__ = ("xp", "level", "messages")
+
+    def __init__(self, xp=0, level=1, messages=0):
+        self.xp = xp
+        self.level = level
+        self.messages = messages
+
+
+# Collections whose per-user values are records; the rest keep plain values
+RECORD_TYPES = {
+    "economy": EconomyRecord,
+    "levels": LevelRecord,
+}
+
+
+def decode_guild(name, guild):
+    # {"user id": value} from JSON -> {user_id: record}
+    record_type = RECORD_TYPES.get(name)
+    if record_type is None:
+        return {int(user_id): value for user_id, value in guild.items()}
+    return {int(user_id): record_type.from_json(value) for user_id, value in guild.items()}
+
+
+def encode_record(value):
+    # json.dumps default= hook
+    if isinstance(value, Record):
+        return value.to_json()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
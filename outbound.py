@@ -0,0 +1,164 @@
+import asyncio
+import collections
+import time
+
+import discord
+
+# Outbound REST calls that nobody needs to wait for: level-up announcements,
+# poll reactions and the like. Each bucket (e.g. messages to one channel) is
+# sent in order by its own worker, so one slow or rate-limited channel never
+# holds up the event handlers or the other channels. discord.py already waits
+# on the X-RateLimit-* headers of successful calls; when a 429 still gets
+# through, the bucket pauses for the Retry-After the response asked for.
+
+
+class Bucket:
+    __slots__ = ("jobs", "task", "paused_until")
+
+    def __init__(self):
+        self.jobs = collections.deque()
+        self.task = None
+        self.paused_until = 0.0
+
+
+class OutboundQueue:
+    def __init__(self, max_pending=100, max_concurrency=20, coalesce_window=2.0, max_retries=3):
+        self.max_pending = max_pending
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self.buckets = {}
+        # key -> list of items waiting to be merged into one call
+        self.batches = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._closing = False
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self.coalesced = 0
+
+    def depth(self):
+        return sum(len(bucket.jobs) for bucket in self.buckets.values()) + len(self.batches)
+
+    def stats(self):
+        return {
+            "depth": self.depth(),
+            "buckets": len(self.buckets),
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "rate_limited": self.rate_limited,
+            "coalesced": self.coalesced,
+        }
+
+    def submit(self, key, make_call):
+        # make_call() returns the coroutine to run. Returns False if the job
+        # was dropped because the bucket is full or the queue is shutting down.
+        if self._closing:
+            self.dropped += 1
+            return False
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = Bucket()
+        if len(bucket.jobs) >= self.max_pending:
+            # Shed the oldest: it is the most out of date by now
+            bucket.jobs.popleft()
+            self.dropped += 1
+        bucket.jobs.append(make_call)
+        if bucket.task is None:
+            self._idle.clear()
+            bucket.task = asyncio.create_task(self._drain(key, bucket))
+        return True
+
+    def coalesce(self, key, item, render):
+        # Items submitted under the same key within coalesce_window are passed
+        # together to render(items), which returns the coroutine to run.
+        if self._closing:
+            self.dropped += 1
+            return
+        batch = self.batches.get(key)
+        if batch is not None:
+            batch.append(item)
+            self.coalesced += 1
+            return
+        self.batches[key] = [item]
+        self._idle.clear()
+        asyncio.get_running_loop().call_later(self.coalesce_window, self._release, key, render)
+
+    def _release(self, key, render):
+        items = self.batches.pop(key)
+        # Force the submit through so a merged batch isn't lost mid-shutdown
+        closing, self._closing = self._closing, False
+        try:
+            self.submit(key, lambda: render(items))
+        finally:
+            self._closing = closing
+        self._check_idle()
+
+    def send(self, channel, *args, **kwargs):
+        return self.submit(("messages", channel.id), lambda: channel.send(*args, **kwargs))
+
+    def add_reactions(self, message, emojis):
+        # Reactions have their own, much tighter, rate limit bucket
+        key = ("reactions", message.channel.id)
+        for emoji in emojis:
+            self.submit(key, lambda emoji=emoji: message.add_reaction(emoji))
+
+    async def _drain(self, key, bucket):
+        try:
+            while bucket.jobs:
+                make_call = bucket.jobs.popleft()
+                for attempt in range(self.max_retries + 1):
+                    delay = bucket.paused_until - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    try:
+                        async with self._semaphore:
+                            await make_call()
+                        self.sent += 1
+                        break
+                    except discord.HTTPException as e:
+                        if e.status != 429 or attempt == self.max_retries:
+                            print(f"❌ Outbound call failed ({key[0]}): {e}")
+                            self.failed += 1
+                            break
+                        self.rate_limited += 1
+                        bucket.paused_until = time.monotonic() + retry_after(e)
+                    except Exception as e:
+                        print(f"❌ Outbound call failed ({key[0]}): {e}")
+                        self.failed += 1
+                        break
+        finally:
+            bucket.task = None
+            if not bucket.jobs:
+                del self.buckets[key]
+            self._check_idle()
+
+    def _check_idle(self):
+        if not self.buckets and not self.batches:
+            self._idle.set()
+
+    async def close(self, timeout=10):
+        # Stop accepting work and give what is queued a chance to go out
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pending = self.depth()
+            for bucket in list(self.buckets.values()):
+                if bucket.task is not None:
+                    bucket.task.cancel()
+            self.dropped += pending
+            print(f"⚠️ Dropped {pending} outbound call(s) that did not go out in time")
+
+
+def retry_after(error, default=1.0):
+    headers = getattr(error.response, "headers", None) or {}
+    for header in ("Retry-After", "X-RateLimit-Reset-After"):
+        try:
+            return float(headers[header])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return default
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import os
+import time
+
+from storage import atomic_write
+
+# Reaction polls tallied in memory from raw reaction events, so reading the
+# results never has to fetch the message or its reactions. Each user has at
+# most one vote per poll: reacting with another option moves the vote, and
+# removing a reaction only takes the vote away if it is still the one that
+# counts. The polls are snapshotted to a JSON file every flush_interval
+# seconds while something changed, and forgotten `retention` seconds after
+# they were created.
+
+OPTION_EMOJIS = ("1️⃣", "2️⃣", "3️⃣", "4️⃣")
+
+
+class Poll:
+    __slots__ = ("message_id", "channel_id", "guild_id", "question", "options", "created_at", "closes_at", "closed", "votes")
+
+    def __init__(self, message_id, channel_id, guild_id, question, options, created_at, closes_at=None, closed=False, votes=None):
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.question = question
+        self.options = options
+        self.created_at = created_at
+        self.closes_at = closes_at
+        self.closed = closed
+        # user_id -> option index
+        self.votes = votes if votes is not None else {}
+
+    def tally(self):
+        counts = [0] * len(self.options)
+        for option in self.votes.values():
+            counts[option] += 1
+        return counts
+
+    def to_json(self):
+        return {
+            "channel_id": self.channel_id,
+            "guild_id": self.guild_id,
+            "question": self.question,
+            "options": self.options,
+            "created_at": self.created_at,
+            "closes_at": self.closes_at,
+            "closed": self.closed,
+            "votes": {str(user_id): option for user_id, option in self.votes.items()},
+        }
+
+    @classmethod
+    def from_json(cls, message_id, data):
+        votes = {int(user_id): option for user_id, option in data["votes"].items()}
+        return cls(
+            message_id, data["channel_id"], data["guild_id"], data["question"], data["options"],
+            data["created_at"], data["closes_at"], data["closed"], votes,
+        )
+
+
+class PollStore:
+    def __init__(self, filename, flush_interval=30.0, retention=30 * 86400):
+        self.filename = filename
+        self.flush_interval = flush_interval
+        self.retention = retention
+        # message_id -> Poll, oldest first
+        self.polls = {}
+        # channel_id -> message_id of the newest poll posted there
+        self.latest = {}
+        self.votes_counted = 0
+        self.votes_ignored = 0
+        self.dirty = False
+        self._task = None
+        self._io_lock = asyncio.Lock()
+        self._load()
+
+    def create(self, message_id, channel_id, guild_id, question, options, closes_at=None):
+        poll = Poll(message_id, channel_id, guild_id, question, list(options), time.time(), closes_at)
+        self.polls[message_id] = poll
+        self.latest[channel_id] = message_id
+        self.dirty = True
+        return poll
+
+    def get(self, message_id):
+        return self.polls.get(message_id)
+
+    def latest_in(self, channel_id):
+        return self.polls.get(self.latest.get(channel_id))
+
+    def vote(self, message_id, user_id, emoji):
+        # Returns the option index the user voted for before, if this moved
+        # their vote, so the caller can take the old reaction away; otherwise None
+        poll = self.polls.get(message_id)
+        if poll is None:
+            return None
+        if poll.closed or emoji not in OPTION_EMOJIS[:len(poll.options)]:
+            self.votes_ignored += 1
+            return None
+        option = OPTION_EMOJIS.index(emoji)
+        previous = poll.votes.get(user_id)
+        if previous == option:
+            return None
+        poll.votes[user_id] = option
+        self.votes_counted += 1
+        self.dirty = True
+        return previous
+
+    def unvote(self, message_id, user_id, emoji):
+        poll = self.polls.get(message_id)
+        if poll is None or poll.closed or emoji not in OPTION_EMOJIS[:len(poll.options)]:
+            return
+        # Removing a reaction we moved away from leaves the current vote alone
+        if poll.votes.get(user_id) == OPTION_EMOJIS.index(emoji):
+            del poll.votes[user_id]
+            self.dirty = True
+
+    def end(self, message_id):
+        # Closes the poll to voting; returns it if it was still open
+        poll = self.polls.get(message_id)
+        if poll is None or poll.closed:
+            return None
+        poll.closed = True
+        self.dirty = True
+        return poll
+
+    def prune(self, now=None):
+        cutoff = (now or time.time()) - self.retention
+        while self.polls:
+            message_id, poll = next(iter(self.polls.items()))
+            if poll.created_at >= cutoff:
+                break
+            del self.polls[message_id]
+            if self.latest.get(poll.channel_id) == message_id:
+                del self.latest[poll.channel_id]
+            self.dirty = True
+
+    def stats(self):
+        return {
+            "polls": len(self.polls),
+            "open": sum(1 for poll in self.polls.values() if not poll.closed),
+            "votes_counted": self.votes_counted,
+            "votes_ignored": self.votes_ignored,
+        }
+
+    # ---------- persistence ----------
+
+    def _load(self):
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, 'r') as f:
+            data = json.load(f)
+        for message_id, entry in sorted(data.items(), key=lambda item: item[1]["created_at"]):
+            poll = Poll.from_json(int(message_id), entry)
+            self.polls[poll.message_id] = poll
+            self.latest[poll.channel_id] = poll.message_id
+        self.prune()
+
+    def _serialize(self):
+        return json.dumps({str(message_id): poll.to_json() for message_id, poll in self.polls.items()})
+
+    async def flush(self):
+        async with self._io_lock:
+            self.prune()
+            if not self.dirty:
+                return
+            self.dirty = False
+            text = self._serialize()
+            try:
+                await asyncio.to_thread(atomic_write, self.filename, text)
+            except BaseException:
+                self.dirty = True
+                raise
+
+    def flush_sync(self):
+        if self.dirty:
+            atomic_write(self.filename, self._serialize())
+            self.dirty = False
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Failed to save polls: {e}")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -0,0 +1,267 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from collections import Counter
+
+# Diagnostics that can be switched on in a running process.
+#
+# SlowHandlerTracer reports handlers (app commands and event listeners, via
+# metrics.instrument) that run longer than a threshold, with their name,
+# guild and stack. A handler that keeps awaiting past the threshold is
+# reported from a loop timer with the chain of awaits it is stuck in. A
+# handler that blocks the loop can't be seen from inside it, so a watchdog
+# thread checks that the loop keeps ticking and, when it doesn't, reports the
+# loop thread's current stack and the handler running on it.
+#
+# sample_cpu() and trace_memory() capture a profile for a fixed number of
+# seconds and write it under a directory: CPU as sampled stacks of the loop
+# thread (folded, one "frame;frame;frame count" line per stack, the input
+# format of flamegraph tools) plus a summary, memory as a tracemalloc
+# snapshot of what was allocated in the window plus a summary.
+
+
+def guild_of(args):
+    # Best-effort guild id from a handler's arguments (interaction, message,
+    # raw event payload, ...)
+    for arg in args:
+        guild_id = getattr(arg, "guild_id", None)
+        if guild_id is None:
+            guild = getattr(arg, "guild", None)
+            guild_id = getattr(guild, "id", None)
+        if guild_id is not None:
+            return guild_id
+    return None
+
+
+def await_stack(coro):
+    # Frames of a suspended coroutine and everything it is awaiting, outermost
+    # first; Task.get_stack() only returns the outermost one
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append((frame, frame.f_lineno))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return traceback.StackSummary.extract(frames)
+
+
+def loop_stack(frame):
+    # Stack of the loop thread from the callback the loop is running, leaving
+    # out asyncio's own run_forever/_run_once frames above it
+    frames = []
+    while frame is not None:
+        if frame.f_code is asyncio.Handle._run.__code__:
+            break
+        frames.append((frame, frame.f_lineno))
+        frame = frame.f_back
+    return traceback.StackSummary.extract(reversed(frames))
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class SlowHandlerTracer:
+    def __init__(self, threshold=0.1, check_interval=None):
+        self.threshold = threshold
+        self.check_interval = check_interval or max(threshold / 4, 0.005)
+        self.enabled = False
+        self.reported = 0
+        # task -> (label, guild_id, started) of the handler it is running
+        self.running = {}
+        self._loop = None
+        self._loop_thread = None
+        self._heartbeat = 0.0
+        self._stop = threading.Event()
+        self._watchdog = None
+        self._ticker = None
+
+    # ---------- toggling ----------
+
+    def enable(self, threshold=None):
+        if threshold is not None:
+            self.threshold = threshold
+            self.check_interval = max(threshold / 4, 0.005)
+        if self.enabled:
+            return
+        self.enabled = True
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._ticker = asyncio.create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="slow-handler-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._stop.set()
+        self._ticker.cancel()
+        self._watchdog.join()
+        self.running.clear()
+
+    # ---------- handler hooks (called by metrics) ----------
+
+    def begin(self, label, args):
+        # Returns a token for end(), or None when tracing is off
+        if not self.enabled:
+            return None
+        task = asyncio.current_task()
+        previous = self.running.get(task)
+        self.running[task] = (label, guild_of(args), time.monotonic())
+        timer = self._loop.call_later(self.threshold, self._report_waiting, task)
+        return task, timer, previous
+
+    def end(self, token):
+        if token is None:
+            return
+        task, timer, previous = token
+        timer.cancel()
+        # A handler awaited from another one (e.g. an event listener calling
+        # a helper command) hands the task back to its caller
+        if previous is None:
+            self.running.pop(task, None)
+        else:
+            self.running[task] = previous
+
+    # ---------- detection ----------
+
+    def _describe(self, task):
+        entry = self.running.get(task)
+        if entry is None:
+            return f"task {task.get_name()}" if task is not None else "a loop callback"
+        label, guild_id, started = entry
+        where = f" in guild {guild_id}" if guild_id is not None else ""
+        return f"{label}{where} after {time.monotonic() - started:.3f}s"
+
+    def _report_waiting(self, task):
+        if task not in self.running or task.done():
+            return
+        self.reported += 1
+        stack = "".join(traceback.format_list(await_stack(task.get_coro())))
+        print(f"🐢 Slow handler: {self._describe(task)} (threshold {self.threshold * 1000:.0f}ms), waiting at:\n{stack}", end="")
+
+    async def _tick(self):
+        while True:
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.check_interval)
+
+    def _watch(self):
+        reported_at = None
+        while not self._stop.wait(self.check_interval):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.check_interval
+            if blocked < self.threshold or reported_at == heartbeat:
+                continue
+            # Report each stall once, from inside it
+            reported_at = heartbeat
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            task = asyncio.tasks._current_tasks.get(self._loop)
+            self.reported += 1
+            stack = "".join(traceback.format_list(loop_stack(frame)))
+            print(f"🐢 Event loop blocked for {blocked * 1000:.0f}ms by {self._describe(task)}, at:\n{stack}", end="")
+
+    def status(self):
+        return {"enabled": self.enabled, "threshold": self.threshold, "reported": self.reported, "running": len(self.running)}
+
+
+# ==================== CAPTURES ====================
+
+def _sample_thread(thread_id, seconds, interval):
+    # Runs on a helper thread: folded stacks of thread_id -> sample count
+    samples = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame))
+                frame = frame.f_back
+            samples[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return samples
+
+
+def _cpu_summary(samples, top):
+    # Self and inclusive sample counts per function, from the folded stacks
+    total = sum(samples.values())
+    own = Counter()
+    inclusive = Counter()
+    for stack, count in samples.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for frame in set(frames):
+            inclusive[frame] += count
+    lines = [f"{total} samples"]
+    for title, counter in (("Self", own), ("Inclusive", inclusive)):
+        lines.append(f"\n{title}:")
+        for frame, count in counter.most_common(top):
+            lines.append(f"{count / total:7.1%}  {frame}")
+    return "\n".join(lines) + "\n", own.most_common(top)
+
+
+async def sample_cpu(directory, seconds, interval=0.005, top=25):
+    # Samples the event loop thread's stack every `interval` seconds for
+    # `seconds`. Returns (folded stacks path, summary path, [(frame, samples)])
+    loop_thread = threading.get_ident()
+    samples = await asyncio.to_thread(_sample_thread, loop_thread, seconds, interval)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    folded = os.path.join(directory, f"cpu-{stamp}.folded")
+    summary_file = os.path.join(directory, f"cpu-{stamp}.txt")
+    summary, hottest = _cpu_summary(samples, top) if samples else ("0 samples\n", [])
+
+    def write():
+        os.makedirs(directory, exist_ok=True)
+        with open(folded, 'w') as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in samples.most_common())
+        with open(summary_file, 'w') as f:
+            f.write(summary)
+
+    await asyncio.to_thread(write)
+    return folded, summary_file, [(frame, count / sum(samples.values())) for frame, count in hottest]
+
+
+async def trace_memory(directory, seconds, frames=10, top=25):
+    # Traces allocations for `seconds` and snapshots what is still alive.
+    # Returns (snapshot path, summary path, [(location, bytes)])
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(frames)
+    try:
+        await asyncio.sleep(seconds)
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    stats = snapshot.statistics("lineno")
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    dump = os.path.join(directory, f"memory-{stamp}.tracemalloc")
+    summary_file = os.path.join(directory, f"memory-{stamp}.txt")
+    total = sum(stat.size for stat in stats)
+    summary = f"{total / 1024:.1f} KiB in {sum(stat.count for stat in stats)} blocks allocated in the last {seconds}s and still alive\n\n"
+    summary += "".join(f"{stat}\n" for stat in stats[:top])
+
+    def write():
+        os.makedirs(directory, exist_ok=True)
+        # Load with tracemalloc.Snapshot.load() to compare or group differently
+        snapshot.dump(dump)
+        with open(summary_file, 'w') as f:
+            f.write(summary)
+
+    await asyncio.to_thread(write)
+    return dump, summary_file, [(str(stat.traceback[0]), stat.size) for stat in stats[:top]]
@@ -0,0 +1,180 @@
+import asyncio
+import time
+
+import discord
+
+# Channel purges over raw message payloads. History is read newest first in
+# pages of 100 using the oldest id seen as the next `before` cursor, with the
+# next page fetched while the current one is being deleted. Matching messages
+# younger than 14 days are bulk deleted 100 at a time; older ones can only be
+# deleted one by one, so they go to a worker that spaces those calls out
+# while the scan carries on.
+
+DISCORD_EPOCH_MS = 1420070400000
+PAGE_SIZE = 100
+BULK_MAX = 100
+# Bulk delete rejects messages older than 14 days; leave a minute of slack
+# for the time a purge takes and for clock skew
+BULK_MAX_AGE = 14 * 86400 - 60
+
+
+def time_snowflake(seconds):
+    return int(seconds * 1000 - DISCORD_EPOCH_MS) << 22
+
+
+class PurgeJob:
+    def __init__(self, http, channel_id, limit, check, before, after=None, scan_limit=10000,
+                 single_delete_interval=1.0, on_progress=None, progress_interval=2.0):
+        # check(payload) decides which raw message payloads are deleted;
+        # before/after are exclusive snowflake bounds
+        self.http = http
+        self.channel_id = channel_id
+        self.limit = limit
+        self.check = check
+        self.before = before
+        self.after = after or 0
+        self.scan_limit = scan_limit
+        self.single_delete_interval = single_delete_interval
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self.scanned = 0
+        self.matched = 0
+        self.bulk_deleted = 0
+        self.single_deleted = 0
+        self.failed = 0
+        self.done = False
+        self.error = None
+        self.started = None
+        self._singles = asyncio.Queue()
+        self._last_progress = 0.0
+        self._progress_task = None
+
+    @property
+    def deleted(self):
+        return self.bulk_deleted + self.single_deleted
+
+    @property
+    def pending_singles(self):
+        return self._singles.qsize()
+
+    async def _pages(self, pages):
+        # Producer: puts each page of payloads, then None once history (or
+        # the bounds, or the scan limit) runs out
+        cursor = self.before
+        scanned = 0
+        try:
+            while scanned < self.scan_limit:
+                page = await self.http.logs_from(self.channel_id, min(PAGE_SIZE, self.scan_limit - scanned), before=cursor)
+                inside = [payload for payload in page if int(payload["id"]) > self.after]
+                if inside:
+                    await pages.put(inside)
+                scanned += len(page)
+                if len(inside) < len(page) or len(page) < PAGE_SIZE:
+                    break
+                cursor = int(page[-1]["id"])
+        except discord.HTTPException as e:
+            self.error = e
+        await pages.put(None)
+
+    async def _single_worker(self):
+        while True:
+            message_id = await self._singles.get()
+            if message_id is None:
+                return
+            try:
+                await self.http.delete_message(self.channel_id, message_id)
+                self.single_deleted += 1
+            except discord.NotFound:
+                pass
+            except discord.HTTPException:
+                self.failed += 1
+            self._report()
+            await asyncio.sleep(self.single_delete_interval)
+
+    async def _bulk_delete(self, message_ids):
+        try:
+            if len(message_ids) == 1:
+                await self.http.delete_message(self.channel_id, message_ids[0])
+            else:
+                await self.http.delete_messages(self.channel_id, message_ids)
+            self.bulk_deleted += len(message_ids)
+        except discord.Forbidden:
+            raise
+        except discord.HTTPException:
+            # One bad id (e.g. deleted meanwhile) fails the whole batch; let
+            # the single-delete path sort them out
+            for message_id in message_ids:
+                self._singles.put_nowait(message_id)
+        self._report()
+
+    def _report(self):
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        if now - self._last_progress < self.progress_interval:
+            return
+        # Never queue edits behind a slow one
+        if self._progress_task is not None and not self._progress_task.done():
+            return
+        self._last_progress = now
+        self._progress_task = asyncio.create_task(self.on_progress(self))
+
+    async def run(self):
+        self.started = time.monotonic()
+        # One page of lookahead: enough to overlap fetching with deleting
+        pages = asyncio.Queue(maxsize=1)
+        producer = asyncio.create_task(self._pages(pages))
+        worker = asyncio.create_task(self._single_worker())
+        bulk_cutoff = time_snowflake(time.time() - BULK_MAX_AGE)
+        batch = []
+        try:
+            while self.matched < self.limit:
+                page = await pages.get()
+                if page is None:
+                    break
+                for payload in page:
+                    self.scanned += 1
+                    if not self.check(payload):
+                        continue
+                    self.matched += 1
+                    message_id = int(payload["id"])
+                    if message_id > bulk_cutoff:
+                        batch.append(message_id)
+                        if len(batch) == BULK_MAX:
+                            await self._bulk_delete(batch)
+                            batch = []
+                    else:
+                        self._singles.put_nowait(message_id)
+                    if self.matched >= self.limit:
+                        break
+                self._report()
+            if batch:
+                await self._bulk_delete(batch)
+            self._singles.put_nowait(None)
+            await worker
+        except discord.HTTPException as e:
+            self.error = e
+        finally:
+            producer.cancel()
+            worker.cancel()
+            for task in (producer, worker):
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+            self.done = True
+            if self._progress_task is not None:
+                await asyncio.gather(self._progress_task, return_exceptions=True)
+            if self.on_progress is not None:
+                await self.on_progress(self)
+        return self
+
+    def stats(self):
+        return {
+            "scanned": self.scanned,
+            "matched": self.matched,
+            "bulk_deleted": self.bulk_deleted,
+            "single_deleted": self.single_deleted,
+            "failed": self.failed,
+            "seconds": time.monotonic() - self.started if self.started else 0.0,
+        }
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+
+from storage import atomic_write
+
+# Per-(guild, user) token buckets for XP grants and command cooldowns.
+#
+# A bucket of `uses` tokens refilling one every `per / uses` seconds is kept
+# as a single float, the time at which it will be full again (the "GCRA"
+# formulation). A full bucket behaves exactly like a missing one, so entries
+# are deleted as soon as they refill. Entries are kept in last-use order and
+# every hit sweeps a few expired ones off the front, so memory tracks the
+# users active within the limit's period without a background task.
+#
+# The overrides and the buckets of actions limited over PERSISTED_PERIOD or
+# longer (/daily, /work) are saved to one file on shutdown, so a restart
+# doesn't hand everyone a fresh claim; shorter ones just start over.
+
+# action -> (uses, per seconds)
+DEFAULT_LIMITS = {
+    "xp": (1, 60),
+    "daily": (1, 86400),
+    "work": (1, 3600),
+    "rob": (1, 300),
+    "give": (5, 60),
+    "deposit": (10, 60),
+    "withdraw": (10, 60),
+}
+
+SWEEP_PER_HIT = 2
+
+PERSISTED_PERIOD = 3600
+
+
+class RateLimiter:
+    def __init__(self, filename, defaults=DEFAULT_LIMITS):
+        self.filename = filename
+        self.defaults = dict(defaults)
+        # guild_id -> {action: (uses, per)}; per == 0 turns the limit off
+        self.overrides = {}
+        # action -> OrderedDict((guild_id, user_id) -> time the bucket is full)
+        self.buckets = {action: OrderedDict() for action in self.defaults}
+        self.allowed = dict.fromkeys(self.defaults, 0)
+        self.suppressed = dict.fromkeys(self.defaults, 0)
+        if os.path.exists(filename):
+            with open(filename, 'r') as f:
+                data = json.load(f)
+            if "overrides" not in data:
+                # Files written before buckets were saved hold only the overrides
+                data = {"overrides": data}
+            self.overrides = {
+                int(guild_id): {action: tuple(limit) for action, limit in limits.items()}
+                for guild_id, limits in data["overrides"].items()
+            }
+            now = time.time()
+            for action, entries in data.get("buckets", {}).items():
+                if action in self.buckets:
+                    for guild_id, user_id, full_at in sorted(entries, key=lambda entry: entry[2]):
+                        if full_at > now:
+                            self.buckets[action][guild_id, user_id] = full_at
+
+    def limit(self, guild_id, action):
+        return self.overrides.get(guild_id, {}).get(action, self.defaults[action])
+
+    def hit(self, guild_id, user_id, action, now=None):
+        # Takes a token; returns 0 if one was available, otherwise the
+        # seconds until there will be
+        now = now or time.time()
+        buckets = self.buckets[action]
+        self._sweep(buckets, now)
+        uses, per = self.limit(guild_id, action)
+        if not per:
+            self.allowed[action] += 1
+            return 0.0
+        interval = per / uses
+        key = (guild_id, user_id)
+        full_at = max(buckets.pop(key, now), now)
+        # Spending one more token must not push it past `uses` intervals out
+        wait = full_at + interval - now - per
+        if wait > 0:
+            buckets[key] = full_at
+            self.suppressed[action] += 1
+            return wait
+        buckets[key] = full_at + interval
+        self.allowed[action] += 1
+        return 0.0
+
+    def _sweep(self, buckets, now):
+        for _ in range(SWEEP_PER_HIT):
+            if not buckets:
+                return
+            key, full_at = next(iter(buckets.items()))
+            if full_at > now:
+                return
+            del buckets[key]
+
+    def set_limit(self, guild_id, action, uses, per):
+        self.overrides.setdefault(guild_id, {})[action] = (uses, per)
+
+    def reset_limit(self, guild_id, action):
+        limits = self.overrides.get(guild_id, {})
+        limits.pop(action, None)
+        if not limits:
+            self.overrides.pop(guild_id, None)
+
+    def dump(self):
+        now = time.time()
+        return json.dumps({
+            "overrides": {str(guild_id): limits for guild_id, limits in self.overrides.items()},
+            "buckets": {
+                action: [[guild_id, user_id, full_at] for (guild_id, user_id), full_at in buckets.items() if full_at > now]
+                for action, buckets in self.buckets.items() if self.defaults[action][1] >= PERSISTED_PERIOD
+            },
+        })
+
+    async def flush(self):
+        # Serialized on the loop, written off it
+        text = self.dump()
+        await asyncio.to_thread(atomic_write, self.filename, text)
+
+    def flush_sync(self):
+        atomic_write(self.filename, self.dump())
+
+    def stats(self):
+        stats = {"tracked": sum(len(buckets) for buckets in self.buckets.values())}
+        for action in self.defaults:
+            stats[f"{action}_allowed"] = self.allowed[action]
+            stats[f"{action}_suppressed"] = self.suppressed[action]
+        return stats
@@ -0,0 +1,29 @@
+import json
+import time
+
+# Records gateway traffic for loadtest.py --replay. Kept apart from the load
+# test so the bot only imports this, and only when GATEWAY_RECORD_FILE is set.
+
+RECORDED_EVENTS = ("MESSAGE_CREATE", "INTERACTION_CREATE")
+
+
+class GatewayRecorder:
+    # Listener for on_socket_raw_receive (needs enable_debug_events=True)
+    # that keeps the dispatches the load test can replay
+    def __init__(self, filename):
+        self.file = open(filename, 'a')
+        self.started = time.monotonic()
+        self.recorded = 0
+
+    async def on_socket_raw_receive(self, msg):
+        if not any(event in msg for event in RECORDED_EVENTS):
+            return
+        payload = json.loads(msg)
+        if payload.get("t") not in RECORDED_EVENTS:
+            return
+        entry = [round(time.monotonic() - self.started, 4), payload["t"], payload["d"]]
+        self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.recorded += 1
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,196 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import time
+
+from storage import atomic_write
+
+
+class Scheduler:
+    # Single timer task over a min-heap of (due, job_id, kind, payload).
+    # Jobs are persisted to an append-only log ([id, due, kind, payload] when
+    # added, [id] once delivered) that is compacted once it is mostly
+    # tombstones. A job is only tombstoned after its handler returned, so one
+    # cut off by a crash or a shutdown is delivered again on the next start;
+    # one whose handler failed (or isn't registered) is retried after
+    # retry_delay seconds.
+    def __init__(self, filename, batch_window=1.0, flush_interval=1.0, max_concurrency=50, retry_delay=60.0):
+        self.filename = filename
+        self.batch_window = batch_window
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.handlers = {}
+        self.heap = []
+        # job_id -> job taken off the heap and being delivered
+        self.in_flight = {}
+        self.next_id = 1
+        self.tombstones = 0
+        self.delivered = 0
+        self.failed = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending_lines = []
+        self._wake = asyncio.Event()
+        self._io_lock = asyncio.Lock()
+        self._tasks = []
+        self._deliveries = set()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.filename):
+            return
+        jobs = {}
+        with open(self.filename, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn last line from a crash mid-append
+                    continue
+                if len(entry) == 1:
+                    jobs.pop(entry[0], None)
+                    self.tombstones += 1
+                else:
+                    jobs[entry[0]] = entry
+        for job_id, due, kind, payload in jobs.values():
+            self.heap.append((due, job_id, kind, payload))
+            self.next_id = max(self.next_id, job_id + 1)
+        heapq.heapify(self.heap)
+
+    def register(self, kind, handler):
+        # handler(list of payloads) is awaited with every job of this kind
+        # that comes due in the same batch window
+        self.handlers[kind] = handler
+
+    def add(self, kind, due, payload):
+        job_id = self.next_id
+        self.next_id += 1
+        if not self.heap or due < self.heap[0][0]:
+            self._wake.set()
+        heapq.heappush(self.heap, (due, job_id, kind, payload))
+        self._pending_lines.append(json.dumps([job_id, due, kind, payload], separators=(",", ":")))
+        return job_id
+
+    def pending(self, kind=None):
+        if kind is None:
+            return len(self.heap)
+        return sum(1 for job in self.heap if job[2] == kind)
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run()), asyncio.create_task(self._flusher())]
+
+    async def close(self, timeout=10.0):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        # Deliveries under way get to finish and be tombstoned; the ones that
+        # don't in time stay in the log for the next start
+        if self._deliveries:
+            _, unfinished = await asyncio.wait(self._deliveries, timeout=timeout)
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                await asyncio.wait(unfinished)
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            if not self.heap:
+                await self._wake.wait()
+                continue
+            delay = self.heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Everything due within the batch window goes out together
+            cutoff = time.time() + self.batch_window
+            batches = {}
+            while self.heap and self.heap[0][0] <= cutoff:
+                job = heapq.heappop(self.heap)
+                self.in_flight[job[1]] = job
+                batches.setdefault(job[2], []).append(job)
+            for kind, jobs in batches.items():
+                task = asyncio.create_task(self._deliver(kind, jobs))
+                self._deliveries.add(task)
+                task.add_done_callback(self._deliveries.discard)
+
+    def _retry(self, jobs):
+        # Back on the heap only; the log still has them as not done
+        due = time.time() + self.retry_delay
+        for _, job_id, kind, payload in jobs:
+            del self.in_flight[job_id]
+            heapq.heappush(self.heap, (due, job_id, kind, payload))
+        self._wake.set()
+
+    async def _deliver(self, kind, jobs):
+        handler = self.handlers.get(kind)
+        if handler is None:
+            print(f"❌ No handler for scheduled {kind} jobs; retrying in {self.retry_delay:g}s")
+            self.failed += len(jobs)
+            self._retry(jobs)
+            return
+        async with self._semaphore:
+            try:
+                await handler([payload for _, _, _, payload in jobs])
+            except Exception as e:
+                self.failed += len(jobs)
+                print(f"❌ Failed to deliver {len(jobs)} scheduled {kind} job(s), retrying in {self.retry_delay:g}s: {e}")
+                self._retry(jobs)
+                return
+        self.delivered += len(jobs)
+        for _, job_id, _, _ in jobs:
+            del self.in_flight[job_id]
+            self._pending_lines.append(json.dumps([job_id]))
+        self.tombstones += len(jobs)
+
+    async def _flusher(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Failed to save schedule: {e}")
+
+    def _append(self, lines):
+        with open(self.filename, 'a') as f:
+            f.write("\n".join(lines) + "\n")
+
+    async def flush(self):
+        async with self._io_lock:
+            if self.tombstones > max(1000, len(self.heap)):
+                # Compact: rewrite only the live jobs, including the ones
+                # being delivered right now
+                jobs = itertools.chain(self.heap, self.in_flight.values())
+                lines = [json.dumps([job_id, due, kind, payload], separators=(",", ":"))
+                         for due, job_id, kind, payload in jobs]
+                # Anything logged while the file is written is about jobs
+                # the new file has, so it stays pending; a failed write
+                # puts back what it was meant to replace
+                pending, self._pending_lines = self._pending_lines, []
+                tombstones, self.tombstones = self.tombstones, 0
+                try:
+                    await asyncio.to_thread(atomic_write, self.filename, "".join(line + "\n" for line in lines))
+                except BaseException:
+                    self._pending_lines = pending + self._pending_lines
+                    self.tombstones += tombstones
+                    raise
+            elif self._pending_lines:
+                lines = self._pending_lines
+                self._pending_lines = []
+                try:
+                    await asyncio.to_thread(self._append, lines)
+                except BaseException:
+                    self._pending_lines = lines + self._pending_lines
+                    raise
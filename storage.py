@@ -0,0 +1,667 @@
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections.abc import MutableMapping
+
+from models import RECORD_TYPES, decode_guild, encode_record
+
+
+def load_data(filename):
+    if os.path.exists(filename):
+        with open(filename, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def atomic_write(filename, text):
+    # Write to a temp file in the same directory, then rename over the target
+    # so readers never see a half-written file. Accepts str or bytes.
+    directory = os.path.dirname(os.path.abspath(filename))
+    data = text if isinstance(text, bytes) else text.encode()
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filename)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+
+# ==================== JSON BACKEND ====================
+
+def _join_fragments(fragments):
+    # Builds the file from (guild_id, serialized guild as bytes). Returns the
+    # bytes and guild_id -> (start, end) of each guild's value in them.
+    parts = [b"{"]
+    position = 1
+    spans = {}
+    for index, (guild_id, fragment) in enumerate(fragments):
+        key = (", " if index else "") + json.dumps(str(guild_id)) + ": "
+        parts.append(key.encode())
+        position += len(parts[-1])
+        parts.append(fragment)
+        spans[int(guild_id)] = (position, position + len(fragment))
+        position += len(fragment)
+    parts.append(b"}")
+    return b"".join(parts), spans
+
+
+class JsonBackend:
+    def __init__(self, files, partition=None):
+        self.files = files
+        # In cluster mode each process owns a subset of guilds and must leave
+        # the other processes' guilds in the shared files untouched.
+        self.partition = partition
+        # name -> {guild_id: (start, end)} of each guild in the file as this
+        # process last wrote it. A flush copies the clean guilds' bytes from
+        # there and only serializes the dirty ones, without parsing the file.
+        self.spans = {}
+
+    def load(self, name):
+        filename = self.files[name]
+        if self.partition is not None:
+            raw = {guild_id: value for guild_id, value in load_data(filename).items() if self.partition(guild_id)}
+        elif os.path.exists(filename):
+            with open(filename, 'rb') as f:
+                previous = f.read()
+            raw = json.loads(previous)
+            # A file last written by this backend can be spliced from the
+            # first flush on; any other layout is rewritten by that flush
+            text, spans = _join_fragments([(guild_id, json.dumps(value).encode()) for guild_id, value in raw.items()])
+            if text == previous:
+                self.spans[name] = spans
+        else:
+            raw = {}
+        return {int(guild_id): decode_guild(name, value) for guild_id, value in raw.items()}
+
+    def iter_all(self, name):
+        # (guild_id, user_id, value) for every stored user, without keeping
+        # the collection loaded
+        for guild_id, guild in load_data(self.files[name]).items():
+            if self.partition is None or self.partition(guild_id):
+                for user_id, value in decode_guild(name, guild).items():
+                    yield int(guild_id), user_id, value
+
+    def prepare(self, name, data, dirty):
+        # Only dirty guilds are serialized on the event loop; None marks a
+        # removed guild. write() takes every other guild from the file as it is.
+        return {
+            guild_id: json.dumps(data[guild_id], default=encode_record).encode() if guild_id in data else None
+            for guild_id in dirty
+        }
+
+    def _merge(self, name, filename, changes):
+        spans = self.spans.get(name)
+        if spans is not None and self.partition is None:
+            with open(filename, 'rb') as f:
+                previous = f.read()
+            fragments = [(guild_id, previous[start:end]) for guild_id, (start, end) in spans.items() if guild_id not in changes]
+        else:
+            # First write (the file may not be in our layout yet), or other
+            # processes write to the same file: parse it
+            fragments = [
+                (guild_id, json.dumps(value).encode())
+                for guild_id, value in load_data(filename).items()
+                if int(guild_id) not in changes
+            ]
+        fragments += [(guild_id, text) for guild_id, text in changes.items() if text is not None]
+        return _join_fragments(fragments)
+
+    def write(self, name, changes):
+        filename = self.files[name]
+        if self.partition is None:
+            text, spans = self._merge(name, filename, changes)
+            written = atomic_write(filename, text)
+        else:
+            import fcntl
+            with open(filename + ".lock", 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                text, spans = self._merge(name, filename, changes)
+                written = atomic_write(filename, text)
+        # Only once the file really holds them
+        self.spans[name] = spans
+        return written
+
+    def close(self):
+        pass
+
+
+# ==================== PARTITIONED JSON BACKEND ====================
+
+class PartitionedJsonBackend:
+    # One JSON file per guild (directory/<collection>/<guild id>.json), read
+    # the first time the guild is used. A flush rewrites only dirty guilds'
+    # files and processes in a cluster never share a file.
+    def __init__(self, directory, legacy_files=None, partition=None):
+        self.directory = directory
+        self.legacy_files = legacy_files or {}
+        self.partition = partition
+        self.clock = itertools.count()
+
+    def _path(self, name, guild_id):
+        return os.path.join(self.directory, name, f"{guild_id}.json")
+
+    def _split_legacy(self, name):
+        # First run after switching from the single-file layout
+        filename = self.legacy_files.get(name)
+        collection = os.path.join(self.directory, name)
+        os.makedirs(self.directory, exist_ok=True)
+        if not filename or not os.path.exists(filename):
+            os.makedirs(collection, exist_ok=True)
+            return
+        # Built aside and renamed into place, so another cluster process never
+        # sees a half-split directory
+        staging = tempfile.mkdtemp(dir=self.directory, prefix=f".{name}-")
+        for guild_id, value in load_data(filename).items():
+            with open(os.path.join(staging, f"{guild_id}.json"), 'w') as f:
+                json.dump(value, f)
+        try:
+            os.rename(staging, collection)
+        except OSError:
+            # Someone else finished first
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        print(f"📂 Split {filename} into per-guild files in {collection}")
+
+    def load(self, name):
+        if not os.path.isdir(os.path.join(self.directory, name)):
+            self._split_legacy(name)
+        return GuildMap(lambda guild_id: self.load_guild(name, guild_id), self.clock)
+
+    def load_guild(self, name, guild_id):
+        if self.partition is not None and not self.partition(guild_id):
+            return {}
+        try:
+            with open(self._path(name, guild_id), 'r') as f:
+                return decode_guild(name, json.load(f))
+        except FileNotFoundError:
+            return {}
+
+    def iter_all(self, name):
+        collection = os.path.join(self.directory, name)
+        if not os.path.isdir(collection):
+            self._split_legacy(name)
+        for entry in sorted(os.listdir(collection)):
+            if entry.endswith(".json"):
+                guild_id = int(entry[:-len(".json")])
+                for user_id, value in self.load_guild(name, guild_id).items():
+                    yield guild_id, user_id, value
+
+    def prepare(self, name, data, dirty):
+        # Guild id -> serialized guild, or None if the guild was deleted
+        return [
+            (guild_id, json.dumps(data[guild_id], default=encode_record) if guild_id in data else None)
+            for guild_id in dirty
+        ]
+
+    def write(self, name, guilds):
+        written = 0
+        for guild_id, text in guilds:
+            if text is None:
+                try:
+                    os.unlink(self._path(name, guild_id))
+                except FileNotFoundError:
+                    pass
+            else:
+                written += atomic_write(self._path(name, guild_id), text)
+        return written
+
+    def close(self):
+        pass
+
+
+# ==================== SQLITE BACKEND ====================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mentions (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS economy (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    balance INTEGER NOT NULL,
+    bank INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS levels (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    xp INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    messages INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS warnings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    moderator TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS warnings_user ON warnings (guild_id, user_id, id);
+
+-- Rankings come from the in-memory leaderboards, not from SQL; databases
+-- created before that still carry these indexes, which only slowed writes
+DROP INDEX IF EXISTS economy_total;
+DROP INDEX IF EXISTS levels_rank;
+"""
+
+# Value columns of each table. Mentions store a bare count per user and
+# warnings store a list of rows per user.
+COLUMNS = {
+    "mentions": ("count",),
+    "economy": ("balance", "bank"),
+    "levels": ("xp", "level", "messages"),
+    "warnings": ("reason", "moderator", "timestamp"),
+}
+
+# The sqlite3 module caches compiled statements by SQL text, so building each
+# statement once here means every flush reuses the same prepared statements.
+SELECT_SQL = {
+    name: f"SELECT user_id, {', '.join(columns)} FROM {name} WHERE guild_id = ?"
+    + (" ORDER BY id" if name == "warnings" else "")
+    for name, columns in COLUMNS.items()
+}
+INSERT_SQL = {
+    name: ("INSERT" if name == "warnings" else "INSERT OR REPLACE")
+    + f" INTO {name} (guild_id, user_id, {', '.join(columns)}) VALUES (?, ?, {', '.join('?' for _ in columns)})"
+    for name, columns in COLUMNS.items()
+}
+DELETE_GUILD_SQL = {name: f"DELETE FROM {name} WHERE guild_id = ?" for name in COLUMNS}
+DELETE_USER_SQL = {name: f"DELETE FROM {name} WHERE guild_id = ? AND user_id = ?" for name in COLUMNS}
+
+
+def _rows_for_user(name, guild_id, user_id, value):
+    if name == "mentions":
+        return [(guild_id, user_id, value)]
+    columns = COLUMNS[name]
+    if name == "warnings":
+        return [(guild_id, user_id, *(warning[c] for c in columns)) for warning in value]
+    return [(guild_id, user_id, *(value[c] for c in columns))]
+
+
+# Rough in-memory cost of one user entry, measured with tracemalloc on
+# typical records; used to keep loaded guilds under the memory budget
+ENTRY_BYTES = 128
+
+# Guilds remembered as having no rows, so repeated lookups skip the query;
+# the oldest are forgotten past this many
+ABSENT_LIMIT = 10000
+
+
+class GuildMap(MutableMapping):
+    # Guild-keyed mapping that pulls a guild's rows from the backend the first
+    # time it is touched, so a lookup never loads other guilds. Loaded guilds
+    # can be evicted again once they are saved; the next access reloads them.
+    def __init__(self, loader, clock=None):
+        self._loader = loader
+        self._guilds = {}
+        # Insertion-ordered, so the oldest entries are the first ones dropped
+        self._absent = {}
+        # guild_id -> clock value of its last access, for LRU eviction
+        self._clock = clock or itertools.count()
+        self.accessed = {}
+        self.loads = 0
+
+    def _load(self, guild_id):
+        if guild_id in self._guilds:
+            self.accessed[guild_id] = next(self._clock)
+            return True
+        if guild_id in self._absent:
+            return False
+        value = self._loader(guild_id)
+        self.loads += 1
+        if not value:
+            self._mark_absent(guild_id)
+            return False
+        self._guilds[guild_id] = value
+        self.accessed[guild_id] = next(self._clock)
+        return True
+
+    def __getitem__(self, guild_id):
+        if self._load(guild_id):
+            return self._guilds[guild_id]
+        raise KeyError(guild_id)
+
+    def __setitem__(self, guild_id, value):
+        self._absent.pop(guild_id, None)
+        self._guilds[guild_id] = value
+        self.accessed[guild_id] = next(self._clock)
+
+    def __delitem__(self, guild_id):
+        if not self._load(guild_id):
+            raise KeyError(guild_id)
+        del self._guilds[guild_id]
+        del self.accessed[guild_id]
+        self._mark_absent(guild_id)
+
+    def _mark_absent(self, guild_id):
+        self._absent[guild_id] = None
+        if len(self._absent) > ABSENT_LIMIT:
+            del self._absent[next(iter(self._absent))]
+
+    def __contains__(self, guild_id):
+        return self._load(guild_id)
+
+    def __iter__(self):
+        return iter(self._guilds)
+
+    def __len__(self):
+        return len(self._guilds)
+
+    def loaded_bytes(self, guild_id):
+        return len(self._guilds[guild_id]) * ENTRY_BYTES
+
+    def evict(self, guild_id):
+        # Only safe for guilds whose changes have been written
+        del self._guilds[guild_id]
+        del self.accessed[guild_id]
+
+
+class SqliteBackend:
+    def __init__(self, filename, partition=None):
+        self.filename = filename
+        self.partition = partition
+        # Reads happen on the event loop; flushes run in a worker thread on a
+        # separate connection. WAL lets the two proceed without blocking.
+        self.writer = sqlite3.connect(filename, check_same_thread=False)
+        self.writer.execute("PRAGMA journal_mode=WAL")
+        self.writer.execute("PRAGMA synchronous=NORMAL")
+        self.writer.executescript(SCHEMA)
+        self.reader = sqlite3.connect(filename)
+        self.clock = itertools.count()
+
+    def load(self, name):
+        return GuildMap(lambda guild_id: self.load_guild(name, guild_id), self.clock)
+
+    def load_guild(self, name, guild_id):
+        guild = {}
+        if self.partition is not None and not self.partition(guild_id):
+            return guild
+        columns = COLUMNS[name]
+        record_type = RECORD_TYPES.get(name)
+        for row in self.reader.execute(SELECT_SQL[name], (int(guild_id),)):
+            user_id = row[0]
+            if name == "mentions":
+                guild[user_id] = row[1]
+            elif name == "warnings":
+                guild.setdefault(user_id, []).append(dict(zip(columns, row[1:])))
+            else:
+                guild[user_id] = record_type(*row[1:])
+        return guild
+
+    def iter_all(self, name):
+        guild_ids = [row[0] for row in self.reader.execute(f"SELECT DISTINCT guild_id FROM {name}")]
+        for guild_id in guild_ids:
+            for user_id, value in self.load_guild(name, guild_id).items():
+                yield guild_id, user_id, value
+
+    def prepare(self, name, data, dirty):
+        # Snapshot the rows of dirty records on the event loop so the worker
+        # thread never reads records that are still being mutated.
+        guild_deletes = []
+        user_deletes = []
+        rows = []
+        for guild_id, user_ids in dirty.items():
+            guild = data.get(guild_id, {})
+            if user_ids is None:
+                guild_deletes.append((int(guild_id),))
+                user_ids = guild.keys()
+            for user_id in user_ids:
+                if name == "warnings" or user_id not in guild:
+                    user_deletes.append((int(guild_id), int(user_id)))
+                if user_id in guild:
+                    rows.extend(_rows_for_user(name, int(guild_id), int(user_id), guild[user_id]))
+        return guild_deletes, user_deletes, rows
+
+    def write(self, name, prepared):
+        guild_deletes, user_deletes, rows = prepared
+        # One transaction per flush
+        with self.writer:
+            self.writer.executemany(DELETE_GUILD_SQL[name], guild_deletes)
+            self.writer.executemany(DELETE_USER_SQL[name], user_deletes)
+            self.writer.executemany(INSERT_SQL[name], rows)
+        # Approximate payload size; SQLite's own page writes aren't visible here
+        return sum(len(str(value)) for row in rows for value in row)
+
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+
+
+def create_backend(kind, files, database_file, partition=None, data_dir="data"):
+    if kind == "json":
+        return JsonBackend(files, partition)
+    if kind == "partitioned":
+        return PartitionedJsonBackend(data_dir, files, partition)
+    if kind == "sqlite":
+        return SqliteBackend(database_file, partition)
+    raise ValueError(f"Unknown storage backend: {kind}")
+
+
+def migrate_json_to_sqlite(files, database_file):
+    # One-shot import of the JSON data files into a SQLite database
+    backend = SqliteBackend(database_file)
+    counts = {}
+    try:
+        for name, filename in files.items():
+            data = load_data(filename)
+            dirty = {guild_id: None for guild_id in data}
+            prepared = backend.prepare(name, data, dirty)
+            # write() returns the payload size for the flush stats; report rows
+            backend.write(name, prepared)
+            counts[name] = len(prepared[2])
+    finally:
+        backend.close()
+    return counts
+
+
+# ==================== WRITE-BEHIND STORE ====================
+
+class WriteBehindStore:
+    def __init__(self, backend, flush_interval=5.0, flush_threshold=500, memory_budget=None):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.data = {}
+        # name -> {guild_id: set of dirty user ids, or None for the whole guild}
+        self.dirty = {}
+        # Collections only written by an explicit flush(names), not the timer
+        self.manual = set()
+        self.unsaved = set()
+        self.dirty_count = 0
+        # name -> {"flushes": n, "bytes": n, "seconds": total write time}
+        self.flush_stats = {}
+        # Optional callback(name, bytes, seconds) run after every flush write
+        self.on_flush = None
+        # Lazily loaded guilds are evicted, least recently used first, when
+        # their estimated size exceeds memory_budget bytes after a flush.
+        # on_evict(name, guild_id) lets caches built on top drop them too.
+        self.memory_budget = memory_budget
+        self.on_evict = None
+        self.evictions = 0
+        self._evict_mark = None
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._closing = False
+
+    def register(self, name, auto_flush=True):
+        if not auto_flush:
+            self.manual.add(name)
+        self.data[name] = self.backend.load(name)
+        self.dirty[name] = {}
+        self.flush_stats[name] = {"flushes": 0, "bytes": 0, "seconds": 0.0}
+        return self.data[name]
+
+    def mark_dirty(self, name, guild_id, *user_ids):
+        # Without user ids the whole guild is rewritten on the next flush
+        dirty = self.dirty[name]
+        added = 0
+        if not user_ids:
+            dirty[guild_id] = None
+            added = 1
+        elif guild_id not in dirty:
+            dirty[guild_id] = set(user_ids)
+            added = len(user_ids)
+        elif dirty[guild_id] is not None:
+            dirty[guild_id].update(user_ids)
+            added = len(user_ids)
+        if name in self.manual:
+            return
+        self.dirty_count += added
+        if self.dirty_count >= self.flush_threshold:
+            self._wake.set()
+
+    def start(self):
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush([name for name in self.data if name not in self.manual])
+            except Exception as e:
+                print(f"❌ Failed to flush data: {e}")
+
+    def _prepare(self, name):
+        dirty = self.dirty[name]
+        self.dirty[name] = {}
+        self.dirty_count = sum(len(d) for n, d in self.dirty.items() if n not in self.manual)
+        self.unsaved.add(name)
+        try:
+            return dirty, self.backend.prepare(name, self.data[name], dirty)
+        except BaseException:
+            self._restore(name, dirty)
+            raise
+
+    def _restore(self, name, dirty):
+        for guild_id, user_ids in dirty.items():
+            if user_ids is None:
+                self.mark_dirty(name, guild_id)
+            else:
+                self.mark_dirty(name, guild_id, *user_ids)
+
+    async def flush(self, names=None):
+        async with self._lock:
+            for name in self.data if names is None else names:
+                if not self.dirty[name] and name not in self.unsaved:
+                    continue
+                started = time.perf_counter()
+                dirty, prepared = self._prepare(name)
+                try:
+                    written = await asyncio.to_thread(self.backend.write, name, prepared)
+                except BaseException:
+                    self._restore(name, dirty)
+                    raise
+                self.unsaved.discard(name)
+                self._record_flush(name, written, time.perf_counter() - started)
+            if self.memory_budget is not None:
+                self._evict()
+
+    def loaded(self):
+        # (name, guild_id) -> estimated bytes of every lazily loaded guild
+        return {
+            (name, guild_id): data.loaded_bytes(guild_id)
+            for name, data in self.data.items() if isinstance(data, GuildMap)
+            for guild_id in data
+        }
+
+    def _evict(self):
+        clock = getattr(self.backend, "clock", None)
+        if clock is None:
+            # Eagerly loaded backend, nothing to evict
+            return
+        # Guilds used since the previous pass stay: a handler may still be
+        # holding their records across an await
+        mark, self._evict_mark = self._evict_mark, next(clock)
+        loaded = self.loaded()
+        total = sum(loaded.values())
+        if mark is None or total <= self.memory_budget:
+            return
+        candidates = sorted(
+            (self.data[name].accessed[guild_id], name, guild_id)
+            for name, guild_id in loaded
+            if guild_id not in self.dirty[name] and name not in self.unsaved
+            and self.data[name].accessed[guild_id] < mark
+        )
+        for _, name, guild_id in candidates:
+            if total <= self.memory_budget:
+                break
+            self.data[name].evict(guild_id)
+            total -= loaded[name, guild_id]
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(name, guild_id)
+
+    def _record_flush(self, name, written, seconds):
+        stats = self.flush_stats[name]
+        stats["flushes"] += 1
+        stats["bytes"] += written
+        stats["seconds"] += seconds
+        if self.on_flush is not None:
+            self.on_flush(name, written, seconds)
+
+    async def close(self):
+        # Let the flusher finish its current write instead of cancelling it
+        # halfway, then flush whatever is still dirty.
+        if self._task is not None:
+            self._closing = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def flush_sync(self):
+        # Final flush once the event loop is gone. Also rewrites anything whose
+        # background write was interrupted.
+        for name in self.data:
+            if self.dirty[name] or name in self.unsaved:
+                started = time.perf_counter()
+                dirty, prepared = self._prepare(name)
+                written = self.backend.write(name, prepared)
+                self.unsaved.discard(name)
+                self._record_flush(name, written, time.perf_counter() - started)
+        self.backend.close()
+
+
+if __name__ == "__main__":
+    # python storage.py migrate [database_file]
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("Usage: python storage.py migrate [database_file]")
+        sys.exit(1)
+    database_file = sys.argv[2] if len(sys.argv) > 2 else "bot.db"
+    files = {
+        "mentions": "mentions.json",
+        "economy": "economy.json",
+        "warnings": "warnings.json",
+        "levels": "levels.json",
+    }
+    for name, rows in migrate_json_to_sqlite(files, database_file).items():
+        print(f"✅ Imported {rows} {name} row(s) into {database_file}")
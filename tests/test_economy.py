@@ -0,0 +1,137 @@
+import asyncio
+import json
+import random
+
+from economy import Economy, Ledger
+from models import EconomyRecord
+from storage import atomic_write
+
+
+def make_economy(filename, data, snapshot_file=None, stripes=4):
+    # The bot's wiring, with the snapshot written straight to a JSON file
+    ledger = Ledger(filename)
+    changes = []
+
+    def account(guild_id, user_id):
+        return data.setdefault(guild_id, {}).setdefault(user_id, EconomyRecord())
+
+    async def snapshot():
+        atomic_write(snapshot_file, json.dumps({
+            str(guild_id): {str(user_id): record.to_json() for user_id, record in guild.items()}
+            for guild_id, guild in data.items()
+        }))
+
+    economy = Economy(ledger, account, lambda guild_id, *user_ids: changes.append((guild_id, user_ids)), snapshot, stripes=stripes)
+    return economy, changes
+
+
+def balances(data):
+    return {
+        (guild_id, user_id): (record.balance, record.bank)
+        for guild_id, guild in data.items() for user_id, record in guild.items()
+    }
+
+
+def test_concurrent_transfers_keep_the_total(tmp_path):
+    filename = str(tmp_path / "economy.ledger")
+    data = {}
+    # Few stripes, so unrelated accounts share locks too
+    economy, _ = make_economy(filename, data, stripes=4)
+    users = list(range(20))
+    rng = random.Random(1)
+
+    async def transfer(giver, receiver, amount, fail):
+        async with economy.transaction(1, giver, receiver, kind="give") as (source, target):
+            # Read, yield to the other transfers, then write: without the
+            # locks this loses updates
+            source_balance, target_balance = source.balance, target.balance
+            await asyncio.sleep(0)
+            if source_balance < amount:
+                return
+            source.balance = source_balance - amount
+            target.balance = target_balance + amount
+            if fail:
+                raise RuntimeError("rolled back")
+
+    async def run():
+        transfers = []
+        for _ in range(2000):
+            giver, receiver = rng.sample(users, 2)
+            transfers.append(transfer(giver, receiver, rng.randint(1, 300), rng.random() < 0.1))
+        results = await asyncio.gather(*transfers, return_exceptions=True)
+        await economy.ledger.flush()
+        return [result for result in results if result is not None]
+
+    errors = asyncio.run(run())
+
+    assert errors and all(str(error) == "rolled back" for error in errors)
+    assert sum(data[1][user].balance for user in users) == 1000 * len(users)
+    assert all(data[1][user].balance >= 0 for user in users)
+    # The ledger alone rebuilds the same balances
+    replayed = {}
+    Ledger(filename).replay(replayed)
+    assert balances(replayed) == balances(data)
+
+
+def test_replay_skips_torn_last_line(tmp_path):
+    filename = str(tmp_path / "economy.ledger")
+    data = {}
+    economy, _ = make_economy(filename, data)
+
+    async def run():
+        for user_id, amount in ((1, 100), (2, 200), (1, 50)):
+            async with economy.transaction(7, user_id, kind="work") as (account,):
+                account.balance += amount
+        await economy.ledger.flush()
+
+    asyncio.run(run())
+    # A crash in the middle of the next append
+    with open(filename, 'a') as f:
+        f.write('[1700000000.0,"work",7,2,12')
+
+    replayed = {}
+    ledger = Ledger(filename)
+    touched = ledger.replay(replayed)
+    assert touched == {(7, 1), (7, 2)}
+    assert balances(replayed) == {(7, 1): (1150, 0), (7, 2): (1200, 0)}
+    assert ledger.entries == 3
+
+
+def test_compaction_keeps_changes_made_during_the_snapshot(tmp_path):
+    filename = str(tmp_path / "economy.ledger")
+    snapshot_file = str(tmp_path / "economy.json")
+    data = {}
+    economy, changes = make_economy(filename, data, snapshot_file)
+    inner_snapshot = economy.snapshot
+
+    async def slow_snapshot():
+        await inner_snapshot()
+        # A transaction that commits while the snapshot is being written
+        async with economy.transaction(1, 3, kind="deposit") as (account,):
+            account.balance -= 400
+            account.bank += 400
+
+    async def run():
+        for user_id in (1, 2):
+            async with economy.transaction(1, user_id, kind="daily") as (account,):
+                account.balance += 500
+        await economy.ledger.flush()
+        await economy.ledger.compact(slow_snapshot)
+        await economy.ledger.flush()
+
+    asyncio.run(run())
+
+    assert economy.ledger.compactions == 1
+    assert economy.ledger.entries == 1
+    assert [user_ids for _, user_ids in changes] == [(1,), (2,), (3,)]
+
+    # Restart: the snapshot plus what the fresh ledger has since
+    with open(snapshot_file) as f:
+        snapshot = json.load(f)
+    restored = {
+        int(guild_id): {int(user_id): EconomyRecord.from_json(record) for user_id, record in guild.items()}
+        for guild_id, guild in snapshot.items()
+    }
+    assert 3 not in restored[1]
+    assert Ledger(filename).replay(restored) == {(1, 3)}
+    assert balances(restored) == balances(data)
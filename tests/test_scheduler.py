@@ -0,0 +1,112 @@
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+
+from scheduler import Scheduler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Delivers one due job with a handler that never returns, after touching a
+# marker file so the test knows delivery has started
+CHILD = textwrap.dedent("""
+    import asyncio, sys, time
+    from scheduler import Scheduler
+
+    async def main(filename, marker):
+        scheduler = Scheduler(filename, batch_window=0, flush_interval=0.01)
+
+        async def handler(payloads):
+            open(marker, 'w').close()
+            await asyncio.Event().wait()
+
+        scheduler.register("remind", handler)
+        scheduler.add("remind", time.time(), [1, "hello"])
+        await scheduler.flush()
+        scheduler.start()
+        await asyncio.Event().wait()
+
+    asyncio.run(main(sys.argv[1], sys.argv[2]))
+""")
+
+
+def test_job_survives_kill_mid_delivery(tmp_path):
+    filename = str(tmp_path / "schedule.jsonl")
+    marker = tmp_path / "delivering"
+    child = subprocess.Popen([sys.executable, "-c", CHILD, filename, str(marker)], cwd=ROOT, env=os.environ | {"PYTHONPATH": ROOT})
+    try:
+        deadline = time.monotonic() + 10
+        while not marker.exists():
+            assert child.poll() is None and time.monotonic() < deadline
+            time.sleep(0.01)
+        # Give the flusher a few rounds to write whatever it would have
+        time.sleep(0.1)
+    finally:
+        child.send_signal(signal.SIGKILL)
+        child.wait()
+
+    reloaded = Scheduler(filename)
+    assert reloaded.pending("remind") == 1
+    assert reloaded.heap[0][3] == [1, "hello"]
+
+
+def test_close_keeps_unfinished_and_failed_jobs(tmp_path):
+    filename = str(tmp_path / "schedule.jsonl")
+
+    async def run():
+        scheduler = Scheduler(filename, batch_window=0, retry_delay=60)
+        started = asyncio.Event()
+
+        async def stuck(payloads):
+            started.set()
+            await asyncio.Event().wait()
+
+        async def broken(payloads):
+            raise RuntimeError("HTTP session closed")
+
+        async def works(payloads):
+            pass
+
+        scheduler.register("stuck", stuck)
+        scheduler.register("broken", broken)
+        scheduler.register("works", works)
+        now = time.time()
+        for kind in ("stuck", "broken", "works"):
+            scheduler.add(kind, now, [kind])
+        scheduler.start()
+        await asyncio.wait_for(started.wait(), 5)
+        await scheduler.close(timeout=0.1)
+
+    asyncio.run(run())
+    reloaded = Scheduler(filename)
+    assert sorted(job[2] for job in reloaded.heap) == ["broken", "stuck"]
+
+
+def test_failed_compaction_keeps_new_jobs(tmp_path, monkeypatch):
+    import scheduler as scheduler_module
+
+    filename = str(tmp_path / "schedule.jsonl")
+
+    def broken_write(filename, text):
+        raise OSError("disk full")
+
+    async def run():
+        scheduler = Scheduler(filename)
+        scheduler.add("remind", time.time() + 3600, [1, "hello"])
+        # Enough tombstones that the next flush compacts
+        scheduler.tombstones = 5000
+        with monkeypatch.context() as patch:
+            patch.setattr(scheduler_module, "atomic_write", broken_write)
+            try:
+                await scheduler.flush()
+            except OSError:
+                pass
+            else:
+                raise AssertionError("the write was meant to fail")
+        await scheduler.flush()
+
+    asyncio.run(run())
+    assert Scheduler(filename).pending("remind") == 1
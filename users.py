@@ -0,0 +1,108 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+import discord
+
+
+class UserResolver:
+    # Resolves user ids to users: gateway cache first, then a bounded LRU with
+    # a TTL, and only then REST. Users that no longer exist are cached as None.
+    def __init__(self, bot, max_size=5000, ttl=600, negative_ttl=3600):
+        self.bot = bot
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache = OrderedDict()
+        self.gateway_hits = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.fetch_errors = 0
+        # user_id -> task of the REST fetch in flight; concurrent misses for
+        # the same user wait on it instead of fetching again
+        self.pending = {}
+
+    def _remember(self, user_id, user):
+        ttl = self.ttl if user is not None else self.negative_ttl
+        self.cache[user_id] = (time.monotonic() + ttl, user)
+        self.cache.move_to_end(user_id)
+        while len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+
+    def _lookup(self, user_id, guild):
+        # Returns (found, user)
+        user = guild.get_member(user_id) if guild is not None else None
+        if user is None:
+            user = self.bot.get_user(user_id)
+        if user is not None:
+            self.gateway_hits += 1
+            return True, user
+
+        entry = self.cache.get(user_id)
+        if entry is not None:
+            expires, user = entry
+            if expires > time.monotonic():
+                self.cache.move_to_end(user_id)
+                if user is None:
+                    self.negative_hits += 1
+                else:
+                    self.hits += 1
+                return True, user
+            del self.cache[user_id]
+        return False, None
+
+    async def _fetch(self, user_id):
+        try:
+            user = await self.bot.fetch_user(user_id)
+        except discord.NotFound:
+            user = None
+        except discord.HTTPException:
+            # Don't cache transient failures
+            self.fetch_errors += 1
+            return None
+        self._remember(user_id, user)
+        return user
+
+    async def resolve_many(self, user_ids, guild=None):
+        # Returns {user_id: user or None}; cache misses are fetched concurrently
+        resolved = {}
+        missing = []
+        for user_id in dict.fromkeys(int(user_id) for user_id in user_ids):
+            found, user = self._lookup(user_id, guild)
+            if found:
+                resolved[user_id] = user
+            else:
+                missing.append(user_id)
+
+        if missing:
+            fetches = []
+            for user_id in missing:
+                task = self.pending.get(user_id)
+                if task is None:
+                    self.misses += 1
+                    task = asyncio.create_task(self._fetch(user_id))
+                    self.pending[user_id] = task
+                    task.add_done_callback(lambda _, user_id=user_id: self.pending.pop(user_id, None))
+                else:
+                    self.shared += 1
+                # Shielded: a cancelled caller mustn't cancel the others' fetch
+                fetches.append(asyncio.shield(task))
+            users = await asyncio.gather(*fetches)
+            resolved.update(zip(missing, users))
+        return resolved
+
+    async def resolve(self, user_id, guild=None):
+        return (await self.resolve_many([user_id], guild))[int(user_id)]
+
+    def stats(self):
+        return {
+            "gateway_hits": self.gateway_hits,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "fetch_errors": self.fetch_errors,
+            "size": len(self.cache),
+        }